@@ -0,0 +1,187 @@
+"""Сжатие ответов с выбором кодировки по Accept-Encoding.
+
+Поддерживаются br (пакет brotli), zstd (пакет zstandard) и gzip; первые
+два необязательны и без своих пакетов просто не предлагаются. Кодировка
+выбирается по q клиента, при равенстве — по порядку COMPRESSION_ENCODINGS.
+Потоковые ответы сжимаются по частям: каждая часть сбрасывается сразу,
+поэтому клиент получает данные без ожидания конца ответа.
+
+Не сжимаются: уже сжатые ответы, типы вне COMPRESSIBLE_TYPES, обычные
+ответы короче COMPRESSION_MIN_SIZE и ответы с Cache-Control: no-transform.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/rss+xml',
+    'application/atom+xml',
+    'image/svg+xml',
+)
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def chunk(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.finish()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdEncoder:
+    name = 'zstd'
+
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def available_encoders():
+    encoders = {'gzip': GzipEncoder}
+    if brotli is not None:
+        encoders['br'] = BrotliEncoder
+    if zstandard is not None:
+        encoders['zstd'] = ZstdEncoder
+    return encoders
+
+
+def parse_accept_encoding(header):
+    """'gzip;q=0.5, br' -> {'gzip': 0.5, 'br': 1.0}."""
+    result = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        result[coding] = quality
+    return result
+
+
+def negotiate(header, encoders=None):
+    """Лучшая кодировка из доступных или None."""
+    encoders = encoders or available_encoders()
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for name in settings.COMPRESSION_ENCODINGS:
+        if name not in encoders:
+            continue
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def _compressible(response):
+    if response.has_header('Content-Encoding'):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '').lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _stream(encoder, content):
+    for data in content:
+        compressed = encoder.chunk(data)
+        if compressed:
+            yield compressed
+    yield encoder.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы br, zstd или gzip — что лучше принимает клиент."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encoders = available_encoders()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not _compressible(response):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        name = negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encoders
+        )
+        if name is None:
+            return response
+        encoder = self.encoders[name](settings.COMPRESSION_LEVELS[name])
+        if response.streaming:
+            response.streaming_content = _stream(
+                encoder, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = encoder.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # сжатое тело отличается побайтно от исходного
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = name
+        return response
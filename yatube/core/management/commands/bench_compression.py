@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from core.compression import available_encoders
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает кодировки и уровни сжатия на настоящих страницах '
+        'лент: время процессора на страницу против сэкономленных байт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=50)
+
+    def pages(self):
+        urls = [reverse('posts:index')]
+        group = Group.objects.first()
+        if group:
+            urls.append(reverse('posts:group_list', args=(group.slug,)))
+        author = User.objects.filter(posts__isnull=False).first()
+        if author:
+            urls.append(reverse('posts:profile', args=(author.username,)))
+        client = Client()
+        for url in urls:
+            response = client.get(url)
+            if response.status_code == 200:
+                yield url, response.content
+
+    def handle(self, *args, **options):
+        number = options['number']
+        levels = {
+            'gzip': (1, 6, 9), 'br': (1, 4, 6, 11), 'zstd': (1, 3, 10, 19)
+        }
+        for url, content in self.pages():
+            self.stdout.write(f'{url}: {len(content)} байт')
+            for name, encoder in available_encoders().items():
+                for level in levels[name]:
+                    start = time.perf_counter()
+                    for _ in range(number):
+                        size = len(encoder(level).compress(content))
+                    elapsed = (time.perf_counter() - start) / number
+                    self.stdout.write(
+                        f'  {name:>4} {level:>2}: {size:>7} байт '
+                        f'({100 * size / len(content):5.1f}%), '
+                        f'{elapsed * 1e3:6.2f} мс'
+                    )
@@ -0,0 +1,37 @@
+import timeit
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.ratelimit import TokenBucket, check
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы ограничителя частоты запросов '
+        'на настроенном кэше: одна корзина и полная проверка адреса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        bucket = TokenBucket('bench', f'{number * 10}/m')
+        elapsed = timeit.timeit(bucket.consume, number=number)
+        self.stdout.write(
+            f'Одна корзина: {elapsed / number * 1e6:.2f} мкс на запрос'
+        )
+
+        request = RequestFactory().post('/create/')
+        request.user = type('Anonymous', (), {'is_authenticated': False})
+        elapsed = timeit.timeit(
+            lambda: check(request, 'posts:add_comment'), number=number
+        )
+        self.stdout.write(
+            f'Проверка адреса: {elapsed / number * 1e6:.2f} мкс на запрос'
+        )
+        cache.delete_many([
+            bucket.key, 'ratelimit:posts:add_comment:ip:127.0.0.1'
+        ])
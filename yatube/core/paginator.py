@@ -0,0 +1,73 @@
+"""Пагинатор для больших таблиц.
+
+COUNT(*) по таблице в десятки миллионов строк идёт секунды, а админке
+для списка страниц хватает приблизительного числа. Для выборки без
+фильтров (кроме фильтров менеджера по умолчанию) число строк берётся из
+статистики базы: pg_class.reltuples в PostgreSQL, sqlite_stat1 в SQLite
+(заполняется командой ANALYZE), information_schema в MySQL. Если
+статистики нет или таблица меньше ADMIN_EXACT_COUNT_LIMIT, считается
+точно.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+ESTIMATES = {
+    'postgresql': 'SELECT reltuples FROM pg_class WHERE relname = %s',
+    'sqlite': (
+        'SELECT stat FROM sqlite_stat1 WHERE tbl = %s '
+        'ORDER BY idx IS NULL DESC LIMIT 1'
+    ),
+    'mysql': (
+        'SELECT table_rows FROM information_schema.tables '
+        'WHERE table_schema = DATABASE() AND table_name = %s'
+    ),
+}
+
+
+def estimate_count(model, using='default'):
+    """Примерное число строк таблицы модели или None."""
+    connection = connections[using]
+    sql = ESTIMATES.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, (model._meta.db_table,))
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    # в sqlite_stat1 первое число строки stat — число строк
+    return int(str(row[0]).split()[0])
+
+
+def _where(queryset):
+    query = queryset.query
+    try:
+        return query.get_compiler(queryset.db).compile(query.where)
+    except EmptyResultSet:
+        return None
+
+
+def is_unfiltered(queryset):
+    """Выборка без условий, кроме условий менеджера по умолчанию."""
+    base = queryset.model._default_manager.using(queryset.db).all()
+    return _where(queryset) == _where(base)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and is_unfiltered(queryset):
+            estimate = estimate_count(queryset.model, queryset.db)
+            if (
+                estimate is not None
+                and estimate > settings.ADMIN_EXACT_COUNT_LIMIT
+            ):
+                return estimate
+        return super().count
@@ -0,0 +1,146 @@
+"""Ограничение частоты запросов к пишущим адресам.
+
+Корзина токенов реализована как GCRA: в кэше хранится одно целое число —
+теоретическое время прихода следующего запроса (TAT) в микросекундах.
+Допуск запроса — атомарный cache.incr на интервал одного токена, отказ
+откатывается cache.decr, поэтому счётчик корректен при параллельных
+запросах в любом кэше с атомарным incr (locmem, memcached, redis).
+
+Лимиты задаются в settings.RATELIMITS по имени адреса:
+
+    RATELIMITS = {
+        'posts:post_create': {
+            'user': '10/m', 'ip': '30/m', 'methods': ('POST',)
+        },
+    }
+
+У каждого адреса две корзины — для пользователя и для IP-адреса.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+DEFAULT_METHODS = ('POST',)
+
+US = 1000000
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60); '5/10s' -> (5, 10)."""
+    count, period = rate.split('/')
+    multiplier = period.rstrip('smhd') or '1'
+    return int(count), int(multiplier) * PERIODS[period[-1]]
+
+
+class TokenBucket:
+    def __init__(self, key, rate):
+        self.key = f'ratelimit:{key}'
+        count, period = parse_rate(rate)
+        self.interval = period * US // count
+        self.burst = count * self.interval
+        self.timeout = period + 1
+
+    def consume(self, now=None):
+        """Взять токен. Возвращает 0 или число секунд до следующего."""
+        now = int((now or time.time()) * US)
+        if cache.add(self.key, now + self.interval, self.timeout):
+            return 0
+        try:
+            tat = cache.incr(self.key, self.interval)
+        except ValueError:
+            # ключ вытеснен между add и incr
+            cache.set(self.key, now + self.interval, self.timeout)
+            return 0
+        if tat - self.interval < now:
+            # корзина простаивала и полна: отсчёт идёт от текущего времени
+            cache.set(self.key, now + self.interval, self.timeout)
+            return 0
+        if tat - now <= self.burst:
+            cache.touch(self.key, self.timeout)
+            return 0
+        cache.decr(self.key, self.interval)
+        return math.ceil((tat - self.burst - now) / US)
+
+
+def client_ip(request):
+    if settings.RATELIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, name):
+    """Пройти корзины адреса name. Возвращает 0 или Retry-After."""
+    limits = settings.RATELIMITS.get(name)
+    if not limits or not settings.RATELIMIT_ENABLED:
+        return 0
+    if request.method not in limits.get('methods', DEFAULT_METHODS):
+        return 0
+    buckets = []
+    user = getattr(request, 'user', None)
+    if 'user' in limits and user is not None and user.is_authenticated:
+        buckets.append(TokenBucket(f'{name}:u:{user.pk}', limits['user']))
+    if 'ip' in limits:
+        buckets.append(
+            TokenBucket(f'{name}:ip:{client_ip(request)}', limits['ip'])
+        )
+    for bucket in buckets:
+        retry_after = bucket.consume()
+        if retry_after:
+            return retry_after
+    return 0
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request,
+        'core/429.html',
+        {'retry_after': retry_after},
+        status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(name):
+    """Декоратор view: лимиты берутся из settings.RATELIMITS[name]."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            retry_after = check(request, name)
+            if retry_after:
+                return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        wrapped.ratelimited = True
+        return wrapped
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Применяет RATELIMITS к адресам, view которых не обёрнуты ratelimit.
+
+    Нужен для чужих view, например users.views.SignUp.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'ratelimited', False):
+            return None
+        match = request.resolver_match
+        if match is None:
+            return None
+        retry_after = check(request, match.view_name)
+        if retry_after:
+            return too_many_requests(request, retry_after)
+        return None
@@ -0,0 +1,159 @@
+"""Статика с хэшами в именах и заранее сжатыми копиями.
+
+collectstatic с CompressedManifestStaticFilesStorage кладёт в STATIC_ROOT
+файлы с хэшем содержимого в имени (css/bootstrap.min.3f2a….css) и рядом
+их сжатые копии .gz и, если установлен пакет brotli, .br.
+
+PrecompressedStaticMiddleware отдаёт STATIC_URL из STATIC_ROOT сам,
+без отдельного веб-сервера: выбирает лучшую копию по Accept-Encoding,
+а файлам с хэшем в имени ставит Cache-Control: immutable — их
+содержимое по этому адресу никогда не меняется.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, тогда только gzip
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.json', '.xml', '.txt', '.html',
+    '.ico', '.ttf', '.otf', '.eot',
+)
+
+# в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+def compress_file(path):
+    """Записать сжатые копии файла, если они заметно меньше."""
+    if not path.endswith(COMPRESSIBLE):
+        return []
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+        return []
+    written = []
+    for suffix, compress in _compressors():
+        compressed = compress(data)
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            written.append(path + suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # без манифеста или записи в нём — имя без хэша, а не ошибка 500
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # файла нет: collectstatic ещё не запускали
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if self.exists(name):
+                compress_file(self.path(name))
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.partition(';')
+        quality = params.strip().partition('q=')[2]
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve_static(request, name):
+    """Ответ с файлом name из STATIC_ROOT или None, если файла нет."""
+    name = posixpath.normpath(name).lstrip('/')
+    if name.startswith('..') or '\\' in name:
+        return None
+    path = os.path.join(settings.STATIC_ROOT, *name.split('/'))
+    if not os.path.isfile(path):
+        return None
+    served, encoding, has_variants = path, None, False
+    accepted = accepted_encodings(request)
+    for coding, suffix in ENCODINGS:
+        if os.path.isfile(path + suffix):
+            has_variants = True
+            if encoding is None and coding in accepted:
+                served, encoding = path + suffix, coding
+    stat = os.stat(served)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        content_type = mimetypes.guess_type(path)[0]
+        response = FileResponse(
+            open(served, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    if HASHED_NAME.search(name):
+        response['Cache-Control'] = IMMUTABLE
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+    if has_variants:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+class PrecompressedStaticMiddleware:
+    """Отдаёт собранную статику до остальных middleware и view."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        prefix = settings.STATIC_URL
+        if (
+            settings.STATIC_ROOT
+            and request.method in ('GET', 'HEAD')
+            and request.path.startswith(prefix)
+        ):
+            response = serve_static(request, request.path[len(prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
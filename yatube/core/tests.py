@@ -1,4 +1,23 @@
-from django.test import TestCase
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import compression, staticfiles
+from core.ratelimit import TokenBucket, parse_rate
+from posts.models import Post
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -8,3 +27,254 @@ class ViewTestClass(TestCase):
         self.assertEqual(response.status_code, 404)
         # Проверьте, что используется шаблон core/404.html
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/10s'), (5, 10))
+
+    def test_burst_then_refill(self):
+        """Корзина пропускает запас запросов и пополняется со временем"""
+        bucket = TokenBucket('test', '3/m')
+        now = 1000.0
+        for _ in range(3):
+            self.assertEqual(bucket.consume(now), 0)
+        retry_after = bucket.consume(now)
+        self.assertEqual(retry_after, 20)
+        # отказ не расходует токен
+        self.assertEqual(bucket.consume(now + 20), 0)
+        self.assertGreater(bucket.consume(now + 20), 0)
+        # после простоя корзина снова полна
+        for _ in range(3):
+            self.assertEqual(bucket.consume(now + 200), 0)
+
+
+@override_settings(RATELIMITS={
+    'posts:add_comment': {'user': '2/m', 'ip': '100/m'},
+    'users:signup': {'ip': '1/h'},
+})
+class RateLimitViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_decorated_view_returns_429(self):
+        """Пишущий адрес отвечает 429 с Retry-After сверх лимита"""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for _ in range(2):
+            response = self.client.post(url, {'text': 'Комментарий'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_limits_are_per_user(self):
+        """Лимит пользователя не мешает другому пользователю"""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for _ in range(3):
+            self.client.post(url, {'text': 'Комментарий'})
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        response = other.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_middleware_limits_signup_by_ip(self):
+        """Middleware ограничивает регистрацию по IP, GET не ограничен"""
+        client = Client()
+        url = reverse('users:signup')
+        client.post(url, {})
+        self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(client.post(url, {}).status_code, 429)
+
+
+class StaticPipelineTests(TestCase):
+    CSS = 'body { color: #333; margin: 0; padding: 0; }\n' * 40
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.mkdtemp()
+        source = os.path.join(cls.tmp, 'src')
+        os.makedirs(os.path.join(source, 'css'))
+        with open(os.path.join(source, 'css', 'app.css'), 'w') as css:
+            css.write(cls.CSS)
+        with open(os.path.join(source, 'robots.txt'), 'w') as robots:
+            robots.write('User-agent: *\n')
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=os.path.join(cls.tmp, 'root'),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('css/app.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name, **headers):
+        return self.client.get(f'/static/{name}', **headers)
+
+    def test_collectstatic_writes_hashed_and_compressed(self):
+        """collectstatic пишет имена с хэшем и сжатые копии"""
+        self.assertRegex(self.hashed, r'^css/app\.[0-9a-f]{12}\.css$')
+        path = staticfiles_storage.path(self.hashed)
+        self.assertTrue(os.path.exists(path + '.gz'))
+        self.assertEqual(
+            os.path.exists(path + '.br'), staticfiles.brotli is not None
+        )
+        # маленькие файлы не сжимаются
+        robots = staticfiles_storage.path('robots.txt')
+        self.assertFalse(os.path.exists(robots + '.gz'))
+
+    def test_serves_best_variant_immutable(self):
+        """Отдаётся сжатая копия с immutable для имени с хэшем"""
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body.decode(), self.CSS)
+
+    def test_identity_and_unhashed(self):
+        """Без Accept-Encoding — исходный файл, без хэша — короткий кэш"""
+        response = self.get(self.hashed)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(), self.CSS
+        )
+        response = self.get('css/app.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_conditional_request(self):
+        """Повторный запрос с ETag получает 304"""
+        etag = self.get(self.hashed)['ETag']
+        response = self.get(self.hashed, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_traversal(self):
+        """Чужие пути и отсутствующие файлы не отдаются"""
+        self.assertEqual(self.get('nope.css').status_code, 404)
+        self.assertEqual(self.get('../src/css/app.css').status_code, 404)
+
+    def test_template_uses_hashed_name(self):
+        """Тег static подставляет имя с хэшем, неизвестный файл — как есть"""
+        self.assertEqual(
+            staticfiles_storage.url('css/app.css'), f'/static/{self.hashed}'
+        )
+        self.assertEqual(
+            staticfiles_storage.url('css/unknown.css'),
+            '/static/css/unknown.css'
+        )
+
+
+class CompressionTests(TestCase):
+    HTML = '<p>Пост о том, как хорошо сжимается повторяющийся текст</p>' * 50
+
+    def run_middleware(self, response, accept='gzip'):
+        middleware = compression.CompressionMiddleware(lambda r: response)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return middleware(request)
+
+    def test_negotiate(self):
+        """Кодировка выбирается по q клиента и порядку предпочтения"""
+        encoders = {'gzip': None, 'br': None}
+        self.assertEqual(compression.negotiate('gzip, br', encoders), 'br')
+        self.assertEqual(
+            compression.negotiate('gzip, br;q=0.5', encoders), 'gzip'
+        )
+        self.assertEqual(compression.negotiate('br', {'gzip': None}), None)
+        self.assertEqual(compression.negotiate('gzip;q=0', encoders), None)
+        self.assertEqual(compression.negotiate('*', encoders), 'br')
+        self.assertEqual(compression.negotiate('', encoders), None)
+
+    def test_gzip_response(self):
+        """HTML сжимается, ETag ослабляется, Vary выставляется"""
+        response = HttpResponse(self.HTML)
+        response['ETag'] = '"abc"'
+        response = self.run_middleware(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+        self.assertEqual(
+            zlib.decompress(response.content, 31).decode(), self.HTML
+        )
+
+    def test_streaming_is_compressed_chunk_by_chunk(self):
+        """Каждая часть потока распаковывается сразу после получения"""
+        parts = [self.HTML, 'середина', self.HTML]
+        response = self.run_middleware(StreamingHttpResponse(parts))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        decompressor = zlib.decompressobj(31)
+        received = ''
+        for part, chunk in zip(parts, response.streaming_content):
+            received += decompressor.decompress(chunk).decode()
+            self.assertTrue(received.endswith(part))
+        self.assertEqual(received, ''.join(parts))
+
+    def test_skipped_responses(self):
+        """Маленькие, бинарные и уже сжатые ответы не трогаются"""
+        small = HttpResponse('<p>мало</p>')
+        image = HttpResponse(b'x' * 4096, content_type='image/png')
+        encoded = HttpResponse(self.HTML)
+        encoded['Content-Encoding'] = 'br'
+        no_transform = HttpResponse(self.HTML)
+        no_transform['Cache-Control'] = 'no-transform'
+        for response in (small, image, no_transform):
+            with self.subTest(response=response):
+                result = self.run_middleware(response)
+                self.assertFalse(result.has_header('Content-Encoding'))
+        self.assertEqual(
+            self.run_middleware(encoded)['Content-Encoding'], 'br'
+        )
+
+    def test_identity_when_not_accepted(self):
+        """Без Accept-Encoding ответ не сжимается"""
+        response = self.run_middleware(HttpResponse(self.HTML), accept='')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    @unittest.skipIf(compression.brotli is None, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        response = self.run_middleware(
+            HttpResponse(self.HTML), accept='gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(response.content).decode(),
+            self.HTML
+        )
+
+    @override_settings(COMPRESSION_LEVELS={'gzip': 1, 'br': 1, 'zstd': 1})
+    def test_feed_page(self):
+        """Страница ленты уходит сжатой"""
+        user = User.objects.create_user(username='auth')
+        for number in range(10):
+            Post.objects.create(author=user, text=f'Пост {number} ' * 30)
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(
+            'Пост 9', zlib.decompress(response.content, 31).decode()
+        )
@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from . import mailer
+from .models import Message
+
+
+class MessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'subject', 'recipients', 'status', 'attempts', 'send_at',
+        'sent'
+    )
+    list_filter = ('status',)
+    search_fields = ('recipients', 'subject')
+    readonly_fields = ('data', 'last_error')
+    actions = ('retry',)
+    empty_value_display = '-пусто-'
+
+    def retry(self, request, queryset):
+        count = mailer.retry(queryset)
+        self.message_user(request, f'Возвращено в очередь: {count}')
+    retry.short_description = 'Повторить отправку недоставленных'
+
+
+admin.site.register(Message, MessageAdmin)
@@ -0,0 +1,16 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import mailer
+
+
+class OutboxBackend(BaseEmailBackend):
+    """EMAIL_BACKEND, который не отправляет письма, а кладёт их в outbox.
+
+    ATOMIC_REQUESTS не включён, поэтому вне transaction.atomic() письмо
+    фиксируется сразу. Внутри atomic() оно пишется в ту же транзакцию и
+    при её откате пропадает. Отправляет письма команда send_outbox.
+    """
+    def send_messages(self, email_messages):
+        return sum(
+            mailer.store(message) is not None for message in email_messages
+        )
@@ -0,0 +1,197 @@
+"""Очередь исходящих писем.
+
+Письмо сохраняется в таблицу outbox внутри запроса (OutboxBackend),
+исполнитель send_outbox забирает пачку одним UPDATE и отправляет её
+через одно соединение OUTBOX_EMAIL_BACKEND. Неудачная отправка
+повторяется с экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS
+письмо помечается недоставленным и остаётся в таблице для разбора.
+"""
+import base64
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+
+def serialize(message):
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError('В outbox поддерживаются только вложения-кортежи')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            [filename, base64.b64encode(content).decode(), mimetype]
+        )
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'content_subtype': message.content_subtype,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    })
+
+
+def deserialize(data):
+    data = json.loads(data)
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(item) for item in data['alternatives']],
+    )
+    message.content_subtype = data['content_subtype']
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def store(message):
+    """Сохранить EmailMessage в outbox."""
+    if not message.recipients():
+        return None
+    return Message.objects.create(
+        subject=message.subject[:255],
+        recipients=', '.join(message.recipients()),
+        data=serialize(message)
+    )
+
+
+def requeue_stale():
+    """Вернуть в очередь письма упавших исполнителей.
+
+    Упавший исполнитель тратит попытку: письмо, которое каждый раз
+    роняет процесс, после OUTBOX_MAX_ATTEMPTS считается недоставленным.
+    Возвращает число писем, вернувшихся в очередь.
+    """
+    stale = Message.objects.filter(
+        status=Message.SENDING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.OUTBOX_LOCK_TIMEOUT
+        )
+    )
+    released = {
+        'attempts': F('attempts') + 1, 'locked_by': '', 'locked_at': None
+    }
+    with transaction.atomic():
+        dead = stale.filter(
+            attempts__gte=settings.OUTBOX_MAX_ATTEMPTS - 1
+        ).update(
+            status=Message.DEAD,
+            last_error='Исполнитель завершился, не отправив письмо',
+            **released
+        )
+        requeued = stale.update(status=Message.QUEUED, **released)
+    if dead:
+        logger.error('Писем не доставлено из-за упавших исполнителей: %s',
+                     dead)
+    return requeued
+
+
+def claim(batch):
+    """Забрать до batch писем, готовых к отправке."""
+    now = timezone.now()
+    ids = list(
+        Message.objects.filter(status=Message.QUEUED, send_at__lte=now)
+        .order_by('send_at').values_list('pk', flat=True)[:batch]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    Message.objects.filter(pk__in=ids, status=Message.QUEUED).update(
+        status=Message.SENDING, locked_by=token, locked_at=now
+    )
+    return list(Message.objects.filter(
+        locked_by=token, status=Message.SENDING
+    ).order_by('send_at'))
+
+
+def backoff(attempts):
+    return timedelta(
+        seconds=settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1)
+    )
+
+
+def _failed(message, error):
+    message.attempts += 1
+    message.last_error = error
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = Message.DEAD
+        logger.error('Письмо %s не доставлено: %s', message.pk, error)
+    else:
+        message.status = Message.QUEUED
+        message.send_at = timezone.now() + backoff(message.attempts)
+
+
+def send_batch(messages):
+    """Отправить захваченные письма через одно соединение.
+
+    Письма отправляются по одному, чтобы ошибка одного адреса
+    не откладывала всю пачку. Возвращает число отправленных.
+    """
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        for message in messages:
+            _failed(message, repr(error))
+    else:
+        try:
+            for message in messages:
+                try:
+                    email = deserialize(message.data)
+                    email.connection = connection
+                    email.send()
+                except Exception as error:
+                    _failed(message, repr(error))
+                else:
+                    message.attempts += 1
+                    message.status = Message.SENT
+                    message.sent = timezone.now()
+                    message.last_error = ''
+        finally:
+            connection.close()
+    for message in messages:
+        message.locked_by = ''
+        message.locked_at = None
+    Message.objects.bulk_update(messages, (
+        'status', 'attempts', 'send_at', 'sent', 'last_error',
+        'locked_by', 'locked_at'
+    ))
+    return sum(message.status == Message.SENT for message in messages)
+
+
+def retry(queryset):
+    """Вернуть недоставленные письма в очередь (действие админки)."""
+    return queryset.filter(status=Message.DEAD).update(
+        status=Message.QUEUED, attempts=0, send_at=timezone.now()
+    )
+
+
+def purge(older_than):
+    """Удалить отправленные письма старше older_than (timedelta)."""
+    return Message.objects.filter(
+        status=Message.SENT, sent__lt=timezone.now() - older_than
+    ).delete()[0]
@@ -0,0 +1,56 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox import mailer
+
+
+class Command(BaseCommand):
+    help = (
+        'Исполнитель outbox: отправляет накопленные письма пачками через '
+        'одно соединение OUTBOX_EMAIL_BACKEND. SIGTERM и Ctrl+C завершают '
+        'работу после текущей пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int,
+            help='Писем за один захват (по умолчанию OUTBOX_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить готовые письма и выйти'
+        )
+        parser.add_argument(
+            '--purge-days', type=int,
+            help='Удалить отправленные письма старше N дней и выйти'
+        )
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            deleted = mailer.purge(timedelta(days=options['purge_days']))
+            self.stdout.write(f'Удалено писем: {deleted}')
+            return
+        batch = options['batch'] or settings.OUTBOX_BATCH_SIZE
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        sent = 0
+        try:
+            while self.running:
+                mailer.requeue_stale()
+                messages = mailer.claim(batch)
+                if messages:
+                    sent += mailer.send_batch(messages)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(settings.OUTBOX_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Отправлено писем: {sent}')
+
+    def stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Message(models.Model):
+    """Письмо, ожидающее отправки исполнителем send_outbox."""
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (DEAD, 'Не доставлено'),
+    )
+    subject = models.CharField('Тема', max_length=255)
+    recipients = models.TextField('Получатели')
+    data = models.TextField('Письмо (JSON)')
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    send_at = models.DateTimeField('Отправить после', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    locked_by = models.CharField('Захвачено', max_length=64, blank=True)
+    locked_at = models.DateTimeField('Захвачено в', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['send_at']
+        indexes = (
+            models.Index(
+                fields=['status', 'send_at'], name='outbox_dequeue_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
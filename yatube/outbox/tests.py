@@ -0,0 +1,152 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from outbox import mailer
+from outbox.models import Message
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='outbox.backends.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_MAX_ATTEMPTS=2
+)
+class OutboxTests(TestCase):
+    def test_send_mail_is_stored_not_sent(self):
+        """send_mail только сохраняет письмо в outbox"""
+        self.assertEqual(
+            send_mail('Тема', 'Текст', 'from@yatube.ru', ['to@mail.ru']), 1
+        )
+        self.assertEqual(mail.outbox, [])
+        message = Message.objects.get()
+        self.assertEqual(message.status, Message.QUEUED)
+        self.assertEqual(message.recipients, 'to@mail.ru')
+
+    def test_rolled_back_transaction_drops_message(self):
+        """Письмо из откатившейся транзакции не уходит"""
+        try:
+            with transaction.atomic():
+                send_mail('Тема', 'Текст', None, ['to@mail.ru'])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(Message.objects.exists())
+
+    def test_worker_sends_batch_over_one_connection(self):
+        """Исполнитель отправляет пачку через одно соединение"""
+        email = EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@yatube.ru', ['a@mail.ru'],
+            cc=['b@mail.ru'], headers={'X-Yatube': '1'}
+        )
+        email.attach_alternative('<p>Текст</p>', 'text/html')
+        email.attach('note.txt', 'вложение', 'text/plain')
+        email.send()
+        send_mail('Вторая', 'Текст', None, ['c@mail.ru'])
+        with mock.patch(
+            'outbox.mailer.get_connection', wraps=mailer.get_connection
+        ) as get_connection:
+            call_command(
+                'send_outbox', once=True, stdout=open(os.devnull, 'w')
+            )
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        sent = mail.outbox[0]
+        self.assertEqual(sent.cc, ['b@mail.ru'])
+        self.assertEqual(sent.extra_headers, {'X-Yatube': '1'})
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
+        self.assertEqual(sent.attachments[0][1], 'вложение')
+        self.assertFalse(
+            Message.objects.exclude(status=Message.SENT).exists()
+        )
+
+    def test_retry_then_dead_letter(self):
+        """Ошибка отправки откладывает повтор, затем письмо — в отказы"""
+        send_mail('Тема', 'Текст', None, ['to@mail.ru'])
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError('smtp down')
+        ):
+            mailer.send_batch(mailer.claim(10))
+            message = Message.objects.get()
+            self.assertEqual(message.status, Message.QUEUED)
+            self.assertIn('smtp down', message.last_error)
+            self.assertGreater(message.send_at, timezone.now())
+            self.assertEqual(mailer.claim(10), [])
+            Message.objects.update(send_at=timezone.now())
+            mailer.send_batch(mailer.claim(10))
+        message.refresh_from_db()
+        self.assertEqual(message.status, Message.DEAD)
+        self.assertEqual(mailer.retry(Message.objects.all()), 1)
+        mailer.send_batch(mailer.claim(10))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_one_bad_message_does_not_block_batch(self):
+        """Ошибка одного письма не мешает остальным"""
+        send_mail('Первое', 'Текст', None, ['a@mail.ru'])
+        send_mail('Второе', 'Текст', None, ['b@mail.ru'])
+        Message.objects.filter(subject='Первое').update(data='{}')
+        self.assertEqual(mailer.send_batch(mailer.claim(10)), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Второе')
+
+    def test_password_reset_and_signup_use_outbox(self):
+        """Сброс пароля и регистрация не отправляют почту в запросе"""
+        User.objects.create_user(
+            username='auth', email='auth@mail.ru', password='Pass-w0rd'
+        )
+        client = Client()
+        client.post(
+            reverse('users:password_reset_form'), {'email': 'auth@mail.ru'}
+        )
+        client.post(reverse('users:signup'), {
+            'username': 'newbie',
+            'email': 'newbie@mail.ru',
+            'password1': 'Sup3r-secret-pass',
+            'password2': 'Sup3r-secret-pass',
+        })
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            sorted(Message.objects.values_list('recipients', flat=True)),
+            ['auth@mail.ru', 'newbie@mail.ru']
+        )
+
+    def test_signup_and_welcome_mail_are_atomic(self):
+        """Если письмо не записалось, пользователь тоже не создаётся"""
+        with mock.patch(
+            'outbox.mailer.store', side_effect=RuntimeError('outbox')
+        ), self.assertRaises(RuntimeError):
+            Client().post(reverse('users:signup'), {
+                'username': 'newbie',
+                'email': 'newbie@mail.ru',
+                'password1': 'Sup3r-secret-pass',
+                'password2': 'Sup3r-secret-pass',
+            })
+        self.assertFalse(User.objects.filter(username='newbie').exists())
+
+    def crash_worker(self):
+        mailer.claim(1)
+        Message.objects.filter(status=Message.SENDING).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+
+    def test_stale_message_uses_attempts(self):
+        """Письмо, роняющее исполнителя, после лимита недоставлено"""
+        send_mail('Тема', 'Текст', None, ['to@mail.ru'])
+        self.crash_worker()
+        self.assertEqual(mailer.requeue_stale(), 1)
+        self.crash_worker()
+        with self.assertLogs('outbox.mailer', 'ERROR'):
+            self.assertEqual(mailer.requeue_stale(), 0)
+        message = Message.objects.get()
+        self.assertEqual(message.status, Message.DEAD)
+        self.assertEqual(message.attempts, 2)
@@ -1,23 +1,222 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.views.main import ChangeList
+from django.db.models.functions import Substr
+from django.shortcuts import render
 
-from .models import Group, Post, Comment
+from core.paginator import EstimatedCountPaginator
 
+from . import images, moderation, search
+from .models import (
+    ArchivedPost, BannedImage, BannedPhrase, Comment, DigestSubscription,
+    Group, Post, PostRevision, User
+)
 
-class PostAdmin(admin.ModelAdmin):
+
+class LeanChangeList(ChangeList):
+    """Список без тяжёлых колонок list_defer модели."""
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            *self.model_admin.list_defer
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список для больших таблиц: примерное число строк вместо COUNT(*).
+
+    list_defer — колонки, которые список не загружает; страница
+    редактирования читает строку целиком.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+
+
+class MovePostsForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='Без группы'
+    )
+
+
+def _authors(queryset):
+    return User.objects.filter(
+        pk__in=queryset.values('author_id'), is_staff=False
+    )
+
+
+class PostAdmin(LargeTableAdmin):
+    actions = (
+        'move_to_group', 'delete_authors_content', 'remove_follows',
+        'ban_images'
+    )
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_defer = ('text_html', 'excerpt_html')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.full_text(queryset, search_term), False
+
+    def move_to_group(self, request, queryset):
+        form = MovePostsForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            moved = moderation.move_posts(
+                queryset, form.cleaned_data['group']
+            )
+            self.message_user(request, f'Перенесено постов: {moved}')
+            return None
+        return render(request, 'admin/posts/move_posts.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Перенос постов в группу',
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        })
+    move_to_group.short_description = 'Перенести в группу'
+
+    def delete_authors_content(self, request, queryset):
+        done = moderation.delete_content(_authors(queryset))
+        self.message_user(request, f'Контент удаляется у авторов: {done}')
+    delete_authors_content.short_description = (
+        'Удалить все посты и комментарии авторов'
+    )
+
+    def remove_follows(self, request, queryset):
+        done = moderation.remove_follows(_authors(queryset))
+        self.message_user(request, f'Удалено подписок: {done}')
+    remove_follows.short_description = 'Удалить подписки авторов'
+
+    def ban_images(self, request, queryset):
+        done = 0
+        for pk in queryset.exclude(image='').values_list('pk', flat=True):
+            value = images.hash_post(pk)
+            if value is not None and not images.banned(value):
+                images.assign(
+                    BannedImage(note=f'Из поста {pk}'), value
+                ).save()
+                done += 1
+        self.message_user(request, f'Запрещено картинок: {done}')
+    ban_images.short_description = 'Запретить загрузку таких картинок'
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'text', 'author', 'created')
+
+class CommentAdmin(LargeTableAdmin):
+    actions = ('purge_same_text',)
+    list_display = ('post_preview', 'text', 'author', 'created')
+    list_select_related = ('author',)
     search_fields = ('text',)
     list_filter = ('created',)
+    date_hierarchy = 'created'
+    raw_id_fields = ('post', 'author')
+    empty_value_display = '-пусто-'
+
+    def get_queryset(self, request):
+        # начало текста поста тем же запросом вместо запроса на строку
+        return super().get_queryset(request).annotate(
+            post_preview=Substr('post__text', 1, 15)
+        )
+
+    def post_preview(self, comment):
+        return comment.post_preview
+    post_preview.short_description = 'Пост'
+    post_preview.admin_order_field = 'post'
+
+    def purge_same_text(self, request, queryset):
+        texts = set(queryset.values_list('text', flat=True))
+        done = moderation.purge_comments(
+            Comment.all_objects.filter(text__in=texts)
+        )
+        self.message_user(request, f'Удалено комментариев: {done}')
+    purge_same_text.short_description = (
+        'Удалить все комментарии с таким же текстом'
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.full_text(queryset, search_term), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class DigestSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'frequency', 'last_sent')
+    list_filter = ('frequency',)
+    raw_id_fields = ('user',)
+
+
+class PostRevisionAdmin(LargeTableAdmin):
+    list_display = ('post', 'number', 'is_snapshot', 'editor', 'created')
+    list_select_related = ('post', 'editor')
+    raw_id_fields = ('post', 'editor')
+    readonly_fields = ('data',)
+
+
+class ArchivedPostAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'archived')
+    list_defer = ('text_html', 'excerpt_html')
+    list_select_related = ('author', 'group')
+    search_fields = ('text',)
+    raw_id_fields = ('author', 'group')
+    list_filter = ('archived',)
     empty_value_display = '-пусто-'
 
 
+class BannedImageForm(forms.ModelForm):
+    image = forms.ImageField(label='Картинка', required=False)
+
+    class Meta:
+        model = BannedImage
+        fields = ('image', 'note')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        image = cleaned_data.get('image')
+        if image:
+            images.assign(self.instance, images.dhash(image))
+        elif self.instance.pk is None:
+            self.add_error('image', 'Загрузите запрещённую картинку')
+        return cleaned_data
+
+
+class BannedImageAdmin(admin.ModelAdmin):
+    form = BannedImageForm
+    list_display = ('__str__', 'note', 'created')
+    search_fields = ('note',)
+
+
+class BannedPhraseAdmin(admin.ModelAdmin):
+    list_display = ('phrase', 'kind', 'is_active', 'created')
+    list_editable = ('is_active',)
+    list_filter = ('kind', 'is_active')
+    search_fields = ('phrase',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(DigestSubscription, DigestSubscriptionAdmin)
+admin.site.register(PostRevision, PostRevisionAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(BannedPhrase, BannedPhraseAdmin)
+admin.site.register(BannedImage, BannedImageAdmin)
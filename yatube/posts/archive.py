@@ -0,0 +1,108 @@
+"""Перенос старых постов в архив.
+
+Ленты читают почти только свежие посты, поэтому посты старше
+POST_ARCHIVE_AFTER_DAYS вместе с комментариями переезжают в таблицы
+ArchivedPost и ArchivedComment, а горячая таблица и её индексы остаются
+маленькими. Перенос идёт порциями, каждая — в своей транзакции: пост
+либо целиком в горячей таблице, либо целиком в архиве.
+
+id сохраняются, так что post_detail и профиль находят архивный пост по
+тому же адресу. Архив только читается: реакции замораживаются суммами,
+история правок и рейтинг популярности удаляются вместе с постом.
+
+Теги, упоминания и хэши для поиска копий (PostTag, Mention,
+PostFingerprint, PostImageHash) в архив не переносятся: архивные посты
+намеренно пропадают из лент тегов и со страницы упоминаний, а новые
+посты не сверяются с ними на дубликаты и похожие картинки.
+"""
+import json
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from . import hashtags
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Mention, Post, PostFingerprint,
+    PostImageHash, PostTag, ReactionCounter
+)
+
+
+def _frozen_reactions(field, ids):
+    totals = defaultdict(dict)
+    for row in ReactionCounter.objects.filter(
+        **{f'{field}_id__in': ids}
+    ).values(f'{field}_id', 'kind').annotate(total=Sum('count')):
+        if row['total']:
+            totals[row[f'{field}_id']][row['kind']] = row['total']
+    return {pk: json.dumps(kinds) for pk, kinds in totals.items()}
+
+
+def archive_batch(ids):
+    """Перенести посты ids в архив. Возвращает число перенесённых."""
+    with transaction.atomic():
+        posts = list(Post.objects.select_for_update().filter(pk__in=ids))
+        ids = [post.pk for post in posts]
+        comments = list(Comment.objects.filter(post_id__in=ids))
+        post_reactions = _frozen_reactions('post', ids)
+        comment_reactions = _frozen_reactions(
+            'comment', [comment.pk for comment in comments]
+        )
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                id=post.pk,
+                text=post.text,
+                text_html=post.text_html,
+                render_version=post.render_version,
+                excerpt_html=post.excerpt_html,
+                excerpt_truncated=post.excerpt_truncated,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name,
+                views=post.views,
+                updated=post.updated,
+                reactions=post_reactions.get(post.pk, '{}')
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                id=comment.pk,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                created=comment.created,
+                reactions=comment_reactions.get(comment.pk, '{}')
+            )
+            for comment in comments
+        )
+        notified = hashtags.notified(ids)
+        for model in (PostTag, Mention, PostFingerprint, PostImageHash):
+            model.objects.filter(post_id__in=ids).delete()
+        Post.objects.filter(pk__in=ids).delete()
+    hashtags.forget_unseen(notified)
+    return len(ids)
+
+
+def archive_before(cutoff, batch_size):
+    """Перенести в архив все посты, опубликованные раньше cutoff."""
+    total = 0
+    while True:
+        ids = list(
+            Post.objects.filter(pub_date__lt=cutoff)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += archive_batch(ids)
+
+
+def find(post_id):
+    """Пост по id: из горячей таблицы, иначе из архива, иначе None."""
+    return (
+        Post.objects.for_feed().filter(pk=post_id).first()
+        or ArchivedPost.objects.for_feed().filter(
+            pk=post_id, author__is_active=True
+        ).first()
+    )
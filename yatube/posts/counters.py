@@ -0,0 +1,123 @@
+"""Буферизованный счётчик просмотров постов.
+
+Каждый процесс копит просмотры в памяти и раз в
+VIEW_COUNTER_FLUSH_INTERVAL секунд записывает их одним запросом
+UPDATE ... SET views = views + CASE id WHEN ... END. Так читатели
+post_detail не встают в очередь за блокировкой записи SQLite на каждый
+просмотр. Незаписанные просмотры сбрасываются при штатном завершении
+процесса: yatube/wsgi.py регистрирует shutdown() в atexit.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+MOST_VIEWED_CACHE_KEY = 'views:most_viewed'
+
+# ограничение числа параметров в одном запросе SQLite
+FLUSH_CHUNK = 300
+
+
+class ViewCounter:
+    def __init__(self, interval=None):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._flushed_at = time.monotonic()
+
+    @property
+    def interval(self):
+        if self._interval is None:
+            return settings.VIEW_COUNTER_FLUSH_INTERVAL
+        return self._interval
+
+    def hit(self, post_id):
+        """Учесть просмотр; при необходимости сбросить буфер в базу."""
+        with self._lock:
+            self._pending[post_id] += 1
+            due = time.monotonic() - self._flushed_at >= self.interval
+        if due:
+            # ошибка записи не должна ронять страницу поста: просмотры
+            # остались в буфере, и следующий сброс повторит запись
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Не удалось записать просмотры')
+
+    def pending(self, post_id):
+        """Просмотры поста, ещё не записанные в базу."""
+        return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Записать накопленные просмотры. Возвращает число постов."""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        items = list(batch.items())
+        chunks = [
+            items[start:start + FLUSH_CHUNK]
+            for start in range(0, len(items), FLUSH_CHUNK)
+        ]
+        try:
+            # несколько пачек — одна транзакция: при ошибке в буфер
+            # возвращается весь batch, и ни одна пачка не должна остаться
+            # записанной
+            with transaction.atomic() if len(chunks) > 1 else nullcontext():
+                for chunk in chunks:
+                    write(chunk)
+        except DatabaseError:
+            # вернём просмотры в буфер, следующий сброс повторит запись
+            with self._lock:
+                self._pending.update(batch)
+            raise
+        return len(items)
+
+
+def write(items):
+    """Один UPDATE с CASE для пачки пар (post_id, прирост)."""
+    if not items:
+        return
+    increment = Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in items],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+    Post.objects.filter(pk__in=[pk for pk, _ in items]).update(
+        views=F('views') + increment
+    )
+
+
+def most_viewed_posts():
+    """Самые просматриваемые посты: одно обращение к кэшу или один запрос."""
+    posts = cache.get(MOST_VIEWED_CACHE_KEY)
+    if posts is None:
+        posts = list(
+            Post.objects.filter(views__gt=0)
+            .only('pk', 'text', 'views')
+            .order_by('-views')[:settings.TRENDING_SIZE]
+        )
+        cache.set(
+            MOST_VIEWED_CACHE_KEY, posts, settings.TRENDING_CACHE_TIMEOUT
+        )
+    return posts
+
+
+view_counter = ViewCounter()
+
+
+def shutdown():
+    """Сбросить буфер при остановке процесса, не роняя её при ошибке."""
+    try:
+        view_counter.flush()
+    except DatabaseError:
+        logger.exception('Не удалось записать просмотры при остановке')
@@ -0,0 +1,197 @@
+"""Удаление постов и аккаунтов.
+
+Удаление проходит в два шага. Сначала пост (или весь контент аккаунта)
+помечается удалённым одним UPDATE: менеджер objects его больше не видит,
+и он сразу пропадает из лент и страниц. Затем фоновые задачи
+posts.tasks.purge_post и purge_account удаляют строки, картинки и
+миниатюры порциями по DELETION_BATCH_SIZE — каждая порция в своей
+короткой транзакции, так что удаление плодовитого автора не блокирует
+SQLite на минуты. Шаги идемпотентны: задача, упавшая посередине,
+при повторе продолжит с того же места.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from tasks.queue import enqueue_on_commit
+
+from . import fresh, hashtags, reactions, stamps
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Post, PostRevision,
+    PostTrend, Reaction, User
+)
+
+
+def _forget(scopes, notified=()):
+    """Сбросить кэши лент, из которых пропали посты, и числа упоминаний."""
+    stamps.touch(scopes)
+    fresh.reset(scopes)
+    hashtags.forget_unseen(notified)
+
+
+def delete_post(post):
+    """Скрыть пост сразу, удалить его в фоне."""
+    now = timezone.now()
+    with transaction.atomic():
+        notified = hashtags.notified([post.pk])
+        Post.all_objects.filter(pk=post.pk).update(deleted=now)
+        PostTrend.objects.filter(post_id=post.pk).delete()
+        enqueue_on_commit(
+            'posts.tasks.purge_post',
+            args=(post.pk,),
+            key=f'purge:post:{post.pk}'
+        )
+    _forget(stamps.scopes_for(post), notified)
+
+
+def _content_scopes(users):
+    """Ленты, из которых пропадёт контент авторов, и упомянутые в нём."""
+    posts = Post.objects.filter(author_id__in=[user.pk for user in users])
+    slugs = set(
+        posts.exclude(group=None).values_list('group__slug', flat=True)
+    )
+    scopes = (
+        [stamps.INDEX]
+        + [stamps.author_scope(user.username) for user in users]
+        + [stamps.group_scope(slug) for slug in slugs]
+    )
+    return scopes, hashtags.notified(posts)
+
+
+def _hide_content(users):
+    """Скрыть посты и комментарии авторов.
+
+    Возвращает ленты для сброса и id пользователей, упомянутых в
+    скрытых постах.
+    """
+    now = timezone.now()
+    user_ids = [user.pk for user in users]
+    scopes, notified = _content_scopes(users)
+    PostTrend.objects.filter(post__author_id__in=user_ids).delete()
+    Post.objects.filter(author_id__in=user_ids).update(deleted=now)
+    Comment.objects.filter(author_id__in=user_ids).update(deleted=now)
+    return scopes, notified
+
+
+def delete_account(user):
+    """Отключить аккаунт и скрыть его контент сразу, удалить в фоне."""
+    with transaction.atomic():
+        user.is_active = False
+        user.set_unusable_password()
+        user.save(update_fields=('is_active', 'password'))
+        scopes, notified = _hide_content([user])
+        enqueue_on_commit(
+            'posts.tasks.purge_account',
+            args=(user.pk,),
+            key=f'purge:user:{user.pk}'
+        )
+    _forget(scopes, notified)
+
+
+def _hide_rows(rows, now):
+    """Пометить удалёнными строки [(модель, id), ...]."""
+    for model in (Post, Comment):
+        ids = [pk for kind, pk in rows if kind is model]
+        if ids:
+            model.objects.filter(pk__in=ids).update(deleted=now)
+
+
+def delete_content(users, batches=None, progress=None):
+    """Скрыть контент авторов сразу, удалить в фоне; аккаунты остаются.
+
+    Посты и комментарии скрываются порциями id из batches(строки)
+    (по умолчанию одной порцией), каждая — своя транзакция; кэши лент
+    сбрасываются один раз в конце. progress(сделано, всего) вызывается
+    после каждой порции.
+    """
+    users = list(users)
+    user_ids = [user.pk for user in users]
+    scopes, notified = _content_scopes(users)
+    rows = [
+        (model, pk)
+        for model in (Post, Comment)
+        for pk in model.objects.filter(
+            author_id__in=user_ids
+        ).order_by('pk').values_list('pk', flat=True)
+    ]
+    PostTrend.objects.filter(post__author_id__in=user_ids).delete()
+    now = timezone.now()
+    done = 0
+    for batch in (batches or (lambda rows: [rows]))(rows):
+        with transaction.atomic():
+            _hide_rows(batch, now)
+        done += len(batch)
+        if progress:
+            progress(done, len(rows))
+    for user in users:
+        enqueue_on_commit('posts.tasks.purge_content', args=(user.pk,))
+    _forget(scopes, notified)
+
+
+def _ids(queryset):
+    return list(
+        queryset.order_by('pk').values_list('pk', flat=True)
+        [:settings.DELETION_BATCH_SIZE]
+    )
+
+
+def delete_in_batches(queryset):
+    """Удалить строки выборки порциями, каждая — своя транзакция."""
+    model = queryset.model
+    total = 0
+    while True:
+        ids = _ids(queryset)
+        if not ids:
+            return total
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=ids).delete()
+        total += len(ids)
+
+
+def _delete_images(queryset):
+    """Удалить картинки постов выборки вместе с миниатюрами."""
+    for name in queryset.exclude(image='').values_list('image', flat=True):
+        delete_image(name)
+
+
+def purge_post(post_id):
+    post = Post.all_objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    delete_in_batches(Comment.all_objects.filter(post_id=post_id))
+    delete_in_batches(Reaction.objects.filter(post_id=post_id))
+    delete_in_batches(PostRevision.objects.filter(post_id=post_id))
+    if post.image:
+        delete_image(post.image.name)
+    post.delete()
+
+
+def purge_content(user_id):
+    """Удалить посты (и архивные) и комментарии автора."""
+    while True:
+        ids = _ids(Post.all_objects.filter(author_id=user_id))
+        if not ids:
+            break
+        for post_id in ids:
+            purge_post(post_id)
+    archived = ArchivedPost.objects.filter(author_id=user_id)
+    _delete_images(archived)
+    delete_in_batches(ArchivedComment.objects.filter(post__author_id=user_id))
+    delete_in_batches(archived)
+    delete_in_batches(ArchivedComment.objects.filter(author_id=user_id))
+    delete_in_batches(Comment.all_objects.filter(author_id=user_id))
+
+
+def purge_account(user_id):
+    purge_content(user_id)
+    while True:
+        ids = _ids(Reaction.objects.filter(user_id=user_id))
+        if not ids:
+            break
+        reactions.remove(ids)
+    delete_in_batches(
+        Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+    )
+    User.objects.filter(pk=user_id).delete()
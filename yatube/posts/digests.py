@@ -0,0 +1,121 @@
+"""Сводки новых постов для подписчиков.
+
+Вместо письма на каждый пост каждому подписчику раз в период уходит одно
+письмо со всеми постами избранных авторов за это время. Подписки
+обходятся пачками по DIGEST_BATCH_SIZE: для пачки один запрос по Follow
+и Post находит новые посты всех её подписчиков, письма рендерятся один
+раз на каждый набор постов (подписчики одного автора получают одно и то
+же письмо) и отправляются через одно соединение с почтовым сервером.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import DigestSubscription, Follow, Post
+
+PERIODS = {
+    DigestSubscription.DAILY: timedelta(days=1),
+    DigestSubscription.WEEKLY: timedelta(days=7),
+}
+
+
+def due(frequency, now):
+    """Подписки, которым пора отправить сводку."""
+    return DigestSubscription.objects.filter(
+        frequency=frequency,
+        last_sent__lte=now - PERIODS[frequency]
+    ).exclude(user__email='').order_by('pk')
+
+
+def new_posts(user_ids, now):
+    """{id пользователя: [id постов]} — новые посты его авторов.
+
+    Один запрос на всю пачку: окно каждого подписчика — от его
+    last_sent до now.
+    """
+    rows = Follow.objects.filter(
+        user_id__in=user_ids,
+        author__posts__pub_date__gt=F('user__digest__last_sent'),
+        author__posts__pub_date__lte=now,
+        author__posts__deleted__isnull=True
+    ).order_by('user_id', '-author__posts__pub_date').values_list(
+        'user_id', 'author__posts__pk'
+    )
+    result = {}
+    for user_id, post_id in rows:
+        result.setdefault(user_id, []).append(post_id)
+    return result
+
+
+class _Renderer:
+    """Рендерит письмо один раз на набор постов."""
+    def __init__(self, posts):
+        self.posts = posts
+        self.rendered = {}
+
+    def __call__(self, post_ids):
+        key = tuple(post_ids)
+        if key not in self.rendered:
+            shown = [
+                self.posts[pk] for pk in post_ids[:settings.DIGEST_MAX_POSTS]
+            ]
+            context = {
+                'posts': shown,
+                'more': len(post_ids) - len(shown),
+                'site_url': settings.SITE_URL,
+                'settings_url': settings.SITE_URL + reverse('posts:digest'),
+            }
+            self.rendered[key] = (
+                render_to_string('posts/email/digest.txt', context),
+                render_to_string('posts/email/digest.html', context),
+            )
+        return self.rendered[key]
+
+
+def _messages(subscriptions, now):
+    posts_by_user = new_posts(
+        [subscription.user_id for subscription in subscriptions], now
+    )
+    wanted = {
+        pk for post_ids in posts_by_user.values()
+        for pk in post_ids[:settings.DIGEST_MAX_POSTS]
+    }
+    render = _Renderer(Post.objects.for_feed().in_bulk(wanted))
+    for subscription in subscriptions:
+        post_ids = posts_by_user.get(subscription.user_id)
+        if not post_ids:
+            continue
+        text, html = render(post_ids)
+        message = EmailMultiAlternatives(
+            f'Новые посты в Yatube: {len(post_ids)}',
+            text,
+            to=[subscription.user.email]
+        )
+        message.attach_alternative(html, 'text/html')
+        yield message
+
+
+def send_digests(frequency, now=None, batch=None):
+    """Отправить сводки периода frequency. Возвращает число писем."""
+    now = now or timezone.now()
+    batch = batch or settings.DIGEST_BATCH_SIZE
+    subscriptions = due(frequency, now).select_related('user')
+    sent = 0
+    last = 0
+    with get_connection() as connection:
+        while True:
+            chunk = list(subscriptions.filter(pk__gt=last)[:batch])
+            if not chunk:
+                return sent
+            messages = list(_messages(chunk, now))
+            if messages:
+                sent += connection.send_messages(messages) or 0
+            DigestSubscription.objects.filter(
+                pk__in=[subscription.pk for subscription in chunk]
+            ).update(last_sent=now)
+            last = chunk[-1].pk
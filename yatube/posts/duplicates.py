@@ -0,0 +1,182 @@
+"""Поиск почти-дубликатов постов: MinHash с разбиением на полосы (LSH).
+
+Текст разбивается на пары соседних слов. Сходство двух текстов — доля
+общих пар (коэффициент Жаккара). MinHash-подпись из BANDS * ROWS
+минимумов сохраняет его: каждый минимум совпадает у двух текстов с
+вероятностью, равной сходству. Подпись режется на BANDS полос по
+ROWS значений, и от каждой полосы в PostFingerprint остаётся
+один ключ. Посты с общим ключом попадают в кандидаты, а поиск — это
+выборка по индексу key, не зависящая от числа постов. Кандидатов
+затем сверяет точное сходство текстов.
+
+При BANDS = 20 и ROWS = 3 пара со сходством 0.5 становится кандидатом
+с вероятностью 93 %, со сходством 0.1 — 2 %.
+
+Тексты короче DUPLICATE_MIN_WORDS слов не проверяются: у коротких
+фраз совпадения случайны.
+"""
+import hashlib
+import random
+import re
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, PostFingerprint
+from .utils import Clusters
+
+BANDS = 20
+ROWS = 3
+# ограничение на число кандидатов, сверяемых за один поиск
+CANDIDATES = 200
+# с каким числом постов корзины сверяется каждый её пост в отчёте
+LEADERS = 8
+
+WORDS = re.compile(r'\w+')
+_PRIME = (1 << 61) - 1
+_random = random.Random(46)
+_PERMUTATIONS = [
+    (_random.randrange(1, _PRIME), _random.randrange(_PRIME))
+    for _ in range(BANDS * ROWS)
+]
+
+
+def _hash(value):
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(),
+        'big',
+        signed=True
+    )
+
+
+def shingles(text):
+    """Пары соседних слов текста; пустое множество для коротких текстов."""
+    words = WORDS.findall(text.casefold().replace('ё', 'е'))
+    if len(words) < settings.DUPLICATE_MIN_WORDS:
+        return frozenset()
+    return frozenset(zip(words, words[1:]))
+
+
+def similarity(a, b):
+    """Коэффициент Жаккара двух множеств пар."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def keys(pairs):
+    """Ключи полос MinHash-подписи множества пар."""
+    if not pairs:
+        return []
+    values = [_hash(' '.join(pair)) % _PRIME for pair in pairs]
+    signature = [
+        min((a * value + b) % _PRIME for value in values)
+        for a, b in _PERMUTATIONS
+    ]
+    return [
+        _hash(f'{band}:' + ','.join(
+            map(str, signature[band * ROWS:(band + 1) * ROWS])
+        ))
+        for band in range(BANDS)
+    ]
+
+
+def fingerprint(post):
+    """Пересчитать ключи поста после правки текста."""
+    with transaction.atomic():
+        PostFingerprint.objects.filter(post_id=post.pk).delete()
+        PostFingerprint.objects.bulk_create(
+            PostFingerprint(post_id=post.pk, key=key)
+            for key in set(keys(shingles(post.text)))
+        )
+
+
+def find(text, exclude=None):
+    """Живые посты, похожие на text, парами (пост, сходство).
+
+    Самые похожие первыми; exclude — id поста, который не считать.
+    """
+    pairs = shingles(text)
+    if not pairs:
+        return []
+    candidates = Post.objects.filter(
+        fingerprints__key__in=keys(pairs)
+    ).exclude(pk=exclude).distinct().only('text', 'author')
+    found = []
+    for post in candidates[:CANDIDATES]:
+        score = similarity(pairs, shingles(post.text))
+        if score >= settings.DUPLICATE_SIMILARITY:
+            found.append((post, score))
+    return sorted(found, key=lambda item: -item[1])
+
+
+def backfill(batch_size):
+    """Посчитать ключи постов, у которых их ещё нет. Возвращает число."""
+    done = last = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last, fingerprints__isnull=True)
+            .order_by('pk').only('text')[:batch_size]
+        )
+        if not posts:
+            return done
+        with transaction.atomic():
+            PostFingerprint.objects.bulk_create(
+                PostFingerprint(post_id=post.pk, key=key)
+                for post in posts
+                for key in set(keys(shingles(post.text)))
+            )
+        done += len(posts)
+        last = posts[-1].pk
+
+
+def _buckets():
+    """Списки id постов с общим ключом полосы, по возрастанию ключа."""
+    rows = PostFingerprint.objects.filter(
+        post__deleted__isnull=True
+    ).order_by('key', 'post_id').values_list('key', 'post_id')
+    for _, group in groupby(rows.iterator(), key=lambda row: row[0]):
+        ids = [post_id for _, post_id in group]
+        if len(ids) > 1:
+            yield ids
+
+
+def _compare(buckets, clusters):
+    ids = {post_id for bucket in buckets for post_id in bucket}
+    texts = Post.objects.only('text').in_bulk(ids)
+    pairs = {pk: shingles(post.text) for pk, post in texts.items()}
+    for bucket in buckets:
+        # каждый пост корзины сверяется с первыми непохожими друг на
+        # друга постами, а не со всеми: корзина в тысячи постов не
+        # превращается в миллионы сравнений
+        leaders = []
+        for post_id in bucket:
+            for leader in leaders:
+                if similarity(
+                    pairs.get(post_id), pairs.get(leader)
+                ) >= settings.DUPLICATE_SIMILARITY:
+                    clusters.union(post_id, leader)
+                    break
+            else:
+                if len(leaders) < LEADERS:
+                    leaders.append(post_id)
+
+
+def report(batch_size):
+    """Группы почти-дубликатов по всем постам, крупные первыми.
+
+    Корзины читаются одним проходом по индексу, тексты подгружаются
+    порциями примерно по batch_size постов.
+    """
+    clusters = Clusters()
+    chunk, size = [], 0
+    for bucket in _buckets():
+        chunk.append(bucket)
+        size += len(bucket)
+        if size >= batch_size:
+            _compare(chunk, clusters)
+            chunk, size = [], 0
+    if chunk:
+        _compare(chunk, clusters)
+    return sorted(clusters.groups(), key=lambda group: -len(group))
@@ -0,0 +1,146 @@
+"""RSS и Atom ленты: общая, группы и автора.
+
+Готовый XML кэшируется по метке последнего изменения ленты
+(см. posts.stamps), а ETag и Last-Modified строятся из той же метки,
+так что повторный опрос без изменений получает 304 без чтения ленты:
+запрос к базе один — проверка, что группа или автор существуют.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from . import stamps
+from .models import Group, Post, User
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def scope(self, **kwargs):
+        return stamps.INDEX
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.for_feed()[:settings.FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def scope(self, slug):
+        return stamps.group_scope(slug)
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: группа {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return group.posts.for_feed()[:settings.FEED_SIZE]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def scope(self, username):
+        return stamps.author_scope(username)
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: записи {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return self.title(author)
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return author.posts.for_feed()[:settings.FEED_SIZE]
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj=None):
+        if obj is None:
+            return self.description
+        return self.description(obj)
+
+
+class LatestPostsAtomFeed(AtomMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed_class):
+    """View ленты с кэшем XML и условными GET по метке изменения."""
+    feed = feed_class()
+
+    def view(request, **kwargs):
+        # 404 для несуществующей группы или автора раньше проверки метки:
+        # иначе лишний адрес получил бы 304 по метке пустой ленты
+        feed.get_object(request, **kwargs)
+        stamp = stamps.get(feed.scope(**kwargs))
+        etag = f'"{feed_class.__name__}-{stamp:.6f}"'
+        last_modified = int(stamp) or None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = ':'.join((
+                'feed', feed_class.__name__, request.get_host(),
+                *kwargs.values(), f'{stamp:.6f}'
+            ))
+            cached = cache.get(key)
+            if cached is None:
+                rendered = feed(request, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+            response = HttpResponse(cached[0], content_type=cached[1])
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return view
@@ -1,9 +1,39 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
-from .models import Post, Comment
+from . import duplicates, images, spam
+from .models import Post, Comment, DigestSubscription
 
 
-class PostForm(forms.ModelForm):
+class SpamCheckMixin:
+    """Отклоняет текст с запрещёнными фразами и ссылками."""
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if spam.find(text):
+            raise forms.ValidationError(
+                'Текст содержит запрещённые слова или ссылки'
+            )
+        return text
+
+
+class PostForm(SpamCheckMixin, forms.ModelForm):
+    def clean_text(self):
+        text = super().clean_text()
+        if duplicates.find(text, exclude=self.instance.pk):
+            raise forms.ValidationError(
+                'Такой или очень похожий пост уже опубликован'
+            )
+        return text
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            value = images.dhash(image)
+            image.seek(0)
+            if images.banned(value):
+                raise forms.ValidationError('Эту картинку загружать нельзя')
+        return image
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -28,7 +58,7 @@ class PostForm(forms.ModelForm):
         }
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(SpamCheckMixin, forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
@@ -40,3 +70,12 @@ class CommentForm(forms.ModelForm):
                 }
             )
         }
+
+
+class DigestForm(forms.ModelForm):
+    class Meta:
+        model = DigestSubscription
+        fields = ('frequency',)
+        widgets = {
+            'frequency': forms.Select(attrs={'class': "form-control"})
+        }
@@ -0,0 +1,159 @@
+"""Счётчик новых постов для баннера «N новых постов».
+
+Для каждой ленты (общей, группы, автора) в кэше лежит «верхушка» —
+позиции (pub_date в мкс, pk) последних NEW_POSTS_WINDOW постов. Новый пост
+добавляется в верхушки своих лент сигналом, поэтому ответ на вопрос
+«сколько постов новее курсора» не запрашивает ленту из базы: это подсчёт
+по списку в кэше. Лента подписок складывается из верхушек авторов,
+список авторов пользователя тоже кэшируется.
+
+Если курсор старше всей верхушки, точного числа нет — отвечаем
+NEW_POSTS_WINDOW и more=True («100+»). Верхушка восстанавливается одним
+запросом, если её вытеснили из кэша или сбросили при правке и удалении.
+
+Добавление — чтение, правка и запись списка, поэтому оно идёт под
+блокировкой ленты: ключ, созданный атомарным cache.add. Иначе два поста,
+созданные одновременно, записали бы каждый свой список и один потерялся
+бы. Кто не дождался блокировки, сбрасывает верхушку — её восстановит
+следующий опрос.
+
+Без общего кэша верхушки и списки подписок живут
+INVALIDATED_CACHE_TIMEOUT секунд: другие процессы увидят новый пост или
+подписку, когда их копия истечёт.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import stamps
+from .models import Follow, Post
+from .utils import EPOCH, MICROSECOND, cache_timeout, parse_cursor
+
+# блокировка ленты: сколько ждать, как часто проверять и через сколько
+# секунд она снимается сама, если процесс упал
+LOCK_WAIT = 1
+LOCK_POLL = 0.005
+LOCK_TIMEOUT = 5
+
+
+def _key(scope):
+    return f'fresh:{scope}'
+
+
+def _lock_key(scope):
+    return f'fresh:lock:{scope}'
+
+
+def _following_key(user_id):
+    return f'fresh:following:{user_id}'
+
+
+def _position(pub_date, pk):
+    return [(pub_date - EPOCH) // MICROSECOND, pk]
+
+
+def _from_db(scope):
+    posts = Post.objects.all()
+    if scope.startswith('group:'):
+        posts = posts.filter(group__slug=scope[len('group:'):])
+    elif scope.startswith('author:'):
+        posts = posts.filter(author__username=scope[len('author:'):])
+    rows = posts.order_by('-pub_date', '-pk').values_list(
+        'pub_date', 'pk'
+    )[:settings.NEW_POSTS_WINDOW]
+    return [_position(pub_date, pk) for pub_date, pk in rows]
+
+
+def heads(scopes):
+    """{лента: верхушка}; недостающие в кэше восстанавливаются из базы."""
+    found = cache.get_many([_key(scope) for scope in scopes])
+    result = {}
+    missing = {}
+    for scope in scopes:
+        head = found.get(_key(scope))
+        if head is None:
+            head = _from_db(scope)
+            missing[_key(scope)] = head
+        result[scope] = head
+    if missing:
+        cache.set_many(
+            {key: head for key, head in missing.items() if head},
+            cache_timeout()
+        )
+        cache.set_many(
+            {key: head for key, head in missing.items() if not head},
+            cache_timeout(empty=True)
+        )
+    return result
+
+
+def _acquire(scope):
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(_lock_key(scope), 1, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(LOCK_POLL)
+    return True
+
+
+def push(post):
+    """Добавить новый пост в верхушки его лент.
+
+    Вызывается после фиксации транзакции (transaction.on_commit), чтобы
+    в верхушку не попал откатившийся пост.
+    """
+    position = _position(post.pub_date, post.pk)
+    for scope in stamps.scopes_for(post):
+        if not _acquire(scope):
+            reset([scope])
+            continue
+        try:
+            head = heads([scope])[scope]
+            if position not in head:
+                head = sorted(head + [position], reverse=True)
+            cache.set(
+                _key(scope), head[:settings.NEW_POSTS_WINDOW], cache_timeout()
+            )
+        finally:
+            cache.delete(_lock_key(scope))
+
+
+def reset(scopes):
+    """Сбросить верхушки: пост удалён или перенесён в другую группу."""
+    cache.delete_many([_key(scope) for scope in scopes])
+
+
+def forget_following(*user_ids):
+    cache.delete_many([_following_key(user_id) for user_id in user_ids])
+
+
+def following_scopes(user_id):
+    scopes = cache.get(_following_key(user_id))
+    if scopes is None:
+        scopes = [
+            stamps.author_scope(username)
+            for username in Follow.objects.filter(
+                user_id=user_id
+            ).values_list('author__username', flat=True)
+        ]
+        cache.set(_following_key(user_id), scopes, cache_timeout())
+    return scopes
+
+
+def count_newer(scopes, cursor):
+    """Сколько постов лент scopes новее курсора: (число, есть_ещё).
+
+    ValueError для испорченного курсора.
+    """
+    pub_date, pk = parse_cursor(cursor)
+    since = _position(pub_date, pk)
+    window = settings.NEW_POSTS_WINDOW
+    total = 0
+    more = False
+    for head in heads(scopes).values():
+        newer = [position for position in head if position > since]
+        total += len(newer)
+        if len(head) == window and head[-1] > since:
+            more = True
+    return min(total, window), more or total > window
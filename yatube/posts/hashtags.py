@@ -0,0 +1,153 @@
+"""Хэштеги и упоминания в текстах постов.
+
+При сохранении поста с новым текстом (сигнал post_save) теги и
+упомянутые пользователи записываются в Tag, PostTag и Mention. Лента
+тега и страница упоминаний читаются по индексам этих таблиц, без
+LIKE по текстам постов. backfill проходит старые посты порциями.
+
+Число непросмотренных упоминаний показывается в шапке каждой страницы,
+поэтому оно кэшируется и сбрасывается при новых упоминаниях, просмотре
+и удалении постов. Без общего кэша сброс виден только своему процессу,
+и число живёт INVALIDATED_CACHE_TIMEOUT секунд.
+"""
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Mention, Post, PostTag, Tag, User
+from .utils import cache_timeout
+
+TAG_LENGTH = Tag._meta.get_field('name').max_length
+HASHTAG = re.compile(r'(?<![\w#&])#(\w+)')
+# имя пользователя Django: буквы, цифры и @.+-_, но точка или дефис
+# в конце — уже знак препинания
+MENTION = re.compile(r'(?<![\w@.+-])@([\w.+-]*\w)')
+
+
+def tags_in(text):
+    return {
+        name.casefold() for name in HASHTAG.findall(text)
+        if len(name) <= TAG_LENGTH
+    }
+
+
+def mentions_in(text):
+    return set(MENTION.findall(text))
+
+
+def _unseen_key(user_id):
+    return f'mentions:unseen:{user_id}'
+
+
+def unseen_count(user_id):
+    """Число непросмотренных упоминаний пользователя."""
+    key = _unseen_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Mention.objects.filter(
+            user_id=user_id, seen=False, post__deleted__isnull=True
+        ).count()
+        cache.set(key, count, cache_timeout())
+    return count
+
+
+def forget_unseen(user_ids):
+    """Сбросить закэшированные числа упоминаний: их посты пропали."""
+    cache.delete_many([_unseen_key(user_id) for user_id in user_ids])
+
+
+def mark_seen(user_id, post_ids):
+    """Отметить просмотренными упоминания пользователя в постах post_ids."""
+    Mention.objects.filter(
+        user_id=user_id, post_id__in=post_ids, seen=False
+    ).update(seen=True)
+    cache.delete(_unseen_key(user_id))
+
+
+def notified(posts):
+    """id пользователей с непросмотренными упоминаниями в выборке постов."""
+    return set(Mention.objects.filter(
+        post__in=posts, seen=False
+    ).values_list('user_id', flat=True))
+
+
+def _tags(names):
+    """Теги по именам, недостающие создаются."""
+    Tag.objects.bulk_create(
+        (Tag(name=name) for name in names), ignore_conflicts=True
+    )
+    return dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+
+def index_posts(posts, notify=True):
+    """Привести теги и упоминания постов в соответствие их текстам.
+
+    notify=False — упоминания записываются уже просмотренными, чтобы
+    разбор старых постов не засыпал пользователей уведомлениями.
+    """
+    posts = list(posts)
+    tags = {post.pk: tags_in(post.text) for post in posts}
+    names = {post.pk: mentions_in(post.text) for post in posts}
+    with transaction.atomic():
+        tag_ids = _tags(set().union(*tags.values()))
+        user_ids = dict(
+            User.objects.filter(
+                username__in=set().union(*names.values()), is_active=True
+            ).values_list('username', 'pk')
+        )
+        wanted_tags, wanted_mentions = set(), set()
+        for post in posts:
+            wanted_tags.update(
+                (post.pk, tag_ids[name]) for name in tags[post.pk]
+            )
+            wanted_mentions.update(
+                (post.pk, user_ids[name]) for name in names[post.pk]
+                if name in user_ids and user_ids[name] != post.author_id
+            )
+        ids = [post.pk for post in posts]
+        old_tags = set(PostTag.objects.filter(
+            post_id__in=ids
+        ).values_list('post_id', 'tag_id'))
+        old_mentions = set(Mention.objects.filter(
+            post_id__in=ids
+        ).values_list('post_id', 'user_id'))
+        for post_id, tag_id in old_tags - wanted_tags:
+            PostTag.objects.filter(post_id=post_id, tag_id=tag_id).delete()
+        for post_id, user_id in old_mentions - wanted_mentions:
+            Mention.objects.filter(post_id=post_id, user_id=user_id).delete()
+        dates = {post.pk: post.pub_date for post in posts}
+        PostTag.objects.bulk_create(
+            PostTag(post_id=post_id, tag_id=tag_id, pub_date=dates[post_id])
+            for post_id, tag_id in wanted_tags - old_tags
+        )
+        Mention.objects.bulk_create(
+            Mention(
+                post_id=post_id,
+                user_id=user_id,
+                pub_date=dates[post_id],
+                seen=not notify
+            )
+            for post_id, user_id in wanted_mentions - old_mentions
+        )
+    cache.delete_many([
+        _unseen_key(user_id)
+        for _, user_id in (wanted_mentions ^ old_mentions)
+    ])
+
+
+def backfill(batch_size, progress=None):
+    """Разобрать все живые посты порциями. Возвращает число постов."""
+    done = last = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last).order_by('pk')
+            .only('text', 'author', 'pub_date')[:batch_size]
+        )
+        if not posts:
+            return done
+        index_posts(posts, notify=False)
+        done += len(posts)
+        last = posts[-1].pk
+        if progress:
+            progress(done)
@@ -0,0 +1,157 @@
+"""Перцептивные хэши картинок постов: поиск копий и запрещённых картинок.
+
+dHash: картинка уменьшается до 9×8 в оттенках серого, и каждый из 64
+бит говорит, светлее ли пиксель соседа справа. Пересжатие, смена
+размера и формата меняют лишь несколько бит, поэтому копии ищутся по
+расстоянию Хэмминга не больше IMAGE_HASH_DISTANCE.
+
+Поиск — мультииндексное хэширование (models.ImageHash): при радиусе r
+хотя бы одна из PARTS частей отличается не больше чем на r // PARTS
+бит. Все такие значения части перечисляются и ищутся по индексам,
+а точное расстояние проверяется у найденных кандидатов.
+"""
+from functools import reduce
+from itertools import combinations
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from PIL import Image
+
+from .models import BannedImage, Post, PostImageHash
+from .utils import Clusters
+
+BITS = 64
+PARTS = 4
+PART_BITS = BITS // PARTS
+_MASK = (1 << BITS) - 1
+_PART_MASK = (1 << PART_BITS) - 1
+
+
+def dhash(file):
+    """64-битный dHash картинки из файла или пути."""
+    with Image.open(file) as image:
+        # JPEG декодируется сразу в уменьшенном виде
+        image.draft('L', (PART_BITS * 2, PART_BITS * 2))
+        small = image.convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            value = value << 1 | (left > right)
+    return value
+
+
+def distance(a, b):
+    return bin((a ^ b) & _MASK).count('1')
+
+
+def parts(value):
+    value &= _MASK
+    return [
+        value >> (PART_BITS * index) & _PART_MASK for index in range(PARTS)
+    ]
+
+
+def assign(obj, value):
+    """Записать хэш в поля ImageHash; value хранится со знаком."""
+    value &= _MASK
+    obj.value = value - (1 << BITS) if value >> (BITS - 1) else value
+    for index, part in enumerate(parts(value)):
+        setattr(obj, f'part{index}', part)
+    return obj
+
+
+def _variants(part, radius):
+    """Значения части, отличающиеся от part не больше чем на radius бит."""
+    result = [part]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(PART_BITS), flips):
+            result.append(reduce(lambda acc, bit: acc ^ 1 << bit, bits, part))
+    return result
+
+
+def near(queryset, value, radius=None):
+    """Строки ImageHash выборки не дальше radius, парами (строка, расстояние).
+
+    Ближайшие первыми.
+    """
+    if radius is None:
+        radius = settings.IMAGE_HASH_DISTANCE
+    spread = radius // PARTS
+    condition = reduce(or_, (
+        Q(**{f'part{index}__in': _variants(part, spread)})
+        for index, part in enumerate(parts(value))
+    ))
+    found = []
+    for row in queryset.filter(condition):
+        found.append((row, distance(row.value, value)))
+    return sorted(
+        (item for item in found if item[1] <= radius),
+        key=lambda item: item[1]
+    )
+
+
+def banned(value):
+    """Запрещённая картинка, похожая на хэш value, или None."""
+    found = near(BannedImage.objects.all(), value)
+    return found[0][0] if found else None
+
+
+def hash_post(post_id):
+    """Посчитать и сохранить хэш картинки поста. Возвращает хэш или None."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        PostImageHash.objects.filter(post_id=post_id).delete()
+        return None
+    with post.image.open('rb') as file:
+        value = dhash(file)
+    row = assign(PostImageHash(post_id=post_id), value)
+    row.save()
+    return value
+
+
+def similar(post_id, radius=None):
+    """Живые посты с похожей картинкой, парами (пост, расстояние)."""
+    row = PostImageHash.objects.filter(pk=post_id).first()
+    if row is None:
+        return []
+    return [
+        (match.post, dist)
+        for match, dist in near(
+            PostImageHash.objects.filter(post__deleted__isnull=True)
+            .exclude(pk=post_id).select_related('post'),
+            row.value,
+            radius
+        )
+    ]
+
+
+def groups(radius=None):
+    """Группы id постов с похожими картинками, крупные первыми.
+
+    Хэши читаются в память одним запросом (id и хэш на пост) и ищутся по
+    тем же частям через словари вместо индексов базы.
+    """
+    if radius is None:
+        radius = settings.IMAGE_HASH_DISTANCE
+    spread = radius // PARTS
+    rows = list(
+        PostImageHash.objects.filter(post__deleted__isnull=True)
+        .values_list('post_id', 'value')
+    )
+    tables = [{} for _ in range(PARTS)]
+    for post_id, value in rows:
+        for index, part in enumerate(parts(value)):
+            tables[index].setdefault(part, []).append((post_id, value))
+    clusters = Clusters()
+    for post_id, value in rows:
+        for index, part in enumerate(parts(value)):
+            for variant in _variants(part, spread):
+                for other_id, other in tables[index].get(variant, ()):
+                    if other_id != post_id and (
+                        distance(value, other) <= radius
+                    ):
+                        clusters.union(post_id, other_id)
+    return sorted(clusters.groups(), key=lambda group: -len(group))
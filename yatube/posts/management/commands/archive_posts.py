@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_before
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше --days дней вместе с комментариями в '
+        'архивные таблицы порциями по --batch постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int)
+        parser.add_argument('--batch', type=int)
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = settings.POST_ARCHIVE_AFTER_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+        moved = archive_before(
+            cutoff, options['batch'] or settings.POST_ARCHIVE_BATCH_SIZE
+        )
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
@@ -0,0 +1,68 @@
+import random
+import re
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from posts.spam import Matcher, normalize
+
+LETTERS = 'абвгдежзиклмнопрстуфхцчшщэюя'
+
+
+def random_phrase(generator):
+    return ' '.join(
+        ''.join(generator.choices(LETTERS, k=generator.randint(3, 8)))
+        for _ in range(generator.randint(1, 3))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку текста автоматом Ахо — Корасик с перебором '
+        'фраз и регулярным выражением-объединением при разном числе '
+        'запрещённых фраз.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--patterns', type=int, nargs='+', default=[100, 1000, 10000]
+        )
+        parser.add_argument('--length', type=int, default=2000)
+        parser.add_argument('--number', type=int, default=50)
+
+    def measure(self, check, number):
+        return timeit.timeit(check, number=number) / number * 1e6
+
+    def handle(self, *args, **options):
+        generator = random.Random(1)
+        number = options['number']
+        # текст без совпадений — худший случай, проверяется целиком
+        text = ' '.join(
+            random_phrase(generator) for _ in range(options['length'] // 10)
+        )[:options['length']]
+        self.stdout.write(f'Текст: {len(text)} символов')
+        for size in options['patterns']:
+            phrases = [random_phrase(generator) + 'ё' for _ in range(size)]
+            build = timeit.timeit(
+                lambda: Matcher((phrase, True) for phrase in phrases),
+                number=1
+            )
+            matcher = Matcher((phrase, True) for phrase in phrases)
+            automaton = self.measure(lambda: matcher.find(text), number)
+            normalized = [normalize(phrase) for phrase in phrases]
+
+            def naive_check():
+                checked = normalize(text)
+                return any(phrase in checked for phrase in normalized)
+
+            naive = self.measure(naive_check, number)
+            regex = re.compile('|'.join(map(re.escape, normalized)))
+            alternation = self.measure(
+                lambda: regex.search(normalize(text)), number
+            )
+            self.stdout.write(
+                f'{size} фраз: сборка {build * 1e3:.1f} мс, '
+                f'автомат {automaton:.0f} мкс, '
+                f'перебор {naive:.0f} мкс, '
+                f'регулярное выражение {alternation:.0f} мкс'
+            )
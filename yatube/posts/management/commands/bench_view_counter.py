@@ -0,0 +1,55 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import ViewCounter, write
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы счётчика просмотров: стоимость '
+        'учёта одного просмотра и сброса буфера в базу. Изменения '
+        'в базе откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hits', type=int, default=100000)
+        parser.add_argument('--posts', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        hits, posts = options['hits'], options['posts']
+        ids = list(
+            Post.objects.values_list('pk', flat=True)[:posts]
+        ) or list(range(1, posts + 1))
+
+        counter = ViewCounter(interval=float('inf'))
+        elapsed = timeit.timeit(
+            lambda: [counter.hit(ids[n % len(ids)]) for n in range(hits)],
+            number=1
+        )
+        self.stdout.write(
+            f'Учёт просмотра в памяти: {elapsed / hits * 1e6:.2f} мкс'
+        )
+
+        items = list(counter._pending.items())
+        with transaction.atomic():
+            elapsed = timeit.timeit(lambda: write(items), number=1)
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'Сброс {len(items)} постов одним UPDATE: {elapsed * 1e3:.2f} мс, '
+            f'{elapsed / hits * 1e6:.3f} мкс на просмотр'
+        )
+
+        with transaction.atomic():
+            elapsed = timeit.timeit(
+                lambda: [write([(ids[n % len(ids)], 1)])
+                         for n in range(min(hits, 1000))],
+                number=1
+            )
+            transaction.set_rollback(True)
+        self.stdout.write(
+            'Для сравнения, UPDATE на каждый просмотр (без COMMIT): '
+            f'{elapsed / min(hits, 1000) * 1e6:.2f} мкс'
+        )
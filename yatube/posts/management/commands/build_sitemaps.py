@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит карту сайта (sitemap.xml и файлы по 50 000 адресов) '
+        'в SITEMAP_ROOT. Запускается периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', help='Каталог для файлов карты')
+        parser.add_argument('--limit', type=int, help='Адресов в файле')
+        parser.add_argument('--chunk', type=int, help='Строк за запрос')
+
+    def handle(self, *args, **options):
+        names = sitemaps.build(
+            root=options['root'],
+            limit=options['limit'],
+            chunk=options['chunk']
+        )
+        self.stdout.write(f'Записано файлов: {len(names)}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет затухшие рейтинги популярности и прогревает кэш. '
+        'Запускается периодически, например из cron.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = trending.compact()
+        self.stdout.write(f'Удалено затухших рейтингов: {deleted}')
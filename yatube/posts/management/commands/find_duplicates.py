@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import duplicates
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Отчёт о группах почти одинаковых постов. С --backfill сначала '
+        'считает ключи поиска для постов, у которых их ещё нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true')
+        parser.add_argument('--batch', type=int)
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help='Сколько самых крупных групп вывести.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch'] or settings.DUPLICATE_BATCH_SIZE
+        if options['backfill']:
+            done = duplicates.backfill(batch_size)
+            self.stdout.write(f'Посчитаны ключи постов: {done}')
+        groups = duplicates.report(batch_size)
+        self.stdout.write(f'Групп почти-дубликатов: {len(groups)}')
+        for group in groups[:options['limit']]:
+            authors = dict(
+                Post.objects.filter(pk__in=group)
+                .values_list('pk', 'author__username')
+            )
+            self.stdout.write(f'{len(group)}: ' + ', '.join(
+                f'{pk} ({authors.get(pk)})' for pk in group
+            ))
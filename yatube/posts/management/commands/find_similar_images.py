@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Посты с похожими картинками: для --post — список похожих, без '
+        'него — группы по всем постам. --backfill сначала считает хэши '
+        'картинок, у которых их ещё нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int)
+        parser.add_argument('--distance', type=int)
+        parser.add_argument('--backfill', action='store_true')
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help='Сколько самых крупных групп вывести.'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            missing = list(Post.objects.exclude(image='').filter(
+                image_hash__isnull=True
+            ).values_list('pk', flat=True))
+            for pk in missing:
+                images.hash_post(pk)
+            self.stdout.write(f'Посчитаны хэши картинок: {len(missing)}')
+        if options['post'] is not None:
+            if not Post.objects.filter(pk=options['post']).exists():
+                raise CommandError(f'Нет поста {options["post"]}')
+            for post, distance in images.similar(
+                options['post'], options['distance']
+            ):
+                self.stdout.write(f'{post.pk}: расстояние {distance}')
+            return
+        groups = images.groups(options['distance'])
+        self.stdout.write(f'Групп похожих картинок: {len(groups)}')
+        for group in groups[:options['limit']]:
+            self.stdout.write(
+                f'{len(group)}: ' + ', '.join(map(str, group))
+            )
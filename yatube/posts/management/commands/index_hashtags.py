@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import hashtags
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает хэштеги и упоминания всех постов порциями по --batch. '
+        'Упоминания в старых постах записываются просмотренными.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int)
+
+    def handle(self, *args, **options):
+        done = hashtags.backfill(
+            options['batch'] or settings.HASHTAGS_BATCH_SIZE,
+            progress=lambda done: self.stdout.write(f'{done}…')
+        )
+        self.stdout.write(f'Разобрано постов: {done}')
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import moderation
+from posts.models import Comment, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Массовая модерация: перенос постов между группами, удаление '
+        'контента авторов, чистка комментариев по регулярному выражению, '
+        'удаление подписок спам-аккаунтов.'
+    )
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest='action')
+        actions.required = True
+        move = actions.add_parser('move', help='Перенести посты в группу')
+        move.add_argument('--from-group', help='slug исходной группы')
+        move.add_argument('--author', action='append', default=[])
+        move.add_argument('--to', help='slug группы (без него — из групп)')
+        content = actions.add_parser(
+            'delete-content', help='Удалить посты и комментарии авторов'
+        )
+        content.add_argument('--author', action='append', required=True)
+        comments = actions.add_parser(
+            'purge-comments', help='Удалить комментарии по шаблону'
+        )
+        comments.add_argument('--pattern', required=True)
+        follows = actions.add_parser(
+            'unfollow', help='Удалить подписки пользователей'
+        )
+        follows.add_argument('--author', action='append', required=True)
+
+    def progress(self, done, total):
+        self.stdout.write(f'{done}/{total}')
+
+    def users(self, usernames):
+        users = list(User.objects.filter(username__in=usernames))
+        missing = set(usernames) - {user.username for user in users}
+        if missing:
+            raise CommandError(f'Нет пользователей: {", ".join(missing)}')
+        return users
+
+    def group(self, slug):
+        try:
+            return Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise CommandError(f'Нет группы {slug}')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'move':
+            posts = Post.objects.all()
+            if options['from_group']:
+                posts = posts.filter(group=self.group(options['from_group']))
+            if options['author']:
+                posts = posts.filter(author__in=self.users(options['author']))
+            if not options['from_group'] and not options['author']:
+                raise CommandError('Укажите --from-group или --author')
+            group = self.group(options['to']) if options['to'] else None
+            done = moderation.move_posts(posts, group, self.progress)
+            self.stdout.write(f'Перенесено постов: {done}')
+        elif action == 'delete-content':
+            done = moderation.delete_content(
+                self.users(options['author']), self.progress
+            )
+            self.stdout.write(f'Контент удаляется у авторов: {done}')
+        elif action == 'purge-comments':
+            done = moderation.purge_comments(
+                Comment.all_objects.filter(text__regex=options['pattern']),
+                self.progress
+            )
+            self.stdout.write(f'Удалено комментариев: {done}')
+        else:
+            done = moderation.remove_follows(
+                self.users(options['author']), self.progress
+            )
+            self.stdout.write(f'Удалено подписок: {done}')
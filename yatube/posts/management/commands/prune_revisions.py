@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import revisions
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет старые версии постов: у каждого поста остаются последние '
+        '--keep версий и версии моложе --days дней.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int)
+        parser.add_argument('--days', type=int)
+
+    def handle(self, *args, **options):
+        keep = max(options['keep'] or settings.POST_REVISION_KEEP, 1)
+        before = None
+        if options['days'] is not None:
+            before = timezone.now() - timedelta(days=options['days'])
+        deleted = revisions.prune_all(keep, before)
+        self.stdout.write(f'Удалено версий: {deleted}')
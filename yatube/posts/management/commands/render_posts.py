@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.tasks import RENDER_MODELS, render_posts
+from tasks.queue import enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        'Перерисовывает HTML постов, размеченных старой версией разметки: '
+        'ставит фоновую задачу или, с --now, делает всё сразу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true')
+        parser.add_argument('--batch', type=int)
+
+    def handle(self, *args, **options):
+        if not options['now']:
+            enqueue(render_posts, key=f'render_posts:v{markup.VERSION}')
+            self.stdout.write(
+                f'Перерисовка до версии {markup.VERSION} поставлена в очередь'
+            )
+            return
+        batch_size = options['batch'] or settings.RENDER_BATCH_SIZE
+        for name, model in RENDER_MODELS.items():
+            outdated = model._default_manager.filter(
+                render_version__lt=markup.VERSION
+            ).count()
+            last = 0
+            while last is not None:
+                last = markup.render_outdated(model, last, batch_size)
+            self.stdout.write(f'{name}: перерисовано {outdated}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет сводки новых постов подписчикам, у которых подошёл '
+        'срок. Запускается периодически, например раз в час из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--frequency',
+            choices=sorted(PERIODS),
+            action='append',
+            help='Только сводки этого периода (по умолчанию все)'
+        )
+        parser.add_argument('--batch', type=int)
+
+    def handle(self, *args, **options):
+        for frequency in options['frequency'] or sorted(PERIODS):
+            sent = send_digests(frequency, batch=options['batch'])
+            self.stdout.write(f'{frequency}: отправлено писем {sent}')
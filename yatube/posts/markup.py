@@ -0,0 +1,221 @@
+"""Оформление текста постов: небольшое подмножество Markdown.
+
+Поддерживается:
+
+    **жирный**, *курсив* или _курсив_, `код`
+    [текст](https://адрес) и голые ссылки http(s)://…
+    абзацы (пустая строка) и переносы строк
+    списки: строки, начинающиеся с «- » или «* »
+    цитаты: строки, начинающиеся с «> »
+    блоки кода между строками ```
+    #теги и @упоминания (posts.hashtags)
+
+Для списков хранится начало HTML (excerpt_html): первые EXCERPT_WORDS
+слов, но не больше EXCERPT_CHARS символов текста; теги обрезанного
+HTML закрываются.
+
+HTML безопасен по построению: весь текст сначала экранируется, теги
+появляются только из разметки выше, а ссылки — только на http и https.
+Разбор дорогой, поэтому он выполняется при сохранении поста, а
+результат хранится в text_html вместе с render_version. Когда разметка
+меняется, VERSION увеличивается, и фоновая задача render_posts
+перерисовывает старые посты порциями.
+"""
+import re
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
+from django.utils.html import escape, format_html
+
+from .hashtags import HASHTAG, MENTION, TAG_LENGTH
+
+# 2 — появилось начало текста для списков
+# 3 — жирный и курсив больше не перекрещиваются
+VERSION = 3
+
+FENCE = '```'
+LIST_ITEM = re.compile(r'^\s*[-*]\s+(.*)$')
+QUOTE = re.compile(r'^\s*&gt;\s?(.*)$')
+CODE = re.compile(r'`([^`\n]+)`')
+LINK = re.compile(r'\[([^\]\n]+)\]\((https?://[^\s()<>]+)\)')
+# кавычки уже экранированы в &quot; и &#x27; и завершают ссылку
+URL = re.compile(r'(?<![\w/])https?://(?:(?!&quot;|&#x27;)[^\s<>])+')
+URL_TAIL = '.,:;!?)'
+STRONG = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+EMPHASIS = re.compile(
+    r'(?<![\w*])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![\w*])'
+    r'|(?<!\w)_(?=[^\s_])(.+?)(?<=[^\s_])_(?!\w)'
+)
+PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+
+
+class _Inline:
+    """Строчная разметка одного экранированного фрагмента.
+
+    Готовые куски HTML (код, ссылки, теги) прячутся за метками
+    \\x00N\\x00, чтобы следующие правила не трогали их содержимое.
+    """
+    def __init__(self):
+        self.parts = []
+
+    def hide(self, html):
+        self.parts.append(html)
+        return f'\x00{len(self.parts) - 1}\x00'
+
+    def url(self, match):
+        url = match.group(0)
+        tail = ''
+        while url and url[-1] in URL_TAIL:
+            url, tail = url[:-1], url[-1] + tail
+        # escape уже превратил & в &amp;, повторно не экранируем
+        return self.hide(
+            f'<a href="{url}" rel="nofollow noopener">{url}</a>'
+        ) + tail
+
+    def tag(self, match):
+        name = match.group(1)
+        if len(name) > TAG_LENGTH:
+            return match.group(0)
+        return self.hide(format_html(
+            '<a href="{}">#{}</a>',
+            reverse('posts:tag', args=(name.casefold(),)),
+            name
+        ))
+
+    def mention(self, match):
+        return self.hide(format_html(
+            '<a href="{}">@{}</a>',
+            reverse('posts:profile', args=(match.group(1),)),
+            match.group(1)
+        ))
+
+    def emphasis(self, text):
+        return EMPHASIS.sub(
+            lambda match: f'<em>{match.group(1) or match.group(2)}</em>',
+            text
+        )
+
+    def render(self, text):
+        text = CODE.sub(
+            lambda match: self.hide(f'<code>{match.group(1)}</code>'), text
+        )
+        text = LINK.sub(
+            lambda match: self.hide(
+                f'<a href="{match.group(2)}" rel="nofollow noopener">'
+                f'{match.group(1)}</a>'
+            ),
+            text
+        )
+        text = URL.sub(self.url, text)
+        text = HASHTAG.sub(self.tag, text)
+        text = MENTION.sub(self.mention, text)
+        # готовый <strong> прячется за меткой, поэтому курсив не может
+        # начаться внутри него и закончиться снаружи: теги не перекрещиваются
+        text = STRONG.sub(
+            lambda match: self.hide(
+                f'<strong>{self.emphasis(match.group(1))}</strong>'
+            ),
+            text
+        )
+        text = self.emphasis(text)
+        while PLACEHOLDER.search(text):
+            text = PLACEHOLDER.sub(
+                lambda match: self.parts[int(match.group(1))], text
+            )
+        return text
+
+
+def _inline(lines):
+    inline = _Inline()
+    return '<br>'.join(inline.render(line) for line in lines)
+
+
+def _block(kind, lines):
+    if kind == 'ul':
+        return '<ul>' + ''.join(
+            f'<li>{_inline([item])}</li>' for item in lines
+        ) + '</ul>'
+    if kind == 'quote':
+        return f'<blockquote><p>{_inline(lines)}</p></blockquote>'
+    if kind == 'code':
+        return '<pre><code>' + '\n'.join(lines) + '</code></pre>'
+    return f'<p>{_inline(lines)}</p>'
+
+
+def _classify(line):
+    """Вид блока строки и её содержимое без маркера."""
+    item = LIST_ITEM.match(line)
+    if item:
+        return 'ul', item.group(1)
+    quote = QUOTE.match(line)
+    if quote:
+        return 'quote', quote.group(1)
+    return 'p', line
+
+
+def render(text):
+    """HTML текста поста."""
+    text = escape(text.replace('\x00', '').replace('\r\n', '\n'))
+    blocks = []
+    kind, buffer = None, []
+    for line in text.split('\n'):
+        if kind == 'code' and line.strip() != FENCE:
+            buffer.append(line)
+            continue
+        if buffer and (
+            kind == 'code' or not line.strip()
+            or line.strip().startswith(FENCE)
+            or _classify(line)[0] != kind
+        ):
+            blocks.append(_block(kind, buffer))
+            buffer = []
+        if kind == 'code' or not line.strip():
+            kind = None
+        elif line.strip().startswith(FENCE):
+            kind = 'code'
+        else:
+            kind, content = _classify(line)
+            buffer.append(content)
+    if buffer or kind == 'code':
+        blocks.append(_block(kind, buffer))
+    return '\n'.join(blocks)
+
+
+def excerpt(html):
+    """Начало HTML по границе слова и признак, что оно короче целого."""
+    short = Truncator(html).words(settings.EXCERPT_WORDS, html=True)
+    short = Truncator(short).chars(settings.EXCERPT_CHARS, html=True)
+    return short, short != html
+
+
+def apply(obj):
+    """Записать в пост или архивный пост HTML текста и его начало."""
+    obj.text_html = render(obj.text)
+    obj.excerpt_html, obj.excerpt_truncated = excerpt(obj.text_html)
+    obj.render_version = VERSION
+
+
+def render_outdated(model, after, batch_size):
+    """Перерисовать порцию строк model с устаревшей версией после id after.
+
+    updated обновляется: он входит в ключ кэша карточки поста.
+    Возвращает id последней строки порции или None, если их не было.
+    """
+    rows = list(
+        model._default_manager.filter(
+            render_version__lt=VERSION, pk__gt=after
+        ).order_by('pk').only('text')[:batch_size]
+    )
+    if not rows:
+        return None
+    now = timezone.now()
+    for row in rows:
+        apply(row)
+        row.updated = now
+    model._default_manager.bulk_update(rows, (
+        'text_html', 'excerpt_html', 'excerpt_truncated', 'render_version',
+        'updated'
+    ))
+    return rows[-1].pk
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(db_index=True, default=0, verbose_name='Просмотры'),
+        ),
+    ]
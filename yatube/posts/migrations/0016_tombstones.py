@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_archived_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='deleted',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Удалён'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='deleted',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Удалён'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_comment_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BannedPhrase',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phrase', models.CharField(max_length=200, unique=True, verbose_name='Фраза')),
+                ('kind', models.CharField(choices=[('phrase', 'Фраза (целыми словами)'), ('url', 'Ссылка или домен (любое вхождение)')], default='phrase', max_length=16, verbose_name='Вид')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Действует')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Добавлена')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Изменена')),
+            ],
+            options={
+                'ordering': ['phrase'],
+            },
+        ),
+    ]
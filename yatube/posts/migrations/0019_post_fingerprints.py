@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_banned_phrases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Ключ полосы')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='posts.Post')),
+            ],
+        ),
+    ]
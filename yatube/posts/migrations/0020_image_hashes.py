@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BannedImage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(verbose_name='Хэш')),
+                ('part0', models.PositiveIntegerField(db_index=True)),
+                ('part1', models.PositiveIntegerField(db_index=True)),
+                ('part2', models.PositiveIntegerField(db_index=True)),
+                ('part3', models.PositiveIntegerField(db_index=True)),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='Причина')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Добавлена')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostImageHash',
+            fields=[
+                ('value', models.BigIntegerField(verbose_name='Хэш')),
+                ('part0', models.PositiveIntegerField(db_index=True)),
+                ('part1', models.PositiveIntegerField(db_index=True)),
+                ('part2', models.PositiveIntegerField(db_index=True)),
+                ('part3', models.PositiveIntegerField(db_index=True)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='image_hash', serialize=False, to='posts.Post')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
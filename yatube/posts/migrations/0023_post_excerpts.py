@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt_html',
+            field=models.TextField(blank=True, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, verbose_name='Текст длиннее начала'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее начала'),
+        ),
+    ]
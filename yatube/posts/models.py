@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -13,7 +14,40 @@ class Group(models.Model):
         return self.title
 
 
+# поля карточки поста в списках (posts/includes/post_card.html)
+LIST_FIELDS = (
+    'pub_date', 'updated', 'image', 'views',
+    'excerpt_html', 'excerpt_truncated',
+    'author', 'author__username', 'author__first_name', 'author__last_name',
+    'group', 'group__slug', 'group__title',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа загружаются тем же запросом."""
+        return self.select_related('author', 'group')
+
+    def for_list(self):
+        """Посты для списков: только поля карточки, без полного текста."""
+        return self.for_feed().only(*LIST_FIELDS)
+
+
+class AliveManager(models.Manager):
+    """Менеджер без удалённых строк (deleted заполнено).
+
+    Удаление сначала ставит отметку — строка сразу пропадает из лент,
+    страниц и связанных выборок, — а сами строки фоновая задача удаляет
+    порциями (posts.deletion). all_objects видит всё.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted__isnull=True)
+
+
 class Post(models.Model):
+    # ArchivedPost — то же с True; шаблоны и реакции различают их по нему
+    is_archived = False
+
     text = models.TextField(
         'Текст поста (тест)',
         help_text='Введите текст поста(тест)'
@@ -37,20 +71,48 @@ class Post(models.Model):
         verbose_name='Группа(тест)',
         help_text='Группа, к которой будет относиться пост(тест)'
     )
+    # HTML текста (posts.markup), пересчитывается при сохранении
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    render_version = models.PositiveSmallIntegerField(
+        'Версия разметки', default=0, db_index=True, editable=False
+    )
+    # начало text_html для списков: полный текст в них не загружается
+    excerpt_html = models.TextField(
+        'Начало текста', blank=True, editable=False
+    )
+    excerpt_truncated = models.BooleanField(
+        'Текст длиннее начала', default=False, editable=False
+    )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        db_index=True
+    )
+    # входит в ключ кэша карточки поста
+    updated = models.DateTimeField('Изменён', auto_now=True)
+    deleted = models.DateTimeField('Удалён', blank=True, null=True)
+
+    objects = AliveManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = (
+            models.Index(fields=['-pub_date', '-id'], name='post_feed_idx'),
+        )
 
 
 class Comment(models.Model):
+    is_archived = False
+
     post = models.ForeignKey(
         Post,
         related_name='comments',
@@ -68,9 +130,16 @@ class Comment(models.Model):
         'Дата публикации(комментария)',
         auto_now_add=True
     )
+    deleted = models.DateTimeField('Удалён', blank=True, null=True)
+
+    objects = AliveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-created']
+        indexes = (
+            models.Index(fields=['-created'], name='comment_created_idx'),
+        )
 
 
 class Follow(models.Model):
@@ -95,5 +164,422 @@ class Follow(models.Model):
         constraints = (
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_entry'
-            )
+            ),
+        )
+
+
+class PostTrend(models.Model):
+    """Рейтинг популярности поста.
+
+    score хранится в логарифмической шкале относительно
+    posts.trending.EPOCH, поэтому затухание не требует пересчёта строк.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='trend',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+    updated = models.DateTimeField('Обновлён')
+
+
+class GroupTrend(models.Model):
+    """Рейтинг популярности группы, устроен так же, как PostTrend."""
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='trend',
+        on_delete=models.CASCADE,
+        verbose_name='Группа'
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+    updated = models.DateTimeField('Обновлён')
+
+
+class Reaction(models.Model):
+    """Реакция пользователя на пост или комментарий."""
+    KINDS = (
+        ('like', '👍'),
+        ('love', '❤'),
+        ('laugh', '😂'),
+    )
+    user = models.ForeignKey(
+        User,
+        related_name='reactions',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='reactions',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        verbose_name='Пост'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        related_name='reactions',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        verbose_name='Комментарий'
+    )
+    kind = models.CharField('Реакция', max_length=16, choices=KINDS)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['user', 'post', 'kind'],
+                name='unique_post_reaction'
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'comment', 'kind'],
+                name='unique_comment_reaction'
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(post__isnull=False, comment__isnull=True)
+                    | models.Q(post__isnull=True, comment__isnull=False)
+                ),
+                name='reaction_single_target'
+            ),
+        )
+
+
+class ReactionCounter(models.Model):
+    """Шард счётчика реакций.
+
+    Итог по цели и виду реакции — сумма count по всем шардам; запись
+    распределяется по REACTION_COUNTER_SHARDS строкам, чтобы популярный
+    пост не превращался в одну горячую строку.
+    """
+    post = models.ForeignKey(
+        Post,
+        related_name='reaction_counters',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True
+    )
+    comment = models.ForeignKey(
+        Comment,
+        related_name='reaction_counters',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True
+    )
+    kind = models.CharField(max_length=16, choices=Reaction.KINDS)
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['post', 'kind', 'shard'],
+                name='unique_post_counter_shard'
+            ),
+            models.UniqueConstraint(
+                fields=['comment', 'kind', 'shard'],
+                name='unique_comment_counter_shard'
+            ),
+        )
+
+
+class DigestSubscription(models.Model):
+    """Подписка на сводку новых постов избранных авторов.
+
+    Сводка собирает посты, опубликованные после last_sent; строка есть
+    только у тех, кто включил рассылку.
+    """
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    FREQUENCIES = (
+        (DAILY, 'Раз в день'),
+        (WEEKLY, 'Раз в неделю'),
+    )
+
+    user = models.OneToOneField(
+        User,
+        related_name='digest',
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик'
+    )
+    frequency = models.CharField(
+        'Как часто присылать',
+        max_length=16,
+        choices=FREQUENCIES,
+        default=DAILY
+    )
+    last_sent = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+class PostRevision(models.Model):
+    """Версия текста поста.
+
+    Хранится либо полный текст (снимок), либо разница с предыдущей
+    версией (posts.revisions); снимок пишется каждые
+    POST_REVISION_SNAPSHOT_EVERY версий, чтобы восстановление версии
+    не проходило всю историю.
+    """
+    post = models.ForeignKey(
+        Post,
+        related_name='revisions',
+        on_delete=models.CASCADE
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    is_snapshot = models.BooleanField('Полный текст', default=False)
+    data = models.TextField('Текст или разница (JSON)')
+    editor = models.ForeignKey(
+        User,
+        related_name='post_revisions',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name='Автор правки'
+    )
+    created = models.DateTimeField('Дата правки', default=timezone.now)
+
+    class Meta:
+        ordering = ['post', 'number']
+        constraints = (
+            models.UniqueConstraint(
+                fields=['post', 'number'], name='unique_post_revision'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы (posts.archive).
+
+    id совпадает с id исходного поста, поэтому старые ссылки продолжают
+    работать. Архивный пост только читается: реакции заморожены в
+    reactions — JSON {вид: число}.
+    """
+    is_archived = True
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    text_html = models.TextField('HTML текста', blank=True)
+    render_version = models.PositiveSmallIntegerField(
+        'Версия разметки', default=0, db_index=True
+    )
+    excerpt_html = models.TextField('Начало текста', blank=True)
+    excerpt_truncated = models.BooleanField(
+        'Текст длиннее начала', default=False
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    updated = models.DateTimeField('Изменён')
+    reactions = models.TextField('Реакции (JSON)', default='{}')
+    archived = models.DateTimeField('Дата архивации', default=timezone.now)
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = (
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='archived_post_author_idx'
+            ),
+        )
+
+
+class ArchivedComment(models.Model):
+    """Комментарий архивного поста, id — как у исходного."""
+    is_archived = True
+
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        on_delete=models.CASCADE
+    )
+    text = models.TextField('Комментарий')
+    created = models.DateTimeField('Дата публикации(комментария)')
+    reactions = models.TextField('Реакции (JSON)', default='{}')
+
+    class Meta:
+        ordering = ['-created']
+
+
+class BannedPhrase(models.Model):
+    """Запрещённая фраза или фрагмент ссылки (posts.spam)."""
+    PHRASE = 'phrase'
+    URL = 'url'
+    KINDS = (
+        (PHRASE, 'Фраза (целыми словами)'),
+        (URL, 'Ссылка или домен (любое вхождение)'),
+    )
+
+    phrase = models.CharField('Фраза', max_length=200, unique=True)
+    kind = models.CharField(
+        'Вид', max_length=16, choices=KINDS, default=PHRASE
+    )
+    is_active = models.BooleanField('Действует', default=True)
+    created = models.DateTimeField('Добавлена', auto_now_add=True)
+    # по нему процессы замечают правки списка и пересобирают автомат
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        ordering = ['phrase']
+
+    def __str__(self):
+        return self.phrase
+
+
+class PostFingerprint(models.Model):
+    """Ключ корзины LSH для поиска похожих постов (posts.duplicates).
+
+    У поста по строке на каждую полосу MinHash-подписи; посты с общим
+    ключом — кандидаты в почти-дубликаты.
+    """
+    post = models.ForeignKey(
+        Post,
+        related_name='fingerprints',
+        on_delete=models.CASCADE
+    )
+    key = models.BigIntegerField('Ключ полосы', db_index=True)
+
+    def __str__(self):
+        return f'{self.post_id}: {self.key}'
+
+
+class ImageHash(models.Model):
+    """Перцептивный хэш картинки (posts.images).
+
+    64 бита хранятся целиком в value и четырьмя частями по 16 бит в
+    индексированных part0…part3: у двух хэшей на расстоянии Хэмминга
+    меньше 4 * (r + 1) хотя бы одна часть отличается не больше чем на r
+    бит, поэтому поиск похожих — выборка по индексам частей.
+    """
+    value = models.BigIntegerField('Хэш')
+    part0 = models.PositiveIntegerField(db_index=True)
+    part1 = models.PositiveIntegerField(db_index=True)
+    part2 = models.PositiveIntegerField(db_index=True)
+    part3 = models.PositiveIntegerField(db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class PostImageHash(ImageHash):
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='image_hash',
+        on_delete=models.CASCADE
+    )
+
+
+class BannedImage(ImageHash):
+    """Запрещённая картинка: похожие не загрузить в пост."""
+    note = models.CharField('Причина', max_length=200, blank=True)
+    created = models.DateTimeField('Добавлена', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return self.note or f'{self.value & (2 ** 64 - 1):016x}'
+
+
+class Tag(models.Model):
+    """Хэштег; name хранится в нижнем регистре (posts.hashtags)."""
+    name = models.CharField('Тег', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Хэштег в тексте поста.
+
+    pub_date скопирована из поста: лента тега читается по индексу
+    (tag, -pub_date, -id) без сортировки постов тега.
+    """
+    post = models.ForeignKey(
+        Post,
+        related_name='tag_links',
+        on_delete=models.CASCADE
+    )
+    tag = models.ForeignKey(
+        Tag,
+        related_name='post_links',
+        on_delete=models.CASCADE
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['post', 'tag'], name='unique_post_tag'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=['tag', '-pub_date', '-id'], name='post_tag_feed_idx'
+            ),
+        )
+
+
+class Mention(models.Model):
+    """Упоминание пользователя через @имя в тексте поста."""
+    post = models.ForeignKey(
+        Post,
+        related_name='mentions',
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        User,
+        related_name='mentions',
+        on_delete=models.CASCADE,
+        verbose_name='Упомянутый'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+    seen = models.BooleanField('Просмотрено', default=False)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['post', 'user'], name='unique_mention'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=['user', '-pub_date', '-id'], name='mention_feed_idx'
+            ),
+            models.Index(fields=['user', 'seen'], name='mention_unseen_idx'),
         )
@@ -0,0 +1,95 @@
+"""Массовая модерация: действия админки и команды moderate.
+
+Каждая операция идёт порциями по MODERATION_BATCH_SIZE, каждая порция
+в своей транзакции. Кэши лент сбрасываются один раз в конце, а не
+сигналом на каждую строку. progress(сделано, всего) вызывается после
+каждой порции.
+
+Перенос и скрытие — UPDATE по списку id. purge_comments удаляет через
+обычный delete(): Django читает строки порции и их реакции, чтобы
+удалить зависимые строки.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import deletion, fresh, stamps
+from .models import Comment, Follow, Post
+
+
+def _batches(ids):
+    size = settings.MODERATION_BATCH_SIZE
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _run(ids, apply, progress=None):
+    """Применить apply к порциям ids. Возвращает число обработанных."""
+    done = 0
+    for batch in _batches(ids):
+        with transaction.atomic():
+            apply(batch)
+        done += len(batch)
+        if progress:
+            progress(done, len(ids))
+    return done
+
+
+def move_posts(posts, group, progress=None):
+    """Перенести посты в группу group (None — убрать из групп)."""
+    rows = list(posts.values_list('pk', 'author__username', 'group__slug'))
+    scopes = {stamps.INDEX}
+    for _, username, slug in rows:
+        scopes.add(stamps.author_scope(username))
+        if slug:
+            scopes.add(stamps.group_scope(slug))
+    if group is not None:
+        scopes.add(stamps.group_scope(group.slug))
+    now = timezone.now()
+    moved = _run(
+        [pk for pk, _, _ in rows],
+        # updated входит в ключ кэша карточки: на ней видна группа
+        lambda batch: Post.objects.filter(pk__in=batch).update(
+            group=group, updated=now
+        ),
+        progress
+    )
+    stamps.touch(scopes)
+    fresh.reset(scopes)
+    return moved
+
+
+def delete_content(authors, progress=None):
+    """Скрыть и поставить на удаление весь контент авторов.
+
+    Персонал не затрагивается. Порции и progress — по строкам постов и
+    комментариев, а не по авторам. Возвращает число авторов.
+    """
+    authors = [author for author in authors if not author.is_staff]
+    deletion.delete_content(authors, _batches, progress)
+    return len(authors)
+
+
+def purge_comments(comments, progress=None):
+    """Удалить комментарии выборки вместе с их реакциями."""
+    ids = list(comments.values_list('pk', flat=True))
+    return _run(
+        ids,
+        lambda batch: Comment.all_objects.filter(pk__in=batch).delete(),
+        progress
+    )
+
+
+def remove_follows(users, progress=None):
+    """Удалить подписки пользователей users на других авторов."""
+    user_ids = [user.pk for user in users]
+    ids = list(
+        Follow.objects.filter(user_id__in=user_ids)
+        .values_list('pk', flat=True)
+    )
+    removed = _run(
+        ids, lambda batch: Follow.objects.filter(pk__in=batch).delete(),
+        progress
+    )
+    fresh.forget_following(*user_ids)
+    return removed
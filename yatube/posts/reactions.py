@@ -0,0 +1,134 @@
+"""Реакции на посты и комментарии.
+
+Поставить и снять реакцию — идемпотентные операции: повторный запрос
+ничего не меняет и не трогает счётчики. Счётчики шардированы
+(см. ReactionCounter), а для страницы ленты состояние реакций
+загружается двумя запросами независимо от числа постов.
+"""
+import json
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Comment, Reaction, ReactionCounter
+
+KIND_LABELS = dict(Reaction.KINDS)
+
+
+def _target(obj):
+    if isinstance(obj, Comment):
+        return {'comment': obj}
+    return {'post': obj}
+
+
+def _adjust(target, kind, delta):
+    shard = random.randrange(settings.REACTION_COUNTER_SHARDS)
+    counters = ReactionCounter.objects.filter(kind=kind, shard=shard, **target)
+    if counters.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(
+                kind=kind, shard=shard, count=delta, **target
+            )
+    except IntegrityError:
+        counters.update(count=F('count') + delta)
+
+
+def react(user, obj, kind):
+    """Поставить реакцию. Возвращает True, если её ещё не было."""
+    target = _target(obj)
+    try:
+        with transaction.atomic():
+            Reaction.objects.create(user=user, kind=kind, **target)
+            _adjust(target, kind, 1)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unreact(user, obj, kind):
+    """Снять реакцию. Возвращает True, если она была."""
+    target = _target(obj)
+    with transaction.atomic():
+        deleted, _ = Reaction.objects.filter(
+            user=user, kind=kind, **target
+        ).delete()
+        if deleted:
+            _adjust(target, kind, -1)
+    return bool(deleted)
+
+
+def remove(reaction_ids):
+    """Удалить реакции пачкой и уменьшить счётчики на их число."""
+    with transaction.atomic():
+        reactions = Reaction.objects.filter(pk__in=reaction_ids)
+        for row in reactions.values('post_id', 'comment_id', 'kind').annotate(
+            total=Count('pk')
+        ):
+            if row['post_id']:
+                target = {'post_id': row['post_id']}
+            else:
+                target = {'comment_id': row['comment_id']}
+            _adjust(target, row['kind'], -row['total'])
+        return reactions.delete()[0]
+
+
+def _frozen(obj):
+    """Реакции архивного объекта: замороженные суммы, без запросов."""
+    counts = json.loads(obj.reactions)
+    return [
+        {
+            'kind': kind,
+            'label': label,
+            'count': counts.get(kind, 0),
+            'active': False,
+        }
+        for kind, label in Reaction.KINDS
+    ]
+
+
+def _summaries(objects, field, user):
+    objects = list(objects)
+    live = []
+    for obj in objects:
+        if obj.is_archived:
+            obj.reactions_summary = _frozen(obj)
+        else:
+            live.append(obj)
+    ids = [obj.pk for obj in live]
+    if not ids:
+        return objects
+    counts = {}
+    for row in ReactionCounter.objects.filter(
+        **{f'{field}_id__in': ids}
+    ).values(f'{field}_id', 'kind').annotate(total=Sum('count')):
+        counts[row[f'{field}_id'], row['kind']] = row['total']
+    mine = set()
+    if user.is_authenticated:
+        mine = set(Reaction.objects.filter(
+            user=user, **{f'{field}_id__in': ids}
+        ).values_list(f'{field}_id', 'kind'))
+    for obj in live:
+        obj.reactions_summary = [
+            {
+                'kind': kind,
+                'label': label,
+                'count': counts.get((obj.pk, kind), 0),
+                'active': (obj.pk, kind) in mine,
+            }
+            for kind, label in Reaction.KINDS
+        ]
+    return objects
+
+
+def attach_to_posts(posts, user):
+    """Счётчики и реакции пользователя для страницы постов: два запроса."""
+    return _summaries(posts, 'post', user)
+
+
+def attach_to_comments(comments, user):
+    """То же для комментариев поста."""
+    return _summaries(comments, 'comment', user)
@@ -0,0 +1,160 @@
+"""История правок постов с хранением разниц.
+
+История заводится при первой правке: версия 1 — исходный текст, дальше
+каждая правка — новая версия. Разница считается по словам (слово вместе
+с пробелами после него) и хранится в JSON списком операций над
+предыдущей версией:
+
+    5          — скопировать 5 слов
+    -2         — пропустить 2 слова
+    ["а ", …]  — вставить слова
+
+Каждая POST_REVISION_SNAPSHOT_EVERY-я версия хранит полный текст, поэтому
+для восстановления читается не больше этого числа строк одним запросом.
+"""
+import difflib
+import json
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+from .models import Post, PostRevision
+
+WORDS = re.compile(r'\s+|\S+\s*')
+
+
+def tokenize(text):
+    return WORDS.findall(text)
+
+
+def diff(old, new):
+    """Операции, превращающие текст old в new."""
+    a, b = tokenize(old), tokenize(new)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if tag in ('delete', 'replace'):
+            ops.append(i1 - i2)
+        if tag in ('insert', 'replace'):
+            ops.append(b[j1:j2])
+    return ops
+
+
+def patch(old, ops):
+    words = tokenize(old)
+    result = []
+    position = 0
+    for op in ops:
+        if isinstance(op, list):
+            result.extend(op)
+        elif op > 0:
+            result.extend(words[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(result)
+
+
+def _is_snapshot_number(number):
+    return (number - 1) % settings.POST_REVISION_SNAPSHOT_EVERY == 0
+
+
+def record(post, old_text, editor=None):
+    """Записать правку текста поста. Возвращает новую версию или None."""
+    if old_text == post.text:
+        return None
+    with transaction.atomic():
+        last = post.revisions.select_for_update().order_by(
+            '-number'
+        ).first()
+        if last is None:
+            last = PostRevision.objects.create(
+                post=post,
+                number=1,
+                is_snapshot=True,
+                data=old_text,
+                editor=post.author,
+                created=post.pub_date
+            )
+        number = last.number + 1
+        if _is_snapshot_number(number):
+            data, is_snapshot = post.text, True
+        else:
+            data = json.dumps(
+                diff(old_text, post.text),
+                ensure_ascii=False,
+                separators=(',', ':')
+            )
+            is_snapshot = False
+        return PostRevision.objects.create(
+            post=post,
+            number=number,
+            is_snapshot=is_snapshot,
+            data=data,
+            editor=editor
+        )
+
+
+def text_at(post, number):
+    """Текст поста в версии number или None, если такой версии нет.
+
+    Один запрос: ближайший снимок не новее number и разницы после него.
+    """
+    snapshot = PostRevision.objects.filter(
+        post=OuterRef('post'),
+        number__lte=number,
+        is_snapshot=True
+    ).order_by('-number').values('number')[:1]
+    chain = list(
+        post.revisions.filter(
+            number__lte=number,
+            number__gte=Subquery(snapshot)
+        ).order_by('number').values_list('number', 'is_snapshot', 'data')
+    )
+    if not chain or chain[-1][0] != number:
+        return None
+    text = chain[0][2]
+    for _, is_snapshot, data in chain[1:]:
+        text = data if is_snapshot else patch(text, json.loads(data))
+    return text
+
+
+def prune(post, keep, before=None):
+    """Удалить старые версии поста. Возвращает число удалённых.
+
+    Остаются последние keep версий и все версии не старше before.
+    Самая старая из оставшихся превращается в снимок, чтобы остальные
+    восстанавливались без удалённых.
+    """
+    rows = list(
+        post.revisions.order_by('-number').values_list('number', 'created')
+    )
+    kept = [
+        number for index, (number, created) in enumerate(rows)
+        if index < keep or (before is not None and created >= before)
+    ]
+    if len(kept) == len(rows):
+        return 0
+    oldest = min(kept)
+    with transaction.atomic():
+        post.revisions.filter(number=oldest).update(
+            is_snapshot=True, data=text_at(post, oldest)
+        )
+        return post.revisions.filter(number__lt=oldest).delete()[0]
+
+
+def prune_all(keep, before=None):
+    """prune для всех постов, у которых версий больше keep."""
+    posts = Post.objects.filter(
+        pk__in=PostRevision.objects.values('post').annotate(
+            total=Count('pk')
+        ).filter(total__gt=keep).values('post')
+    )
+    if before is not None:
+        posts = posts.filter(revisions__created__lt=before).distinct()
+    return sum(prune(post, keep, before) for post in posts.iterator())
@@ -0,0 +1,88 @@
+"""Полнотекстовый поиск по постам и комментариям для админки.
+
+В SQLite тексты индексируются таблицами FTS5 <таблица>_fts с внешним
+содержимым: индекс хранит только токены, а триггеры держат его в
+согласии с таблицей. Таблица и триггеры создаются после каждого
+migrate (install): SQLite пересоздаёт таблицу при изменении схемы и
+теряет её триггеры. В PostgreSQL поиск идёт через
+django.contrib.postgres.search, в остальных базах — icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post
+
+MODELS = (Post, Comment)
+
+TOKENS = re.compile(r'\w+')
+
+FTS_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+    "text, content='{table}', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+    "BEGIN INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+    "BEGIN INSERT INTO {fts}({fts}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF text "
+    "ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+)
+
+
+def _fts(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def install(using='default'):
+    """Создать индексы FTS5 и триггеры, если их нет (только SQLite)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for model in MODELS:
+            table, fts = model._meta.db_table, _fts(model)
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = %s", (fts,)
+            )
+            created = cursor.fetchone() is None
+            for sql in FTS_SQL:
+                cursor.execute(sql.format(table=table, fts=fts))
+            if created:
+                cursor.execute(
+                    f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+                )
+
+
+def match_query(term):
+    """Запрос FTS5: все слова, последнее — по префиксу; None, если слов нет.
+
+    Слова берутся в кавычки, поэтому операторы FTS5 в строке поиска не
+    работают и не ломают запрос.
+    """
+    words = TOKENS.findall(term)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def full_text(queryset, term):
+    """Отфильтровать выборку постов или комментариев по словам term."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        query = match_query(term)
+        if query is None:
+            return queryset.none()
+        fts = _fts(queryset.model)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (query,)
+        ))
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+        return queryset.annotate(
+            search=SearchVector('text')
+        ).filter(search=SearchQuery(term))
+    return queryset.filter(text__icontains=term)
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import duplicates, fresh, hashtags, markup, stamps, trending
+from .models import Comment, Follow, Post
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_scopes(sender, instance, **kwargs):
+    """При редактировании пост может уйти из прежней группы."""
+    instance._old_scopes = []
+    instance._old_text = None
+    if instance.pk:
+        old = Post.objects.for_feed().filter(pk=instance.pk).first()
+        if old:
+            instance._old_scopes = stamps.scopes_for(old)
+            instance._old_text = old.text
+
+
+@receiver(pre_save, sender=Post)
+def render_post_text(sender, instance, **kwargs):
+    """HTML текста считается при сохранении, а не при показе."""
+    if 'text_html' in instance.get_deferred_fields():
+        # строка из списка админки без HTML: save() запишет только
+        # загруженные поля, а текст там не редактируется
+        return
+    if (
+        instance.text != getattr(instance, '_old_text', None)
+        or instance.render_version != markup.VERSION
+    ):
+        markup.apply(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    scopes = stamps.scopes_for(instance)
+    old_scopes = getattr(instance, '_old_scopes', [])
+    stamps.touch(set(scopes + old_scopes))
+    moved = set(scopes) ^ set(old_scopes)
+    if moved and not created:
+        fresh.reset(moved)
+    if created:
+        transaction.on_commit(lambda: fresh.push(instance))
+        trending.bump_post(
+            instance.pk,
+            instance.group_id,
+            settings.TRENDING_WEIGHTS['post']
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_text_saved(sender, instance, **kwargs):
+    """Ключи дубликатов, теги и упоминания — только при смене текста."""
+    if instance.text != getattr(instance, '_old_text', None):
+        duplicates.fingerprint(instance)
+        hashtags.index_posts([instance])
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        group_id = Post.objects.filter(
+            pk=instance.post_id
+        ).values_list('group_id', flat=True).first()
+        trending.bump_post(
+            instance.post_id,
+            group_id,
+            settings.TRENDING_WEIGHTS['comment']
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Новый подписчик поднимает последний пост автора."""
+    fresh.forget_following(instance.user_id)
+    if not created:
+        return
+    latest = Post.objects.filter(
+        author_id=instance.author_id
+    ).values_list('pk', 'group_id').first()
+    if latest:
+        trending.bump_post(*latest, settings.TRENDING_WEIGHTS['follow'])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    fresh.forget_following(instance.user_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    scopes = stamps.scopes_for(instance)
+    stamps.touch(scopes)
+    fresh.reset(scopes)
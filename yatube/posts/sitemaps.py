@@ -0,0 +1,193 @@
+"""Карта сайта для поисковых роботов.
+
+Файлы строятся командой build_sitemaps заранее и отдаются как статика.
+Записи читаются постранично по первичному ключу (keyset), без OFFSET,
+и сразу пишутся в файл, поэтому память не зависит от числа постов.
+Каждый файл содержит не больше SITEMAP_URLS_PER_FILE адресов,
+sitemap.xml — индекс всех файлов.
+
+Архивные посты (posts.archive) открываются по тем же адресам и идут
+отдельным разделом. lastmod группы и профиля — последний живой пост,
+а если все посты уже в архиве — последний архивный.
+"""
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from .models import ArchivedPost, Group, Post, User
+
+INDEX_NAME = 'sitemap.xml'
+
+URLSET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_TAIL = '</urlset>\n'
+
+
+def keyset(queryset, chunk):
+    """Обойти values_list-выборку пачками по pk, первое поле — pk."""
+    last = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last).order_by('pk')[:chunk])
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][0]
+
+
+def _latest(field):
+    """Дата последнего живого или архивного поста для OuterRef('pk')."""
+    return Coalesce(*(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by('-pub_date').values('pub_date')[:1]
+        )
+        for model in (Post, ArchivedPost)
+    ))
+
+
+def _post_urls(posts, chunk):
+    for pk, pub_date, last_comment in keyset(posts, chunk):
+        url = reverse('posts:post_detail', kwargs={'post_id': pk})
+        yield url, max(filter(None, (pub_date, last_comment)))
+
+
+def post_entries(chunk):
+    return _post_urls(
+        Post.objects.values_list('pk', 'pub_date').annotate(
+            last_comment=Max(
+                'comments__created',
+                filter=Q(comments__deleted__isnull=True)
+            )
+        ),
+        chunk
+    )
+
+
+def archive_entries(chunk):
+    return _post_urls(
+        ArchivedPost.objects.values_list('pk', 'pub_date').annotate(
+            last_comment=Max('comments__created')
+        ),
+        chunk
+    )
+
+
+def profile_entries(chunk):
+    users = User.objects.filter(is_active=True).values_list(
+        'pk', 'username'
+    ).annotate(
+        latest=_latest('author')
+    ).filter(latest__isnull=False)
+    for _, username, latest in keyset(users, chunk):
+        yield reverse('posts:profile', kwargs={'username': username}), latest
+
+
+def group_entries(chunk):
+    groups = Group.objects.values_list('pk', 'slug').annotate(
+        latest=_latest('group')
+    )
+    for _, slug, latest in keyset(groups, chunk):
+        yield reverse('posts:group_list', kwargs={'slug': slug}), latest
+
+
+SECTIONS = (
+    ('posts', post_entries),
+    ('archive', archive_entries),
+    ('profiles', profile_entries),
+    ('groups', group_entries),
+)
+
+
+def _url_element(path, lastmod):
+    loc = escape(settings.SITE_URL + path)
+    if lastmod is None:
+        return f'<url><loc>{loc}</loc></url>\n'
+    return (
+        f'<url><loc>{loc}</loc>'
+        f'<lastmod>{lastmod.date().isoformat()}</lastmod></url>\n'
+    )
+
+
+class _SitemapFile:
+    def __init__(self, directory, name):
+        self.name = name
+        self.count = 0
+        self.lastmod = None
+        path = os.path.join(directory, name)
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(URLSET_HEAD)
+
+    def add(self, path, lastmod):
+        self.file.write(_url_element(path, lastmod))
+        self.count += 1
+        if lastmod and (self.lastmod is None or lastmod > self.lastmod):
+            self.lastmod = lastmod
+
+    def close(self):
+        self.file.write(URLSET_TAIL)
+        self.file.close()
+
+
+def _write_sections(directory, limit, chunk):
+    files = []
+    for section, entries in SECTIONS:
+        current = None
+        for path, lastmod in entries(chunk):
+            if current is None or current.count >= limit:
+                if current:
+                    current.close()
+                current = _SitemapFile(
+                    directory, f'sitemap-{section}-{len(files) + 1}.xml'
+                )
+                files.append(current)
+            current.add(path, lastmod)
+        if current:
+            current.close()
+    return files
+
+
+def _write_index(directory, files):
+    with open(os.path.join(directory, INDEX_NAME), 'w') as index:
+        index.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for sitemap in files:
+            loc = escape(f'{settings.SITE_URL}/sitemaps/{sitemap.name}')
+            index.write(f'<sitemap><loc>{loc}</loc>')
+            if sitemap.lastmod:
+                index.write(
+                    f'<lastmod>{sitemap.lastmod.isoformat()}</lastmod>'
+                )
+            index.write('</sitemap>\n')
+        index.write('</sitemapindex>\n')
+
+
+def build(root=None, limit=None, chunk=None):
+    """Построить карту сайта в root и вернуть список файлов.
+
+    Файлы пишутся во временный каталог и переносятся на место только
+    после успешной сборки, поэтому роботы не видят половину карты.
+    """
+    root = root or settings.SITEMAP_ROOT
+    limit = limit or settings.SITEMAP_URLS_PER_FILE
+    chunk = chunk or settings.SITEMAP_CHUNK_SIZE
+    os.makedirs(root, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=root) as tmp:
+        files = _write_sections(tmp, limit, chunk)
+        _write_index(tmp, files)
+        names = [sitemap.name for sitemap in files]
+        for name in names + [INDEX_NAME]:
+            os.replace(os.path.join(tmp, name), os.path.join(root, name))
+    for name in os.listdir(root):
+        if name.startswith('sitemap-') and name not in names:
+            os.remove(os.path.join(root, name))
+    return [INDEX_NAME] + names
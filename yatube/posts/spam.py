@@ -0,0 +1,142 @@
+"""Фильтр запрещённых фраз и ссылок для постов и комментариев.
+
+Все фразы из BannedPhrase собираются в один автомат Ахо — Корасик:
+проверка текста — один проход по его символам независимо от того,
+сколько фраз в списке. Автомат строится один раз на процесс и
+пересобирается, когда список правят в админке: не чаще раза в
+BANNED_PHRASES_RELOAD_INTERVAL секунд процесс сверяет отпечаток списка
+(число строк, последние id и время правки) — один лёгкий запрос.
+
+Текст и фразы сравниваются после нормализации: регистр, «ё» как «е»,
+любые пробелы как один. Фразы вида PHRASE совпадают только целыми
+словами, URL — любым вхождением.
+"""
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import BannedPhrase
+
+
+def normalize(text):
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def _is_boundary(text, index):
+    return (
+        index < 0 or index >= len(text)
+        or not (text[index].isalnum() or text[index] == '_')
+    )
+
+
+class Matcher:
+    """Автомат Ахо — Корасик по нормализованным фразам.
+
+    patterns — пары (фраза, только_целым_словом).
+    """
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for phrase, whole_word in patterns:
+            phrase = normalize(phrase)
+            if phrase:
+                self._add(phrase, whole_word)
+        self._link()
+
+    def __len__(self):
+        return len(self.goto)
+
+    def _add(self, phrase, whole_word):
+        state = 0
+        for char in phrase:
+            following = self.goto[state].get(char)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][char] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            state = following
+        self.out[state] += ((phrase, whole_word),)
+
+    def _link(self):
+        """Ссылки неудач обходом в ширину."""
+        goto, fail, out = self.goto, self.fail, self.out
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in goto[state].items():
+                queue.append(following)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[following] = goto[link].get(char, 0)
+                out[following] += out[fail[following]]
+        self.delta = [dict(row) for row in goto]
+
+    def find(self, text):
+        """Первая найденная в тексте фраза или None.
+
+        Переходы с учётом ссылок неудач запоминаются в delta, поэтому
+        на повторяющихся парах (состояние, символ) цепочка неудач не
+        проходится заново.
+        """
+        text = normalize(text)
+        goto, fail, out, delta = self.goto, self.fail, self.out, self.delta
+        state = 0
+        for index, char in enumerate(text):
+            row = delta[state]
+            following = row.get(char)
+            if following is None:
+                link = state
+                while link and char not in goto[link]:
+                    link = fail[link]
+                following = row[char] = goto[link].get(char, 0)
+            state = following
+            for phrase, whole_word in out[state]:
+                if not whole_word or (
+                    _is_boundary(text, index - len(phrase))
+                    and _is_boundary(text, index + 1)
+                ):
+                    return phrase
+        return None
+
+
+_current = {'version': None, 'matcher': None, 'checked': float('-inf')}
+
+
+def _version():
+    return tuple(BannedPhrase.objects.aggregate(
+        count=Count('pk'), last=Max('pk'), updated=Max('updated')
+    ).values())
+
+
+def matcher():
+    """Автомат по действующему списку фраз, пересобранный при изменениях."""
+    now = time.monotonic()
+    if now - _current['checked'] >= settings.BANNED_PHRASES_RELOAD_INTERVAL:
+        version = _version()
+        if version != _current['version'] or _current['matcher'] is None:
+            patterns = BannedPhrase.objects.filter(
+                is_active=True
+            ).values_list('phrase', 'kind')
+            _current['matcher'] = Matcher(
+                (phrase, kind == BannedPhrase.PHRASE)
+                for phrase, kind in patterns
+            )
+            _current['version'] = version
+        _current['checked'] = now
+    return _current['matcher']
+
+
+def reload():
+    """Пересобрать автомат при следующей проверке."""
+    _current.update(version=None, matcher=None, checked=float('-inf'))
+
+
+def find(text):
+    """Запрещённая фраза, найденная в тексте, или None."""
+    return matcher().find(text)
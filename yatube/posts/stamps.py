@@ -0,0 +1,60 @@
+"""Метки последнего изменения лент.
+
+Для каждой ленты (общей, группы, автора) в кэше хранится время последнего
+изменения её постов. Метка обновляется сигналами при сохранении и удалении
+поста, а при вытеснении из кэша восстанавливается одним запросом.
+Без общего кэша метка живёт INVALIDATED_CACHE_TIMEOUT секунд: изменение
+в одном процессе другие увидят, когда их копия истечёт.
+Метки служат ключами кэша готовых RSS/Atom и значениями ETag/Last-Modified.
+"""
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Post
+from .utils import cache_timeout
+
+INDEX = 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def scopes_for(post):
+    scopes = [INDEX, author_scope(post.author.username)]
+    if post.group_id:
+        scopes.append(group_scope(post.group.slug))
+    return scopes
+
+
+def _key(scope):
+    return f'stamp:{scope}'
+
+
+def _from_db(scope):
+    posts = Post.objects.all()
+    if scope.startswith('group:'):
+        posts = posts.filter(group__slug=scope[len('group:'):])
+    elif scope.startswith('author:'):
+        posts = posts.filter(author__username=scope[len('author:'):])
+    latest = posts.aggregate(latest=Max('pub_date'))['latest']
+    return latest.timestamp() if latest else 0.0
+
+
+def get(scope):
+    """Время последнего изменения ленты в секундах (0 — лента пуста)."""
+    stamp = cache.get(_key(scope))
+    if stamp is None:
+        stamp = _from_db(scope)
+        cache.set(_key(scope), stamp, cache_timeout(empty=not stamp))
+    return stamp
+
+
+def touch(scopes):
+    now = timezone.now().timestamp()
+    cache.set_many({_key(scope): now for scope in scopes}, cache_timeout())
@@ -0,0 +1,60 @@
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from tasks.queue import enqueue, task
+
+from . import deletion, images, markup
+from .models import ArchivedPost, Post
+
+# те же параметры, что у {% thumbnail %} в шаблонах лент
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+RENDER_MODELS = {'post': Post, 'archived': ArchivedPost}
+
+
+@task
+def warm_thumbnails(post_id):
+    """Заранее построить миниатюру картинки поста вне запроса."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task
+def hash_image(post_id):
+    """Посчитать перцептивный хэш картинки поста для поиска копий."""
+    images.hash_post(post_id)
+
+
+@task
+def purge_post(post_id):
+    """Удалить помеченный пост с комментариями и картинкой."""
+    deletion.purge_post(post_id)
+
+
+@task
+def purge_account(user_id):
+    """Удалить контент отключённого аккаунта порциями и сам аккаунт."""
+    deletion.purge_account(user_id)
+
+
+@task
+def purge_content(user_id):
+    """Удалить скрытый модератором контент автора."""
+    deletion.purge_content(user_id)
+
+
+@task
+def render_posts(model='post', after=0):
+    """Перерисовать порцию постов со старой версией разметки.
+
+    Каждая порция — отдельная задача: следующая ставится в очередь
+    после текущей, после постов — архивные.
+    """
+    last = markup.render_outdated(
+        RENDER_MODELS[model], after, settings.RENDER_BATCH_SIZE
+    )
+    if last is not None:
+        enqueue(render_posts, args=(model, last))
+    elif model == 'post':
+        enqueue(render_posts, args=('archived', 0))
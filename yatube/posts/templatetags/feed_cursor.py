@@ -0,0 +1,19 @@
+from django import template
+
+from posts.utils import make_cursor
+
+register = template.Library()
+
+
+@register.filter
+def next_cursor(page):
+    """Курсор для подгрузки постов после страницы или пустая строка."""
+    if not page.has_next():
+        return ''
+    return make_cursor(page[-1])
+
+
+@register.filter
+def first_cursor(page):
+    """Курсор первого поста страницы: от него считаются новые посты."""
+    return make_cursor(page[0]) if page else ''
@@ -0,0 +1,10 @@
+from django import template
+
+from posts.hashtags import unseen_count
+
+register = template.Library()
+
+
+@register.simple_tag
+def unseen_mentions(user):
+    return unseen_count(user.pk) if user.is_authenticated else 0
@@ -0,0 +1,31 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from posts import markup
+
+register = template.Library()
+
+
+@register.filter
+def rendered(post):
+    """HTML текста поста; ещё не размеченный пост размечается на месте."""
+    if post.text_html:
+        return mark_safe(post.text_html)
+    return mark_safe(markup.render(post.text))
+
+
+@register.filter
+def excerpt(post):
+    """Начало текста поста для списков.
+
+    Полный текст в списках не загружается, поэтому у поста без
+    начала (ещё не прошёл render_posts) — только ссылка на него.
+    """
+    if post.excerpt_html:
+        return mark_safe(post.excerpt_html)
+    return format_html(
+        '<p><a href="{}">Открыть запись</a></p>',
+        reverse('posts:post_detail', args=(post.pk,))
+    )
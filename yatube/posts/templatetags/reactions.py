@@ -0,0 +1,20 @@
+from django import template
+from django.db import models
+
+from posts.reactions import attach_to_comments, attach_to_posts
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def reactions_for(context, objects, target='post'):
+    """Список объектов с реакциями, загруженными двумя запросами.
+
+    Вызывается из шаблона, поэтому внутри закэшированного фрагмента
+    запросы не выполняются. Для одного объекта возвращает его же.
+    """
+    user = context['user']
+    attach = attach_to_comments if target == 'comment' else attach_to_posts
+    if isinstance(objects, models.Model):
+        return attach([objects], user)[0]
+    return attach(objects, user)
@@ -0,0 +1,10 @@
+from django import template
+
+from posts.trending import trending_groups
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/trending_sidebar.html')
+def trending_sidebar():
+    return {'groups': trending_groups()}
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from posts import search
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group_{number}',
+                description='Описание'
+            )
+            for number in range(30)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response
+
+    def test_group_select_is_not_rendered(self):
+        """Группа в списке постов — автодополнение, а не список всех групп"""
+        Post.objects.create(
+            author=self.admin, text='Пост', group=self.groups[0]
+        )
+        _, response = self.queries(reverse('admin:posts_post_changelist'))
+        self.assertNotContains(response, self.groups[-1].title)
+
+    def test_post_list_skips_html(self):
+        """Список постов не загружает HTML текста"""
+        Post.objects.create(author=self.admin, text='**Жирный** пост')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, '**Жирный** пост')
+        select = next(
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "posts_post"."id"')
+        )
+        self.assertNotIn('text_html', select)
+        self.assertNotIn('excerpt_html', select)
+
+    def test_list_edit_keeps_html(self):
+        """Смена группы из списка не портит HTML текста"""
+        post = Post.objects.create(author=self.admin, text='**Жирный** пост')
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'), {
+                'form-TOTAL_FORMS': 1,
+                'form-INITIAL_FORMS': 1,
+                'form-0-id': post.pk,
+                'form-0-group': self.groups[0].pk,
+                '_save': 'Сохранить',
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.groups[0])
+        self.assertIn('<strong>', post.text_html)
+
+    def test_comment_queries_do_not_grow(self):
+        """Число запросов списка комментариев не зависит от числа строк"""
+        post = Post.objects.create(author=self.admin, text='Пост')
+        url = reverse('admin:posts_comment_changelist')
+        Comment.objects.create(post=post, author=self.admin, text='Один')
+        self.queries(url)
+        few, _ = self.queries(url)
+        for number in range(20):
+            Comment.objects.create(
+                post=post, author=self.admin, text=f'Ответ {number}'
+            )
+        many, response = self.queries(url)
+        self.assertEqual(few, many)
+        self.assertContains(response, 'Пост')
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=10)
+    def test_estimated_count(self):
+        """Без фильтров число строк берётся из статистики базы"""
+        for number in range(3):
+            Post.objects.create(author=self.admin, text=f'Пост {number}')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute(
+                "UPDATE sqlite_stat1 SET stat = '1000000' "
+                "WHERE tbl = 'posts_post'"
+            )
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+        self.assertEqual(paginator.count, 1000000)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(text='Пост 1'), 100
+        )
+        self.assertEqual(filtered.count, 1)
+        _, response = self.queries(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.context['cl'].result_count, 1000000)
+
+    def test_full_text_search(self):
+        """Поиск по словам с префиксом, индекс следит за правками"""
+        post = Post.objects.create(
+            author=self.admin, text='Лиса прыгает через забор'
+        )
+        Post.objects.create(author=self.admin, text='Кот спит')
+        found = search.full_text(Post.objects.all(), 'ЛИСА заб')
+        self.assertEqual(list(found), [post])
+        post.text = 'Собака лает'
+        post.save()
+        self.assertFalse(search.full_text(Post.objects.all(), 'лиса'))
+        self.assertFalse(search.full_text(Post.objects.all(), '" OR *'))
+        _, response = self.queries(
+            reverse('admin:posts_post_changelist'), q='собака'
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+        post.delete()
+        self.assertFalse(search.full_text(Post.objects.all(), 'собака'))
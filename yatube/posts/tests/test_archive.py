@@ -0,0 +1,148 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import hashtags, reactions
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Mention, Post, PostTag
+)
+from posts.utils import Chain
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.old = []
+        for number in range(5):
+            post = Post.objects.create(
+                author=self.user,
+                text=f'Старый пост {number}',
+                group=self.group
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=100 - number)
+            )
+            self.old.append(post)
+        self.comment = Comment.objects.create(
+            post=self.old[0], author=self.reader, text='Старый комментарий'
+        )
+        reactions.react(self.reader, self.old[0], 'like')
+        reactions.react(self.reader, self.comment, 'love')
+        self.fresh = [
+            Post.objects.create(author=self.user, text=f'Свежий пост {number}')
+            for number in range(3)
+        ]
+        self.client = Client()
+
+    def archive(self):
+        call_command('archive_posts', days=30, batch=2, stdout=StringIO())
+
+    def test_old_posts_move_with_comments(self):
+        """Старые посты переезжают в архив с теми же id и комментариями"""
+        self.archive()
+        self.assertEqual(
+            set(Post.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.fresh}
+        )
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old}
+        )
+        archived = ArchivedPost.objects.get(pk=self.old[0].pk)
+        self.assertEqual(archived.group, self.group)
+        self.assertEqual(json.loads(archived.reactions), {'like': 1})
+        comment = ArchivedComment.objects.get(pk=self.comment.pk)
+        self.assertEqual(comment.post, archived)
+        self.assertEqual(json.loads(comment.reactions), {'love': 1})
+        self.assertFalse(Comment.objects.exists())
+
+    def test_links_are_not_archived(self):
+        """Теги и упоминания архивных постов удаляются, счётчик сброшен"""
+        post = Post.objects.get(pk=self.old[0].pk)
+        post.text = '#старое для @reader'
+        post.save()
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 1)
+        self.archive()
+        self.assertFalse(PostTag.objects.filter(post_id=post.pk).exists())
+        self.assertFalse(Mention.objects.filter(post_id=post.pk).exists())
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 0)
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Архивный пост открывается по старому адресу только для чтения"""
+        self.archive()
+        self.client.force_login(self.reader)
+        post = self.old[0]
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, 'Старый пост 0')
+        self.assertContains(response, 'Старый комментарий')
+        self.assertContains(response, 'Пост в архиве')
+        self.assertEqual(response.context['count'], 8)
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=(post.pk,))
+        )
+        self.assertNotContains(
+            response, reverse('posts:post_react', args=(post.pk, 'like'))
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(10 ** 6,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_chains_hot_and_archive(self):
+        """Профиль листает горячие посты, затем архивные"""
+        self.archive()
+        response = self.client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        self.assertEqual(response.context['count'], 8)
+        texts = [post.text for post in response.context['page_obj']]
+        self.assertEqual(
+            texts,
+            [f'Свежий пост {number}' for number in (2, 1, 0)]
+            + [f'Старый пост {number}' for number in (4, 3, 2, 1, 0)]
+        )
+
+    def test_profile_fragment_continues_into_archive(self):
+        """Подгрузка профиля после горячих постов переходит в архив"""
+        self.archive()
+        url = reverse('posts:profile_fragment', args=(self.user.username,))
+        html = self.client.get(url).json()['html']
+        self.assertIn('Свежий пост 0', html)
+        self.assertIn('Старый пост 0', html)
+
+    def test_chain_slices(self):
+        """Срез цепочки выборок захватывает обе части"""
+        chain = Chain(
+            Post.objects.order_by('pk'),
+            Post.objects.none(),
+            Post.objects.order_by('-pk')
+        )
+        self.assertEqual(len(chain), 16)
+        ids = sorted(Post.objects.values_list('pk', flat=True))
+        self.assertEqual(
+            [post.pk for post in chain[6:10]], ids[6:] + ids[::-1][:2]
+        )
+        self.assertEqual(chain[20:30], [])
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import ViewCounter, view_counter, write
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        view_counter.flush()
+        self.counter = ViewCounter(interval=float('inf'))
+
+    def test_hits_are_buffered(self):
+        """Просмотры копятся в памяти до сброса"""
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.counter.hit(self.posts[0].pk)
+        self.assertEqual(self.counter.pending(self.posts[0].pk), 5)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 0)
+
+    def test_flush_is_one_update(self):
+        """Сброс записывает все посты одним запросом"""
+        for number, post in enumerate(self.posts, start=1):
+            for _ in range(number):
+                self.counter.hit(post.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.counter.flush(), len(self.posts))
+        views = dict(Post.objects.values_list('pk', 'views'))
+        for number, post in enumerate(self.posts, start=1):
+            with self.subTest(post=post.pk):
+                self.assertEqual(views[post.pk], number)
+        self.assertEqual(self.counter.pending(self.posts[0].pk), 0)
+
+    def test_failed_flush_keeps_views(self):
+        """Ошибка записи не выходит из hit, просмотры остаются в буфере"""
+        counter = ViewCounter(interval=0)
+        with mock.patch(
+            'posts.counters.write',
+            side_effect=OperationalError('database is locked')
+        ), self.assertLogs('posts.counters', 'ERROR'):
+            counter.hit(self.posts[0].pk)
+        self.assertEqual(counter.pending(self.posts[0].pk), 1)
+        counter.flush()
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 1)
+
+    def test_failed_chunk_rolls_back_batch(self):
+        """Ошибка во второй пачке не записывает первую дважды"""
+        for post in self.posts:
+            self.counter.hit(post.pk)
+        calls = []
+
+        def fail_second(items):
+            calls.append(items)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+            write(items)
+
+        with mock.patch('posts.counters.FLUSH_CHUNK', 2), \
+                mock.patch('posts.counters.write', fail_second):
+            with self.assertRaises(OperationalError):
+                self.counter.flush()
+        self.counter.flush()
+        self.assertEqual(
+            set(Post.objects.values_list('views', flat=True)), {1}
+        )
+
+    def test_post_detail_shows_pending_views(self):
+        """Страница поста учитывает ещё не записанные просмотры"""
+        post = self.posts[0]
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        client = Client()
+        client.get(url)
+        response = client.get(url)
+        self.assertEqual(response.context['views'], 2)
+        view_counter.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.views, 2)
+
+    def test_benchmark_command(self):
+        """Бенчмарк не меняет данные в базе"""
+        call_command(
+            'bench_view_counter', hits=100, posts=3,
+            stdout=open('/dev/null', 'w')
+        )
+        self.assertFalse(Post.objects.filter(views__gt=0).exists())
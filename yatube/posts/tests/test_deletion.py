@@ -0,0 +1,188 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from posts import deletion, reactions
+from posts.models import (
+    Comment, Follow, Group, Post, PostRevision, Reaction, ReactionCounter
+)
+from tasks.models import Task
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, DELETION_BATCH_SIZE=2)
+class DeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', password='Passw0rd-1'
+        )
+        self.other = User.objects.create_user(username='other')
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            group=self.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+        self.others_post = Post.objects.create(
+            author=self.other, text='Чужой пост'
+        )
+        for number in range(3):
+            Comment.objects.create(
+                post=self.post, author=self.other, text=f'Ответ {number}'
+            )
+        self.own_comment = Comment.objects.create(
+            post=self.others_post, author=self.user, text='Мой комментарий'
+        )
+        reactions.react(self.other, self.post, 'like')
+        reactions.react(self.user, self.others_post, 'love')
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def image_path(self):
+        return os.path.join(TEMP_MEDIA_ROOT, self.post.image.name)
+
+    def test_post_disappears_at_once(self):
+        """Удалённый пост сразу пропадает из лент и страниц"""
+        url = reverse('posts:post_delete', args=(self.post.pk,))
+        self.assertContains(self.client.get(url), 'Удалить запись?')
+        response = self.client.post(url)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(self.user.username,))
+        )
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'Пост с картинкой'
+        )
+        self.assertNotIn(
+            'Пост с картинкой',
+            self.client.get(reverse('posts:index_fragment')).json()['html']
+        )
+        self.assertNotContains(
+            self.client.get(
+                reverse('posts:group_list', args=(self.group.slug,))
+            ),
+            'Пост с картинкой'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+
+    def test_only_author_deletes(self):
+        other = Client()
+        other.force_login(self.other)
+        response = other.post(
+            reverse('posts:post_delete', args=(self.post.pk,))
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_purge_post(self):
+        """Фоновая часть удаляет комментарии, реакции, версии и картинку"""
+        PostRevision.objects.create(
+            post=self.post, number=1, is_snapshot=True, data='Старый текст'
+        )
+        self.assertTrue(os.path.exists(self.image_path()))
+        deletion.delete_post(self.post)
+        deletion.purge_post(self.post.pk)
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(post=self.post).exists())
+        self.assertFalse(Reaction.objects.filter(post=self.post).exists())
+        self.assertFalse(os.path.exists(self.image_path()))
+
+    def test_delete_account(self):
+        """Аккаунт отключается, его контент сразу пропадает"""
+        url = reverse('users:delete_account')
+        response = self.client.post(url, {'password': 'wrong'})
+        self.assertFormError(response, 'form', 'password', 'Неверный пароль')
+        response = self.client.post(url, {'password': 'Passw0rd-1'})
+        self.assertRedirects(response, reverse('posts:index'))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(
+            self.client.get(reverse('posts:index')).context['user']
+            .is_authenticated
+        )
+        response = self.client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.others_post.pk,))
+        )
+        self.assertNotContains(response, 'Мой комментарий')
+
+    def test_purge_account(self):
+        """Контент аккаунта удаляется порциями, счётчики остаются верными"""
+        deletion.delete_account(self.user)
+        deletion.purge_account(self.user.pk)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.all_objects.filter(author=self.user).exists())
+        self.assertFalse(Comment.all_objects.filter(post=self.post).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(os.path.exists(self.image_path()))
+        self.assertEqual(
+            sum(ReactionCounter.objects.filter(
+                post=self.others_post
+            ).values_list('count', flat=True)),
+            0
+        )
+
+
+class DeletionQueueTests(TransactionTestCase):
+    def test_worker_purges_deleted_post(self):
+        """Удаление ставит задачу, исполнитель удаляет строки"""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        Comment.objects.create(post=post, author=user, text='Ответ')
+        client = Client()
+        client.force_login(user)
+        client.post(reverse('posts:post_delete', args=(post.pk,)))
+        self.assertEqual(
+            Task.objects.get().name, 'posts.tasks.purge_post'
+        )
+        # один поток: тестовая SQLite в памяти блокирует таблицу целиком
+        call_command(
+            'run_tasks', once=True, concurrency=1, stdout=open(os.devnull, 'w')
+        )
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.all_objects.exists())
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import digests
+from posts.models import DigestSubscription, Follow, Post
+
+User = get_user_model()
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{number}', email=f'reader{number}@mail.ru'
+            )
+            for number in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        Follow.objects.create(user=cls.readers[0], author=cls.other)
+
+    def setUp(self):
+        self.week_ago = timezone.now() - timedelta(days=7)
+        self.old = Post.objects.create(author=self.author, text='Старый пост')
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=self.week_ago - timedelta(days=1)
+        )
+        self.new = Post.objects.create(author=self.author, text='Новый пост')
+        self.other_post = Post.objects.create(
+            author=self.other, text='Пост другого автора'
+        )
+        for reader in self.readers[:2]:
+            DigestSubscription.objects.create(
+                user=reader, last_sent=self.week_ago
+            )
+
+    def test_digest_contains_new_posts_of_followed_authors(self):
+        """Сводка — одно письмо с новыми постами всех авторов"""
+        self.assertEqual(digests.send_digests(DigestSubscription.DAILY), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        by_address = {message.to[0]: message for message in mail.outbox}
+        first = by_address['reader0@mail.ru']
+        self.assertIn('Новый пост', first.body)
+        self.assertIn('Пост другого автора', first.body)
+        self.assertNotIn('Старый пост', first.body)
+        self.assertIn('Новый пост', first.alternatives[0][0])
+        second = by_address['reader1@mail.ru']
+        self.assertNotIn('Пост другого автора', second.body)
+
+    def test_not_subscribed_and_not_due(self):
+        """Без подписки и до срока письма не отправляются"""
+        DigestSubscription.objects.filter(user=self.readers[1]).update(
+            frequency=DigestSubscription.WEEKLY,
+            last_sent=timezone.now() - timedelta(days=2)
+        )
+        digests.send_digests(DigestSubscription.DAILY)
+        digests.send_digests(DigestSubscription.WEEKLY)
+        self.assertEqual(
+            [message.to for message in mail.outbox], [['reader0@mail.ru']]
+        )
+
+    def test_second_run_sends_nothing(self):
+        """После отправки окно сдвигается, повторный запуск пуст"""
+        digests.send_digests(DigestSubscription.DAILY)
+        mail.outbox.clear()
+        self.assertEqual(digests.send_digests(DigestSubscription.DAILY), 0)
+        self.assertEqual(
+            digests.send_digests(
+                DigestSubscription.DAILY,
+                now=timezone.now() + timedelta(days=2)
+            ),
+            0
+        )
+        self.assertEqual(mail.outbox, [])
+
+    def test_rendered_once_per_post_set(self):
+        """Одинаковые сводки рендерятся один раз на вариант шаблона"""
+        DigestSubscription.objects.create(
+            user=self.readers[2], last_sent=self.week_ago
+        )
+        with mock.patch(
+            'posts.digests.render_to_string',
+            wraps=digests.render_to_string
+        ) as render:
+            digests.send_digests(DigestSubscription.DAILY, batch=10)
+        self.assertEqual(len(mail.outbox), 3)
+        # reader0 видит два автора, reader1 и reader2 — одинаковое письмо
+        self.assertEqual(render.call_count, 4)
+
+    def test_batches_use_one_connection(self):
+        """Пачки подписок отправляются через одно соединение"""
+        with mock.patch(
+            'posts.digests.get_connection',
+            wraps=digests.get_connection
+        ) as get_connection:
+            sent = digests.send_digests(DigestSubscription.DAILY, batch=1)
+        self.assertEqual(sent, 2)
+        self.assertEqual(get_connection.call_count, 1)
+
+    def test_settings_page(self):
+        """Подписка включается, меняется и отключается со страницы"""
+        client = Client()
+        client.force_login(self.readers[2])
+        url = reverse('posts:digest')
+        self.assertEqual(client.get(url).status_code, 200)
+        client.post(url, {'frequency': DigestSubscription.WEEKLY})
+        self.assertEqual(
+            DigestSubscription.objects.get(user=self.readers[2]).frequency,
+            DigestSubscription.WEEKLY
+        )
+        client.post(url, {'unsubscribe': '1'})
+        self.assertFalse(
+            DigestSubscription.objects.filter(user=self.readers[2]).exists()
+        )
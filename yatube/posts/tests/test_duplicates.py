@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import deletion, duplicates
+from posts.models import Post, PostFingerprint
+
+User = get_user_model()
+SPAM = (
+    'Только сегодня дарим подарки всем кто перейдёт по ссылке '
+    'в профиле и оставит свой номер телефона'
+)
+EDITED = (
+    'Только сегодня дарим подарки всем, кто перейдёт по ссылке '
+    'в профиле и оставит номер телефона!'
+)
+OTHER = (
+    'Сегодня гуляли в парке с собакой, погода была отличная '
+    'и листья уже совсем пожелтели'
+)
+
+
+class DuplicateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.spammer = User.objects.create_user(username='spammer')
+
+    def setUp(self):
+        self.post = Post.objects.create(author=self.user, text=SPAM)
+        self.client = Client()
+        self.client.force_login(self.spammer)
+
+    def test_find(self):
+        """Правка в пару слов находится, другой текст — нет"""
+        self.assertEqual(
+            PostFingerprint.objects.filter(post=self.post).count(),
+            duplicates.BANDS
+        )
+        with self.assertNumQueries(1):
+            found = duplicates.find(EDITED)
+        self.assertEqual([post for post, _ in found], [self.post])
+        self.assertGreaterEqual(found[0][1], 0.5)
+        self.assertEqual(duplicates.find(OTHER), [])
+        self.assertEqual(duplicates.find(SPAM, exclude=self.post.pk), [])
+
+    def test_short_texts_are_not_checked(self):
+        Post.objects.create(author=self.user, text='Всем привет')
+        self.assertEqual(duplicates.find('Всем привет!'), [])
+        self.assertFalse(
+            PostFingerprint.objects.filter(post__text='Всем привет').exists()
+        )
+
+    def test_edit_and_delete(self):
+        """Ключи следуют за текстом, удалённые посты не находятся"""
+        self.post.text = OTHER
+        self.post.save()
+        self.assertEqual(duplicates.find(EDITED), [])
+        self.assertEqual(
+            [post for post, _ in duplicates.find(OTHER)], [self.post]
+        )
+        deletion.delete_post(self.post)
+        self.assertEqual(duplicates.find(OTHER), [])
+
+    def test_create_blocks_duplicate(self):
+        url = reverse('posts:post_create')
+        response = self.client.post(url, {'text': EDITED})
+        self.assertFormError(
+            response, 'form', 'text',
+            'Такой или очень похожий пост уже опубликован'
+        )
+        self.client.post(url, {'text': OTHER})
+        self.assertTrue(Post.objects.filter(author=self.spammer).exists())
+
+    def test_edit_own_post(self):
+        """Правка собственного поста не считается дублем его же"""
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': EDITED}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, EDITED)
+
+    def test_report(self):
+        """Отчёт собирает группы, backfill досчитывает старые посты"""
+        copy = Post.objects.create(author=self.spammer, text=EDITED)
+        Post.objects.create(author=self.spammer, text=OTHER)
+        PostFingerprint.objects.filter(post=copy).delete()
+        self.assertEqual(duplicates.report(100), [])
+        out = StringIO()
+        call_command('find_duplicates', backfill=True, stdout=out)
+        self.assertIn('Посчитаны ключи постов: 1', out.getvalue())
+        self.assertIn('Групп почти-дубликатов: 1', out.getvalue())
+        self.assertIn(
+            f'2: {self.post.pk} (auth), {copy.pk} (spammer)', out.getvalue()
+        )
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import markup
+from posts.models import Post
+
+User = get_user_model()
+LONG = ' '.join(f'слово{number}' for number in range(30))
+
+
+@override_settings(EXCERPT_WORDS=10, EXCERPT_CHARS=600)
+class ExcerptTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_excerpt(self):
+        """Начало обрезается по словам, открытые теги закрываются"""
+        post = Post.objects.create(author=self.user, text=f'**{LONG}**')
+        self.assertTrue(post.excerpt_truncated)
+        self.assertEqual(
+            post.excerpt_html,
+            '<p><strong>' + ' '.join(
+                f'слово{number}' for number in range(10)
+            ) + '…</strong></p>'
+        )
+        short = Post.objects.create(author=self.user, text='Коротко')
+        self.assertFalse(short.excerpt_truncated)
+        self.assertEqual(short.excerpt_html, short.text_html)
+        with self.settings(EXCERPT_WORDS=100, EXCERPT_CHARS=20):
+            html, truncated = markup.excerpt(markup.render(LONG))
+        self.assertTrue(truncated)
+        self.assertLessEqual(len(html), len('<p></p>') + 20)
+
+    def test_lists_skip_full_text(self):
+        """Ленты не загружают полный текст и ведут на пост"""
+        post = Post.objects.create(author=self.user, text=LONG)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:index'))
+        selects = [
+            query['sql'] for query in context
+            if 'FROM "posts_post"' in query['sql']
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn('"posts_post"."text"', sql)
+        self.assertContains(response, 'слово9…')
+        self.assertNotContains(response, 'слово29')
+        self.assertContains(response, 'Читать дальше')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, 'слово29')
+
+    def test_deferred_fields_are_not_loaded(self):
+        """Число запросов ленты не растёт с числом постов"""
+        def queries(url):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+            return len(context)
+
+        Post.objects.create(author=self.user, text='Один')
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        few = [queries(url) for url in urls]
+        for number in range(5):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        self.assertEqual([queries(url) for url in urls], few)
+
+    def test_backfill(self):
+        """Старые посты получают начало текста через render_posts"""
+        post = Post.objects.create(author=self.user, text=LONG)
+        Post.objects.update(
+            excerpt_html='', excerpt_truncated=False, render_version=1
+        )
+        call_command('render_posts', now=True, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.excerpt_truncated)
+        self.assertIn('слово9…', post.excerpt_html)
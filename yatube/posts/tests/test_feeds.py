@@ -0,0 +1,129 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import stamps
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост для ленты',
+            group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:feed_rss'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_rss', kwargs={'slug': cls.group.slug}),
+            reverse('posts:group_atom', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile_rss', kwargs={'username': 'auth'}),
+            reverse('posts:profile_atom', kwargs={'username': 'auth'}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_contain_post(self):
+        """Все ленты отдают XML с постом"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('xml', response['Content-Type'])
+                self.assertIn(self.post.text, response.content.decode())
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_unknown_group_and_author(self):
+        """Лента несуществующей группы или автора — 404"""
+        for url in (
+            reverse('posts:group_rss', kwargs={'slug': 'nope'}),
+            reverse('posts:profile_atom', kwargs={'username': 'nope'}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_conditional_get(self):
+        """Повторный опрос с ETag получает 304 без запросов к базе"""
+        url = reverse('posts:feed_atom')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_cached_xml(self):
+        """XML берётся из кэша, пока лента не изменилась"""
+        url = reverse('posts:group_rss', kwargs={'slug': self.group.slug})
+        self.client.get(url)
+        # остаётся только проверка, что группа существует
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_unknown_group_is_not_modified(self):
+        """Условный GET несуществующей ленты — 404, а не 304"""
+        url = reverse('posts:group_rss', kwargs={'slug': 'nope'})
+        etag = self.client.get(
+            reverse('posts:group_rss', kwargs={'slug': self.group.slug})
+        )['ETag']
+        for _ in range(2):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=(
+                    'Thu, 01 Jan 2037 00:00:00 GMT'
+                )
+            )
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertIsNone(cache.get('stamp:group:nope'))
+
+    def test_stamps_expire_without_shared_cache(self):
+        """В кэше процесса метки живут INVALIDATED_CACHE_TIMEOUT"""
+        self.assertFalse(settings.SHARED_CACHE)
+        with mock.patch.object(stamps.cache, 'set') as cache_set:
+            stamps.get(stamps.INDEX)
+        cache_set.assert_called_once_with(
+            'stamp:index', mock.ANY, settings.INVALIDATED_CACHE_TIMEOUT
+        )
+        self.assertIsNotNone(settings.INVALIDATED_CACHE_TIMEOUT)
+
+    def test_new_post_changes_feed(self):
+        """Новый пост меняет метку ленты и попадает в XML"""
+        url = reverse('posts:profile_rss', kwargs={'username': 'auth'})
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(author=self.user, text='Совсем новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Совсем новый пост', response.content.decode())
+
+    def test_edit_moves_post_between_group_feeds(self):
+        """Перенос поста в другую группу обновляет ленту прежней группы"""
+        url = reverse('posts:group_rss', kwargs={'slug': self.group.slug})
+        post = Post.objects.create(
+            author=self.user, text='Переезжающий пост', group=self.group
+        )
+        etag = self.client.get(url)['ETag']
+        post.group = None
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn('Переезжающий пост', response.content.decode())
@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост номер {number}',
+                group=cls.group if number % 2 else None
+            )
+            for number in range(25)
+        ]
+        Post.objects.create(author=cls.other, text='Чужой пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def walk(self, url):
+        """Пройти ленту порциями, вернуть тексты постов и число порций."""
+        texts, cursor, batches = [], '', 0
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            data = response.json()
+            texts += [
+                line.strip()[3:-4] for line in data['html'].splitlines()
+                if line.strip().startswith('<p>Пост')
+                or line.strip().startswith('<p>Чужой')
+            ]
+            batches += 1
+            if not data['next_cursor']:
+                return texts, batches
+            cursor = data['next_cursor']
+
+    def test_walk_index(self):
+        """Порции ленты идут по порядку без повторов и пропусков"""
+        texts, batches = self.walk(reverse('posts:index_fragment'))
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('text', flat=True)
+        )
+        self.assertEqual(texts, expected)
+        self.assertEqual(batches, 3)
+
+    def test_new_post_does_not_shift_cursor(self):
+        """Новый пост сверху не сдвигает следующую порцию"""
+        url = reverse('posts:index_fragment')
+        cursor = self.client.get(url).json()['next_cursor']
+        expected = self.client.get(url, {'cursor': cursor}).json()
+        Post.objects.create(author=self.user, text='Свежий пост')
+        self.assertEqual(
+            self.client.get(url, {'cursor': cursor}).json(), expected
+        )
+
+    def test_scoped_fragments(self):
+        """Фрагменты группы, профиля и подписок содержат только свои посты"""
+        group_texts, _ = self.walk(
+            reverse('posts:group_fragment', args=(self.group.slug,))
+        )
+        self.assertEqual(len(group_texts), 12)
+        profile_texts, _ = self.walk(
+            reverse('posts:profile_fragment', args=('other',))
+        )
+        self.assertEqual(profile_texts, ['Чужой пост'])
+        Follow.objects.create(user=self.other, author=self.user)
+        self.client.force_login(self.other)
+        follow_texts, _ = self.walk(reverse('posts:follow_fragment'))
+        self.assertEqual(len(follow_texts), 25)
+
+    def test_bad_cursor_and_anonymous_follow(self):
+        """Испорченный курсор — 400, подписки только для авторизованных"""
+        url = reverse('posts:index_fragment')
+        for cursor in ('abc', '1_2_3', '9' * 30 + '_1'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.client.get(reverse('posts:follow_fragment'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_card_cache_shared_with_pages(self):
+        """Фрагменты берут карточки из кэша, изменение поста его сбрасывает"""
+        self.client.get(reverse('posts:profile', args=('auth',)))
+        User.objects.filter(pk=self.user.pk).update(first_name='Новое имя')
+        url = reverse('posts:profile_fragment', args=('auth',))
+        self.assertNotIn('Новое имя', self.client.get(url).json()['html'])
+        post = self.posts[-1]
+        post.text = 'Исправленный пост'
+        post.save()
+        html = self.client.get(url).json()['html']
+        self.assertIn('Исправленный пост', html)
+        self.assertIn('Новое имя', html)
+
+    def test_full_page_keeps_pagination(self):
+        """Страница отдаёт и курсор для подгрузки, и обычные страницы"""
+        response = self.client.get(reverse('posts:group_list', args=(
+            self.group.slug,
+        )))
+        self.assertContains(response, 'data-cursor="')
+        self.assertContains(response, '?page=2')
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,)),
+            {'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertNotContains(response, 'data-cursor="')
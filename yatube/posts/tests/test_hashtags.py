@@ -0,0 +1,159 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import deletion, hashtags
+from posts.models import Mention, Post, PostTag, Tag
+
+User = get_user_model()
+
+
+class HashtagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader.one')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_parse(self):
+        self.assertEqual(
+            hashtags.tags_in('#Python и #питон, не#тег, ##двойной &#39;'),
+            {'python', 'питон'}
+        )
+        self.assertEqual(
+            hashtags.mentions_in('Привет, @reader.one. И @auth! mail@host'),
+            {'reader.one', 'auth'}
+        )
+
+    def test_tags_follow_text(self):
+        """Теги и упоминания синхронизируются при правке"""
+        post = Post.objects.create(
+            author=self.author, text='#Django и #Python, @reader.one'
+        )
+        self.assertEqual(
+            set(post.tag_links.values_list('tag__name', flat=True)),
+            {'django', 'python'}
+        )
+        self.assertTrue(Mention.objects.filter(user=self.reader).exists())
+        post.text = '#python @auth'
+        post.save()
+        self.assertEqual(
+            list(post.tag_links.values_list('tag__name', flat=True)),
+            ['python']
+        )
+        self.assertFalse(Mention.objects.exists())
+
+    def test_tag_feed_keyset(self):
+        """Лента тега листается курсором, удалённые посты не видны"""
+        posts = [
+            Post.objects.create(author=self.author, text=f'#кот номер {n}')
+            for n in range(13)
+        ]
+        Post.objects.create(author=self.author, text='без тегов')
+        url = reverse('posts:tag', args=('КОТ',))
+        response = self.client.get(url)
+        first = response.context['page_obj']
+        self.assertEqual(first, posts[::-1][:10])
+        response = self.client.get(
+            url, {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(response.context['page_obj'], posts[2::-1])
+        self.assertIsNone(response.context['next_cursor'])
+        deletion.delete_post(posts[0])
+        response = self.client.get(
+            url, {'cursor': self.client.get(url).context['next_cursor']}
+        )
+        self.assertEqual(response.context['page_obj'], posts[2:0:-1])
+        self.assertEqual(
+            self.client.get(url, {'cursor': 'x'}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(reverse('posts:tag', args=('нет',))).status_code,
+            404
+        )
+
+    def test_links_in_text(self):
+        post = Post.objects.create(
+            author=self.author, text='#Кот и @reader.one <b>'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(
+            response,
+            f'<a href="{reverse("posts:tag", args=("кот",))}">#Кот</a>'
+        )
+        self.assertContains(
+            response,
+            f'<a href="{reverse("posts:profile", args=("reader.one",))}">'
+            '@reader.one</a>'
+        )
+        self.assertContains(response, '&lt;b&gt;')
+
+    def test_mentions_page(self):
+        """Новые упоминания видны в шапке и гаснут после просмотра"""
+        Post.objects.create(author=self.author, text='Смотри, @reader.one')
+        Post.objects.create(author=self.reader, text='Это я, @reader.one')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Упоминания (1)')
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertContains(response, 'новое')
+        self.assertNotContains(response, 'Упоминания (1)')
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertNotContains(response, 'новое')
+
+    def test_mentions_page_marks_only_shown(self):
+        """Просмотр гасит только упоминания показанной страницы"""
+        for number in range(12):
+            Post.objects.create(
+                author=self.author, text=f'Пост {number} для @reader.one'
+            )
+        self.client.get(reverse('posts:mentions'))
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 2)
+
+    def test_deleted_post_leaves_badge(self):
+        """Удалённые посты сразу пропадают из счётчика упоминаний"""
+        post = Post.objects.create(author=self.author, text='Эй, @reader.one')
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='И я, @reader.one')
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 2)
+        deletion.delete_post(post)
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 1)
+        deletion.delete_content([other])
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 0)
+
+    def test_unseen_count_expires(self):
+        """Без общего кэша число упоминаний живёт недолго"""
+        with mock.patch.object(hashtags.cache, 'set') as cache_set:
+            hashtags.unseen_count(self.reader.pk)
+        cache_set.assert_called_once_with(
+            f'mentions:unseen:{self.reader.pk}', 0,
+            settings.INVALIDATED_CACHE_TIMEOUT
+        )
+        self.assertIsNotNone(settings.INVALIDATED_CACHE_TIMEOUT)
+
+    def test_backfill(self):
+        """Команда разбирает старые посты, упоминания не считаются новыми"""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.filter(pk=post.pk).update(text='#старое @reader.one')
+        out = StringIO()
+        call_command('index_hashtags', batch=1, stdout=out)
+        self.assertIn('Разобрано постов: 1', out.getvalue())
+        self.assertTrue(
+            PostTag.objects.filter(post=post, tag__name='старое').exists()
+        )
+        self.assertTrue(Mention.objects.get(post=post).seen)
+        self.assertEqual(hashtags.unseen_count(self.reader.pk), 0)
+        self.assertEqual(Tag.objects.count(), 1)
@@ -0,0 +1,143 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, ImageDraw
+
+from posts import images
+from posts.models import BannedImage, Post, PostImageHash
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def picture(seed, size=None, fmt='PNG', quality=95):
+    """Картинка из кругов, зависящих от seed; size — уменьшенная копия."""
+    width, height = 240, 160
+    image = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for index in range(6):
+        x = (seed * 37 + index * 53) % width
+        y = (seed * 61 + index * 29) % height
+        radius = width // (4 + index)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=((seed * 40 + index * 70) % 256, index * 40, 255 - index * 40)
+        )
+    if size:
+        image = image.resize(size)
+    out = BytesIO()
+    image.save(out, fmt, quality=quality)
+    return out.getvalue()
+
+
+def upload(content, name='pic.png'):
+    return SimpleUploadedFile(name, content, 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageHashTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def post_with(self, content, text='Пост'):
+        post = Post.objects.create(
+            author=self.user, text=text, image=upload(content)
+        )
+        images.hash_post(post.pk)
+        return post
+
+    def test_copies_are_close(self):
+        """Уменьшенная и пересжатая копия близка, другая картинка — нет"""
+        original = images.dhash(BytesIO(picture(1)))
+        copy = images.dhash(
+            BytesIO(picture(1, size=(120, 80), fmt='JPEG', quality=30))
+        )
+        other = images.dhash(BytesIO(picture(2)))
+        self.assertLessEqual(
+            images.distance(original, copy), settings.IMAGE_HASH_DISTANCE
+        )
+        self.assertGreater(
+            images.distance(original, other), settings.IMAGE_HASH_DISTANCE
+        )
+
+    def test_near(self):
+        """Поиск по частям находит все хэши в радиусе"""
+        base = 0x0123456789ABCDEF
+        flipped = base ^ (1 << 63) ^ (1 << 40) ^ (1 << 20) ^ (1 << 3) ^ 1
+        for value in (base, flipped, ~base):
+            images.assign(BannedImage(), value).save()
+        found = images.near(BannedImage.objects.all(), base, radius=5)
+        self.assertEqual(
+            [images.distance(row.value, base) for row, _ in found], [0, 5]
+        )
+        self.assertEqual(
+            len(images.near(BannedImage.objects.all(), base, radius=4)), 1
+        )
+
+    def test_banned_upload(self):
+        """Копию запрещённой картинки не загрузить"""
+        images.assign(BannedImage(), images.dhash(BytesIO(picture(1)))).save()
+        url = reverse('posts:post_create')
+        response = self.client.post(url, {
+            'text': 'Пост',
+            'image': upload(picture(1, fmt='JPEG', quality=40), 'pic.jpg'),
+        })
+        self.assertFormError(
+            response, 'form', 'image', 'Эту картинку загружать нельзя'
+        )
+        self.client.post(url, {'text': 'Пост', 'image': upload(picture(2))})
+        self.assertTrue(Post.objects.exists())
+
+    def test_hash_follows_image(self):
+        post = self.post_with(picture(1))
+        self.assertTrue(PostImageHash.objects.filter(post=post).exists())
+        post.image = ''
+        post.save()
+        images.hash_post(post.pk)
+        self.assertFalse(PostImageHash.objects.filter(post=post).exists())
+
+    def test_similar_and_groups(self):
+        first = self.post_with(picture(1))
+        copy = self.post_with(picture(1, size=(200, 140), fmt='JPEG'))
+        self.post_with(picture(2))
+        self.assertEqual(
+            [post for post, _ in images.similar(first.pk)], [copy]
+        )
+        self.assertEqual(images.groups(), [sorted([first.pk, copy.pk])])
+        PostImageHash.objects.filter(post=copy).delete()
+        out = StringIO()
+        call_command('find_similar_images', backfill=True, stdout=out)
+        self.assertIn('Посчитаны хэши картинок: 1', out.getvalue())
+        self.assertIn(f'2: {first.pk}, {copy.pk}', out.getvalue())
+
+    def test_admin_ban(self):
+        """Действие админки запрещает картинки выбранных постов"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        post = self.post_with(picture(3))
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'ban_images', '_selected_action': [post.pk],
+        })
+        self.assertIsNotNone(
+            images.banned(images.dhash(BytesIO(picture(3))))
+        )
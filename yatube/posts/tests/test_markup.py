@@ -0,0 +1,109 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from posts import markup
+from posts.models import ArchivedPost, Post
+from posts.tasks import render_posts
+from tasks.models import Task
+
+User = get_user_model()
+
+
+class MarkupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_render(self):
+        cases = {
+            'Просто текст': '<p>Просто текст</p>',
+            '**жирный** и *курсив*, _тоже_': (
+                '<p><strong>жирный</strong> и <em>курсив</em>, '
+                '<em>тоже</em></p>'
+            ),
+            'строка\nвторая\n\nабзац': (
+                '<p>строка<br>вторая</p>\n<p>абзац</p>'
+            ),
+            '- раз\n- два': '<ul><li>раз</li><li>два</li></ul>',
+            '> цитата': '<blockquote><p>цитата</p></blockquote>',
+            '```\n**не** <b>\n```': (
+                '<pre><code>**не** &lt;b&gt;</code></pre>'
+            ),
+            '`a*b*c` snake_case_name 2*3*4': (
+                '<p><code>a*b*c</code> snake_case_name 2*3*4</p>'
+            ),
+            '**a *b** c*': '<p><strong>a *b</strong> c*</p>',
+            '*a **b** c*': '<p><em>a <strong>b</strong> c</em></p>',
+            '**a *b* c**': '<p><strong>a <em>b</em> c</strong></p>',
+            '[сайт](https://example.com/?a=1&b=2)': (
+                '<p><a href="https://example.com/?a=1&amp;b=2" '
+                'rel="nofollow noopener">сайт</a></p>'
+            ),
+            'см. https://example.com/a_b_c.': (
+                '<p>см. <a href="https://example.com/a_b_c" '
+                'rel="nofollow noopener">https://example.com/a_b_c</a>.</p>'
+            ),
+        }
+        for text, html in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(markup.render(text), html)
+
+    def test_render_is_safe(self):
+        for text in (
+            '<script>alert(1)</script>',
+            '[x](javascript:alert(1))',
+            '"https://example.com" onmouseover="alert(1)"',
+            '<img src=x onerror=alert(1)>',
+        ):
+            with self.subTest(text=text):
+                html = markup.render(text)
+                self.assertNotIn('<script', html)
+                self.assertNotIn('<img', html)
+                self.assertNotIn('href="javascript', html)
+                self.assertNotIn('" onmouseover', html)
+
+    def test_rendered_at_save(self):
+        """HTML считается при сохранении и при правке текста"""
+        post = Post.objects.create(author=self.user, text='**раз**')
+        self.assertEqual(post.text_html, '<p><strong>раз</strong></p>')
+        self.assertEqual(post.render_version, markup.VERSION)
+        post.text = '*два*'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><em>два</em></p>')
+        response = Client().get(f'/posts/{post.pk}/')
+        self.assertContains(response, '<em>два</em>')
+
+    def test_rerender_outdated(self):
+        """Задача перерисовывает устаревшие посты порциями"""
+        posts = [
+            Post.objects.create(author=self.user, text=f'**{number}**')
+            for number in range(3)
+        ]
+        Post.objects.update(text_html='', render_version=0)
+        ArchivedPost.objects.create(
+            id=100, author=self.user, text='*старый*',
+            pub_date=posts[0].pub_date, updated=posts[0].updated
+        )
+        with self.settings(RENDER_BATCH_SIZE=2):
+            render_posts()
+        self.assertEqual(
+            Post.objects.filter(render_version=markup.VERSION).count(), 2
+        )
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'posts.tasks.render_posts')
+        self.assertEqual(
+            json.loads(task.payload)['args'], ['post', posts[1].pk]
+        )
+        call_command('render_posts', now=True, stdout=StringIO())
+        self.assertFalse(
+            Post.objects.filter(render_version__lt=markup.VERSION).exists()
+        )
+        self.assertEqual(
+            ArchivedPost.objects.get().text_html, '<p><em>старый</em></p>'
+        )
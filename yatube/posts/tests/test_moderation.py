@@ -0,0 +1,153 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import fresh, moderation, reactions
+from posts.models import Comment, Follow, Group, Post, Reaction
+
+User = get_user_model()
+
+
+@override_settings(MODERATION_BATCH_SIZE=2)
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.user = User.objects.create_user(username='auth')
+        cls.spam = Group.objects.create(
+            title='Спам', slug='spam', description='Спам'
+        )
+        cls.misc = Group.objects.create(
+            title='Разное', slug='misc', description='Разное'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                author=self.spammer, text=f'Купите {number}', group=self.spam
+            )
+            for number in range(5)
+        ]
+        self.post = Post.objects.create(author=self.user, text='Обычный пост')
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def command(self, *args):
+        out = StringIO()
+        call_command('moderate', *args, stdout=out)
+        return out.getvalue()
+
+    def test_move_posts(self):
+        """Посты переносятся порциями, ленты групп сбрасываются один раз"""
+        self.assertEqual(fresh.heads(['group:misc'])['group:misc'], [])
+        out = self.command('move', '--from-group', 'spam', '--to', 'misc')
+        self.assertIn('2/5', out)
+        self.assertIn('Перенесено постов: 5', out)
+        self.assertEqual(self.misc.posts.count(), 5)
+        self.assertEqual(len(fresh.heads(['group:misc'])['group:misc']), 5)
+        self.command('move', '--author', 'spammer')
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+        with self.assertRaises(CommandError):
+            self.command('move', '--to', 'misc')
+
+    def test_delete_content(self):
+        """Контент автора сразу скрыт, аккаунт остаётся"""
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам в комментарии'
+        )
+        out = self.command('delete-content', '--author', 'spammer')
+        self.assertIn('Контент удаляется у авторов: 1', out)
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(User.objects.get(pk=self.spammer.pk).is_active)
+        with self.assertRaises(CommandError):
+            self.command('delete-content', '--author', 'nobody')
+
+    def test_delete_content_is_one_pass(self):
+        """Строки скрываются порциями, кэши лент сбрасываются один раз"""
+        authors = [self.spammer] + [
+            User.objects.create_user(username=f'bot{number}')
+            for number in range(2)
+        ]
+        for author in authors[1:]:
+            Post.objects.create(author=author, text='Спам')
+        steps = []
+        with mock.patch('posts.deletion.fresh.reset') as reset:
+            done = moderation.delete_content(
+                authors, lambda done, total: steps.append((done, total))
+            )
+        self.assertEqual(done, 3)
+        # пять постов спамера и по посту у двух ботов, порции по два
+        self.assertEqual(steps, [(2, 7), (4, 7), (6, 7), (7, 7)])
+        reset.assert_called_once()
+        self.assertFalse(Post.objects.filter(author__in=authors).exists())
+
+    def test_purge_comments(self):
+        """Комментарии по шаблону удаляются вместе с реакциями"""
+        spam = [
+            Comment.objects.create(
+                post=self.post, author=self.spammer, text=f'http://spam/{n}'
+            )
+            for n in range(3)
+        ]
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        reactions.react(self.user, spam[0], 'like')
+        out = self.command('purge-comments', '--pattern', r'^http://spam/')
+        self.assertIn('Удалено комментариев: 3', out)
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Ок']
+        )
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_unfollow(self):
+        """Подписки спамера удаляются, кэш его подписок сброшен"""
+        Follow.objects.create(user=self.spammer, author=self.user)
+        Follow.objects.create(user=self.user, author=self.spammer)
+        self.assertEqual(
+            fresh.following_scopes(self.spammer.pk), ['author:auth']
+        )
+        out = self.command('unfollow', '--author', 'spammer')
+        self.assertIn('Удалено подписок: 1', out)
+        self.assertEqual(fresh.following_scopes(self.spammer.pk), [])
+        self.assertTrue(Follow.objects.filter(user=self.user).exists())
+
+    def test_admin_move_action(self):
+        """Действие админки спрашивает группу и переносит посты"""
+        url = reverse('admin:posts_post_changelist')
+        data = {
+            'action': 'move_to_group',
+            ACTION_CHECKBOX_NAME: [post.pk for post in self.posts[:3]],
+        }
+        response = self.client.post(url, data)
+        self.assertContains(response, 'Постов выбрано: 3')
+        response = self.client.post(
+            url, {**data, 'apply': '1', 'group': self.misc.pk}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.misc.posts.count(), 3)
+
+    def test_admin_purge_same_text(self):
+        """Удаление комментариев с тем же текстом, что у выбранного"""
+        for _ in range(3):
+            Comment.objects.create(
+                post=self.post, author=self.spammer, text='Спам'
+            )
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        self.client.post(reverse('admin:posts_comment_changelist'), {
+            'action': 'purge_same_text',
+            ACTION_CHECKBOX_NAME: [Comment.objects.filter(text='Спам')[0].pk],
+        })
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Ок']
+        )
@@ -0,0 +1,137 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.utils import make_cursor
+
+User = get_user_model()
+
+
+# новые посты попадают в верхушки после фиксации транзакции
+class NewPostsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.other = User.objects.create_user(username='other')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        cache.clear()
+        self.client = Client()
+        self.top = Post.objects.create(author=self.user, text='Верхний пост')
+        self.since = make_cursor(self.top)
+
+    def poll(self, name, *args, client=None):
+        response = (client or self.client).get(
+            reverse(f'posts:{name}', args=args), {'since': self.since}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.json()
+
+    def test_counts_per_scope(self):
+        """Новые посты считаются отдельно для каждой ленты"""
+        self.assertEqual(self.poll('index_new'), {'count': 0, 'more': False})
+        Post.objects.create(author=self.user, text='Первый')
+        Post.objects.create(author=self.other, text='Второй', group=self.group)
+        self.assertEqual(self.poll('index_new')['count'], 2)
+        self.assertEqual(self.poll('group_new', self.group.slug)['count'], 1)
+        reader = Client()
+        reader.force_login(self.reader)
+        self.assertEqual(self.poll('follow_new', client=reader)['count'], 1)
+        Follow.objects.create(user=self.reader, author=self.other)
+        self.assertEqual(self.poll('follow_new', client=reader)['count'], 2)
+
+    def test_poll_does_not_query_database(self):
+        """Опрос с тёплым кэшем не обращается к базе"""
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.poll('index_new')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.poll('index_new')['count'], 1)
+
+    @override_settings(NEW_POSTS_WINDOW=2)
+    def test_window_is_capped(self):
+        """Когда новых постов больше окна, отвечаем «N+»"""
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        self.assertEqual(self.poll('index_new'), {'count': 2, 'more': True})
+
+    def test_delete_and_move(self):
+        """Удаление и перенос поста между группами пересчитывают ленты"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Ещё пост')
+        self.assertEqual(self.poll('index_new')['count'], 2)
+        post.group = None
+        post.save()
+        self.assertEqual(self.poll('group_new', self.group.slug)['count'], 0)
+        post.delete()
+        self.assertEqual(self.poll('index_new')['count'], 1)
+
+    def test_rolled_back_post_is_not_counted(self):
+        """Пост из откатившейся транзакции не попадает в верхушку"""
+        self.poll('index_new')
+        try:
+            with transaction.atomic():
+                Post.objects.create(author=self.user, text='Откат')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.poll('index_new')['count'], 0)
+
+    def test_bad_cursor(self):
+        """Испорченный курсор — 400"""
+        response = self.client.get(reverse('posts:index_new'), {'since': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_unknown_group(self):
+        """Опрос несуществующей группы — 404"""
+        response = self.client.get(
+            reverse('posts:group_new', args=('nope',)), {'since': self.since}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_push_waits_for_lock(self):
+        """Занятая блокировка ленты не теряет новый пост"""
+        self.poll('index_new')
+        cache.add('fresh:lock:index', 1)
+        with mock.patch('posts.fresh.LOCK_WAIT', 0):
+            Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.poll('index_new')['count'], 1)
+
+    def test_stream_is_disabled_by_default(self):
+        """Без NEW_POSTS_STREAM поток не отдаётся, страница опрашивает JSON"""
+        response = self.client.get(
+            reverse('posts:index_new_stream'), {'since': self.since}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'data-stream'
+        )
+
+    @override_settings(NEW_POSTS_STREAM=True, NEW_POSTS_STREAM_TIMEOUT=0)
+    def test_event_stream(self):
+        """SSE отдаёт текущее число новых постов"""
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(
+            reverse('posts:index_new_stream'), {'since': self.since}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('retry: ', body)
+        self.assertIn('data: {"count": 1, "more": false}', body)
+
+    def test_feed_page_has_banner(self):
+        """Первая страница ленты отдаёт курсор для баннера"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, f'data-since="{self.since}"')
+        self.assertContains(response, reverse('posts:index_new'))
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import reactions
+from posts.models import Comment, Post, Reaction, ReactionCounter
+
+User = get_user_model()
+
+
+def total(**target):
+    return ReactionCounter.objects.filter(**target).aggregate(
+        total=Sum('count')
+    )['total'] or 0
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def react_url(self, name, pk, kind='like'):
+        return reverse(f'posts:{name}', kwargs={
+            'comment_id' if name.startswith('comment') else 'post_id': pk,
+            'kind': kind
+        })
+
+    def test_react_is_idempotent(self):
+        """Повторная реакция не меняет счётчик"""
+        url = self.react_url('post_react', self.post.pk)
+        for _ in range(3):
+            response = self.client.post(url)
+            self.assertRedirects(response, reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ))
+        self.assertEqual(Reaction.objects.filter(post=self.post).count(), 1)
+        self.assertEqual(total(post=self.post, kind='like'), 1)
+
+    def test_unreact_is_idempotent(self):
+        """Повторное снятие реакции не уводит счётчик в минус"""
+        reactions.react(self.reader, self.post, 'like')
+        url = self.react_url('post_unreact', self.post.pk)
+        for _ in range(2):
+            self.client.post(url)
+        self.assertFalse(Reaction.objects.filter(post=self.post).exists())
+        self.assertEqual(total(post=self.post, kind='like'), 0)
+
+    def test_comment_reaction(self):
+        """Реакции на комментарии считаются отдельно от постов"""
+        self.client.post(self.react_url('comment_react', self.comment.pk))
+        self.assertEqual(total(comment=self.comment), 1)
+        self.assertEqual(total(post=self.post), 0)
+
+    def test_unknown_kind_and_get(self):
+        """Неизвестная реакция — 404, GET не разрешён"""
+        url = self.react_url('post_react', self.post.pk, kind='angry')
+        self.assertEqual(self.client.post(url).status_code, 404)
+        url = self.react_url('post_react', self.post.pk)
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_unique_constraint(self):
+        """База не допускает две одинаковые реакции"""
+        Reaction.objects.create(user=self.user, post=self.post, kind='love')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reaction.objects.create(
+                user=self.user, post=self.post, kind='love'
+            )
+
+    def test_counters_sum_over_shards(self):
+        """Итог по посту — сумма всех шардов"""
+        users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(20)
+        ]
+        for user in users:
+            reactions.react(user, self.post, 'laugh')
+        self.assertEqual(total(post=self.post, kind='laugh'), len(users))
+        post = reactions.attach_to_posts([self.post], users[0])[0]
+        summary = {item['kind']: item for item in post.reactions_summary}
+        self.assertEqual(summary['laugh']['count'], len(users))
+        self.assertTrue(summary['laugh']['active'])
+        self.assertFalse(summary['like']['active'])
+
+    def test_feed_query_count_is_constant(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        url = reverse('posts:follow_index')
+        self.client.post(reverse(
+            'posts:profile_follow', kwargs={'username': self.user.username}
+        ))
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {number}')
+            for number in range(8)
+        ])
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(few), len(many))
@@ -0,0 +1,137 @@
+import random
+from io import StringIO
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import revisions
+from posts.models import Post, PostRevision
+
+User = get_user_model()
+
+
+@override_settings(POST_REVISION_SNAPSHOT_EVERY=3)
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.moderator = User.objects.create_user(
+            username='moderator', is_staff=True
+        )
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.user, text='Первая версия поста'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def edit(self, text):
+        self.client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)), {'text': text}
+        )
+
+    def test_diff_roundtrip(self):
+        """Разница восстанавливает новый текст из старого"""
+        words = ['кот ', 'пёс\n', 'дом ', 'сад  ', 'лес\t', 'мир. ']
+        generator = random.Random(1)
+        old = ''.join(generator.choices(words, k=200))
+        for _ in range(50):
+            new = list(old.split(' '))
+            for _ in range(generator.randint(1, 5)):
+                new.insert(
+                    generator.randint(0, len(new)), generator.choice(words)
+                )
+                del new[generator.randint(0, len(new) - 1)]
+            new = ' '.join(new)
+            ops = revisions.diff(old, new)
+            self.assertEqual(revisions.patch(old, ops), new)
+            old = new
+
+    def test_edits_are_reconstructed(self):
+        """Каждая версия восстанавливается одним запросом"""
+        texts = ['Первая версия поста']
+        for number in range(1, 8):
+            texts.append(f'Первая версия поста, правка {number}')
+            self.edit(texts[-1])
+        numbers = list(self.post.revisions.values_list(
+            'number', 'is_snapshot'
+        ))
+        self.assertEqual(len(numbers), 8)
+        self.assertEqual(
+            [number for number, snapshot in numbers if snapshot], [1, 4, 7]
+        )
+        for number, text in enumerate(texts, start=1):
+            with self.assertNumQueries(1):
+                self.assertEqual(revisions.text_at(self.post, number), text)
+        self.assertIsNone(revisions.text_at(self.post, 99))
+
+    def test_delta_is_compact(self):
+        """Правка длинного поста хранит только изменённые слова"""
+        text = ' '.join(f'слово{number}' for number in range(2000))
+        Post.objects.filter(pk=self.post.pk).update(text=text)
+        self.edit(text.replace('слово1000 ', 'замена '))
+        revision = self.post.revisions.get(number=2)
+        self.assertFalse(revision.is_snapshot)
+        self.assertLess(len(revision.data), 50)
+        self.assertEqual(revision.editor, self.user)
+
+    def test_unchanged_text_is_not_recorded(self):
+        self.edit('Первая версия поста')
+        self.assertFalse(self.post.revisions.exists())
+
+    def test_history_view(self):
+        """История видна автору и модератору, остальным — нет"""
+        self.edit('Вторая версия')
+        url = reverse('posts:post_history', args=(self.post.pk,))
+        response = self.client.get(url)
+        self.assertContains(response, 'Вторая версия')
+        response = self.client.get(url, {'revision': 1})
+        self.assertContains(response, 'Первая версия поста')
+        self.assertEqual(
+            self.client.get(url, {'revision': 5}).status_code, 404
+        )
+        moderator = Client()
+        moderator.force_login(self.moderator)
+        self.assertEqual(moderator.get(url).status_code, 200)
+        reader = Client()
+        reader.force_login(self.reader)
+        self.assertRedirects(
+            reader.get(url),
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+
+    def test_prune(self):
+        """Сжатие удаляет старые версии, остальные восстанавливаются"""
+        texts = ['Первая версия поста']
+        for number in range(1, 6):
+            texts.append(f'Версия {number}')
+            self.edit(texts[-1])
+        call_command('prune_revisions', keep=2, stdout=StringIO())
+        kept = list(self.post.revisions.values_list('number', 'is_snapshot'))
+        self.assertEqual(kept, [(5, True), (6, False)])
+        self.assertEqual(revisions.text_at(self.post, 5), texts[4])
+        self.assertEqual(revisions.text_at(self.post, 6), texts[5])
+
+    def test_prune_keeps_recent(self):
+        """Версии моложе --days не удаляются"""
+        for number in range(1, 4):
+            self.edit(f'Версия {number}')
+        PostRevision.objects.filter(number__lte=2).update(
+            created=timezone.now() - timedelta(days=30)
+        )
+        deleted = revisions.prune_all(
+            keep=1, before=timezone.now() - timedelta(days=7)
+        )
+        self.assertEqual(deleted, 2)
+        self.assertEqual(
+            list(self.post.revisions.values_list('number', 'is_snapshot')),
+            [(3, True), (4, True)]
+        )
+        self.assertEqual(revisions.text_at(self.post, 3), 'Версия 2')
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from posts.archive import archive_batch
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+@override_settings(SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITE_URL='http://yatube')
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        User.objects.create_user(username='silent')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def locations(self, name):
+        tree = ElementTree.parse(os.path.join(TEMP_SITEMAP_ROOT, name))
+        return [element.text for element in tree.iter(f'{NS}loc')]
+
+    def test_files_are_split_by_limit(self):
+        """Посты делятся на файлы по лимиту, индекс ссылается на все"""
+        call_command(
+            'build_sitemaps', limit=2, chunk=2, stdout=open(os.devnull, 'w')
+        )
+        files = self.locations('sitemap.xml')
+        names = [location.rsplit('/', 1)[1] for location in files]
+        self.assertEqual(
+            [name for name in names if name.startswith('sitemap-posts')],
+            ['sitemap-posts-1.xml', 'sitemap-posts-2.xml',
+             'sitemap-posts-3.xml']
+        )
+        urls = sum((self.locations(name) for name in names), [])
+        for post in self.posts:
+            self.assertIn(f'http://yatube/posts/{post.pk}/', urls)
+        self.assertIn('http://yatube/profile/auth/', urls)
+        self.assertNotIn('http://yatube/profile/silent/', urls)
+        self.assertIn('http://yatube/group/Test_slug/', urls)
+
+    def test_archive_and_removed_posts(self):
+        """Архивные посты в отдельном разделе, удалённые не двигают lastmod"""
+        archived = Post.objects.create(author=self.user, text='Старый пост')
+        archive_batch([archived.pk])
+        removed = Post.objects.create(
+            author=self.user, text='Удалённый пост', group=self.group
+        )
+        Post.objects.filter(pk=removed.pk).update(
+            pub_date=removed.pub_date + timedelta(days=30),
+            deleted=timezone.now()
+        )
+        call_command('build_sitemaps', stdout=open(os.devnull, 'w'))
+        self.assertEqual(
+            self.locations('sitemap-archive-2.xml'),
+            [f'http://yatube/posts/{archived.pk}/']
+        )
+        tree = ElementTree.parse(
+            os.path.join(TEMP_SITEMAP_ROOT, 'sitemap-groups-4.xml')
+        )
+        self.assertEqual(
+            tree.find(f'{NS}url/{NS}lastmod').text,
+            self.posts[-1].pub_date.date().isoformat()
+        )
+
+    def test_rebuild_removes_stale_files(self):
+        """Пересборка удаляет файлы, которых больше нет в индексе"""
+        call_command('build_sitemaps', limit=1, stdout=open(os.devnull, 'w'))
+        call_command('build_sitemaps', stdout=open(os.devnull, 'w'))
+        self.assertFalse(os.path.exists(
+            os.path.join(TEMP_SITEMAP_ROOT, 'sitemap-posts-2.xml')
+        ))
+
+    def test_served_statically(self):
+        """Готовые файлы отдаются по /sitemap.xml и /sitemaps/"""
+        call_command('build_sitemaps', stdout=open(os.devnull, 'w'))
+        client = Client()
+        response = client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        response = client.get('/sitemaps/sitemap-posts-1.xml')
+        self.assertEqual(response.status_code, 200)
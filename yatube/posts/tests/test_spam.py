@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import spam
+from posts.models import BannedPhrase, Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(BANNED_PHRASES_RELOAD_INTERVAL=0)
+class SpamFilterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        spam.reload()
+        self.addCleanup(spam.reload)
+        BannedPhrase.objects.create(phrase='Купить Дёшево')
+        BannedPhrase.objects.create(phrase='казино')
+        BannedPhrase.objects.create(phrase='spam.example/', kind='url')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_matcher(self):
+        """Фразы целыми словами, ссылки любым вхождением"""
+        matcher = spam.Matcher([
+            ('he', True), ('she', True), ('hers', False), ('his', False)
+        ])
+        cases = {
+            'ushers': 'hers',
+            'she sells': 'she',
+            'ahishers': 'his',
+            'the shell': None,
+            'he': 'he',
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(matcher.find(text), expected)
+
+    def test_find(self):
+        for text, expected in (
+            ('Можно КУПИТЬ   дешево!', 'купить дешево'),
+            ('Лучшее Казино.', 'казино'),
+            ('Казиновый', None),
+            ('см. https://spam.example/ref?1', 'spam.example/'),
+            ('Обычный пост', None),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(spam.find(text), expected)
+
+    def test_forms_reject_spam(self):
+        """Пост и комментарий со спамом не сохраняются"""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Заходи в казино'}
+        )
+        self.assertFormError(
+            response, 'form', 'text',
+            'Текст содержит запрещённые слова или ссылки'
+        )
+        self.assertFalse(Post.objects.exists())
+        post = Post.objects.create(author=self.user, text='Пост')
+        self.client.post(
+            reverse('posts:add_comment', args=(post.pk,)),
+            {'text': 'https://spam.example/win'}
+        )
+        self.assertFalse(Comment.objects.exists())
+
+    def test_hot_reload(self):
+        """Правка списка в админке подхватывается без перезапуска"""
+        self.assertIsNone(spam.find('новая фраза'))
+        phrase = BannedPhrase.objects.create(phrase='новая фраза')
+        self.assertEqual(spam.find('Новая фраза'), 'новая фраза')
+        phrase.is_active = False
+        phrase.save()
+        self.assertIsNone(spam.find('новая фраза'))
+
+    def test_matcher_is_reused(self):
+        """Пока список не меняется, автомат не пересобирается"""
+        spam.find('текст')
+        with override_settings(BANNED_PHRASES_RELOAD_INTERVAL=60):
+            with self.assertNumQueries(0):
+                spam.find('текст')
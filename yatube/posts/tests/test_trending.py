@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Follow, Group, GroupTrend, Post, PostTrend
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание'
+        )
+        cls.quiet_post = Post.objects.create(
+            author=cls.reader,
+            text='Тихий пост'
+        )
+        cls.hot_post = Post.objects.create(
+            author=cls.user,
+            text='Обсуждаемый пост',
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_new_post_gets_score(self):
+        """Новый пост сразу получает рейтинг, как и его группа"""
+        self.assertTrue(PostTrend.objects.filter(post=self.hot_post).exists())
+        self.assertTrue(GroupTrend.objects.filter(group=self.group).exists())
+
+    def test_comments_raise_post(self):
+        """Комментарии поднимают пост выше более нового поста"""
+        newest = Post.objects.create(author=self.reader, text='Новый пост')
+        before = PostTrend.objects.get(post=self.hot_post).score
+        for number in range(3):
+            Comment.objects.create(
+                post=self.hot_post, author=self.reader, text=str(number)
+            )
+        after = PostTrend.objects.get(post=self.hot_post).score
+        self.assertGreater(after, before)
+        posts = trending.trending_posts()
+        self.assertEqual(posts[0], self.hot_post)
+        self.assertIn(newest, posts)
+
+    def test_follow_raises_latest_post(self):
+        """Подписка поднимает последний пост автора"""
+        before = PostTrend.objects.get(post=self.hot_post).score
+        Follow.objects.create(user=self.reader, author=self.user)
+        after = PostTrend.objects.get(post=self.hot_post).score
+        self.assertGreater(after, before)
+
+    def test_decay(self):
+        """Старое событие весит меньше нового с тем же весом"""
+        now = timezone.now()
+        old = trending.hot_value(1.0, now - timedelta(days=1))
+        self.assertLess(old, trending.hot_value(1.0, now))
+
+    def test_compaction_removes_faded_scores(self):
+        """Компактизация удаляет затухшие рейтинги"""
+        PostTrend.objects.filter(post=self.quiet_post).update(
+            score=trending.hot_value(1.0, timezone.now() - timedelta(days=30))
+        )
+        call_command('compact_trending', stdout=open('/dev/null', 'w'))
+        self.assertFalse(
+            PostTrend.objects.filter(post=self.quiet_post).exists()
+        )
+        self.assertTrue(PostTrend.objects.filter(post=self.hot_post).exists())
+
+    def test_trending_page_is_cached(self):
+        """Список популярного берётся из кэша, запрос — только реакции"""
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertIn(self.hot_post, response.context['page_obj'])
+        self.assertIn(self.group, response.context['groups'])
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('posts:trending'))
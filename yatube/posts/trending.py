@@ -0,0 +1,104 @@
+"""Популярные посты и группы с затуханием по времени.
+
+Каждое событие (новый пост, комментарий, подписка) добавляет к рейтингу
+вес w * 2 ** ((t - EPOCH) / HALF_LIFE). В базе хранится log2 этой суммы:
+значение растёт линейно со временем, не переполняется, а порядок строк
+совпадает с порядком затухших рейтингов на любой момент времени. Поэтому
+рейтинг обновляется одним UPDATE на событие, без пересчёта остальных строк.
+"""
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest, Least, Log, Power
+from django.utils import timezone
+
+from .models import Group, GroupTrend, Post, PostTrend
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+POSTS_CACHE_KEY = 'trending:posts'
+GROUPS_CACHE_KEY = 'trending:groups'
+
+
+def hot_value(weight, when=None):
+    """Логарифмический вклад события с весом weight в момент when."""
+    when = when or timezone.now()
+    age = (when - EPOCH).total_seconds()
+    return math.log2(weight) + age / settings.TRENDING_HALF_LIFE
+
+
+def threshold(when=None):
+    """Значение score, ниже которого затухший рейтинг меньше минимума."""
+    return hot_value(settings.TRENDING_MIN_SCORE, when)
+
+
+def bump(model, pk, weight, when=None):
+    """Атомарно добавить событие к рейтингу строки model с ключом pk."""
+    when = when or timezone.now()
+    value = Value(hot_value(weight, when), output_field=FloatField())
+    high = Greatest(F('score'), value)
+    low = Least(F('score'), value)
+    # log2(2 ** a + 2 ** b) = max + log2(1 + 2 ** (min - max))
+    score = high + Log(
+        Value(2.0), Value(1.0) + Power(Value(2.0), low - high),
+        output_field=FloatField()
+    )
+    if model.objects.filter(pk=pk).update(score=score, updated=when):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(pk=pk, score=value.value, updated=when)
+    except IntegrityError:
+        # строку успел создать параллельный запрос
+        model.objects.filter(pk=pk).update(score=score, updated=when)
+
+
+def bump_post(post_id, group_id, weight):
+    when = timezone.now()
+    bump(PostTrend, post_id, weight, when)
+    if group_id:
+        bump(GroupTrend, group_id, weight, when)
+
+
+def trending_posts():
+    """Популярные посты: одно обращение к кэшу или один запрос."""
+    posts = cache.get(POSTS_CACHE_KEY)
+    if posts is None:
+        posts = list(
+            Post.objects.for_list()
+            .filter(trend__score__gte=threshold())
+            .order_by('-trend__score')[:settings.TRENDING_SIZE]
+        )
+        cache.set(POSTS_CACHE_KEY, posts, settings.TRENDING_CACHE_TIMEOUT)
+    return posts
+
+
+def trending_groups():
+    """Популярные группы: одно обращение к кэшу или один запрос."""
+    groups = cache.get(GROUPS_CACHE_KEY)
+    if groups is None:
+        groups = list(
+            Group.objects.filter(trend__score__gte=threshold())
+            .order_by('-trend__score')[:settings.TRENDING_SIZE]
+        )
+        cache.set(GROUPS_CACHE_KEY, groups, settings.TRENDING_CACHE_TIMEOUT)
+    return groups
+
+
+def compact():
+    """Удалить затухшие рейтинги и заново прогреть кэш.
+
+    Возвращает количество удалённых строк.
+    """
+    limit = threshold()
+    deleted = 0
+    for model in (PostTrend, GroupTrend):
+        deleted += model.objects.filter(score__lt=limit).delete()[0]
+    cache.delete_many([POSTS_CACHE_KEY, GROUPS_CACHE_KEY])
+    trending_posts()
+    trending_groups()
+    return deleted
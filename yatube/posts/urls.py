@@ -1,22 +1,101 @@
 from django.urls import path
 
-from .import views
+from .import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path('sitemaps/<path:path>', views.sitemap, name='sitemap_file'),
+    path(
+        'feeds/rss/',
+        feeds.cached_feed(feeds.LatestPostsFeed),
+        name='feed_rss'
+    ),
+    path(
+        'feeds/atom/',
+        feeds.cached_feed(feeds.LatestPostsAtomFeed),
+        name='feed_atom'
+    ),
+    path(
+        'group/<slug:slug>/rss/',
+        feeds.cached_feed(feeds.GroupPostsFeed),
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.cached_feed(feeds.GroupPostsAtomFeed),
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.cached_feed(feeds.AuthorPostsFeed),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.cached_feed(feeds.AuthorPostsAtomFeed),
+        name='profile_atom'
+    ),
+    path('fragments/', views.index_fragment, name='index_fragment'),
+    path('new/', views.index_new, name='index_new'),
+    path(
+        'new/stream/',
+        views.index_new,
+        {'stream': True},
+        name='index_new_stream'
+    ),
+    path('group/<slug:slug>/new/', views.group_new, name='group_new'),
+    path(
+        'group/<slug:slug>/new/stream/',
+        views.group_new,
+        {'stream': True},
+        name='group_new_stream'
+    ),
+    path('follow/new/', views.follow_new, name='follow_new'),
+    path(
+        'follow/new/stream/',
+        views.follow_new,
+        {'stream': True},
+        name='follow_new_stream'
+    ),
+    path(
+        'group/<slug:slug>/fragment/',
+        views.group_fragment,
+        name='group_fragment'
+    ),
+    path(
+        'profile/<str:username>/fragment/',
+        views.profile_fragment,
+        name='profile_fragment'
+    ),
+    path('follow/fragment/', views.follow_fragment, name='follow_fragment'),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/delete/',
+        views.post_delete,
+        name='post_delete'
+    ),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path('tags/<str:name>/', views.tag_posts, name='tag'),
+    path('mentions/', views.mentions, name='mentions'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/digest/', views.digest_settings, name='digest'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,4 +106,24 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'posts/<int:post_id>/react/<str:kind>/',
+        views.post_react,
+        name='post_react'
+    ),
+    path(
+        'posts/<int:post_id>/unreact/<str:kind>/',
+        views.post_unreact,
+        name='post_unreact'
+    ),
+    path(
+        'comments/<int:comment_id>/react/<str:kind>/',
+        views.comment_react,
+        name='comment_react'
+    ),
+    path(
+        'comments/<int:comment_id>/unreact/<str:kind>/',
+        views.comment_unreact,
+        name='comment_unreact'
+    ),
 ]
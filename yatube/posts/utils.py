@@ -1,8 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Q
 from yatube.settings import COUNT_OF_POSTS_FOR_PAGINATOR as NUM
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
 
 def my_pagin(posts, request):
     paginator = Paginator(posts, NUM)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def cache_timeout(empty=False):
+    """Время жизни сбрасываемого ключа кэша (INVALIDATED_CACHE_TIMEOUT).
+
+    empty — значение для пустой ленты: такие ключи могут появляться по
+    несуществующим адресам и не должны жить вечно.
+    """
+    timeout = settings.INVALIDATED_CACHE_TIMEOUT
+    if empty and timeout is None:
+        return settings.EMPTY_FEED_TIMEOUT
+    return timeout
+
+
+def make_cursor(post):
+    """Курсор ленты после поста: '<pub_date в мкс>_<pk>'."""
+    return f'{(post.pub_date - EPOCH) // MICROSECOND}_{post.pk}'
+
+
+def parse_cursor(cursor):
+    """Обратное make_cursor; ValueError для испорченного курсора."""
+    stamp, pk = cursor.split('_')
+    return EPOCH + int(stamp) * MICROSECOND, int(pk)
+
+
+def after_cursor(posts, cursor, size=NUM, archive=None):
+    """Посты ленты после курсора (keyset) и курсор следующей порции.
+
+    Порядок ленты — (-pub_date, -pk), поэтому выборка идёт по индексу
+    без OFFSET и не съезжает, когда сверху появляются новые посты.
+    Когда posts кончаются, порция добирается из archive: архивные посты
+    всегда старше горячих.
+    """
+    def page(posts, limit):
+        posts = posts.order_by('-pub_date', '-pk')
+        if cursor:
+            pub_date, pk = parse_cursor(cursor)
+            posts = posts.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        return list(posts[:limit])
+
+    batch = page(posts, size + 1)
+    if len(batch) <= size and archive is not None:
+        batch += page(archive, size + 1 - len(batch))
+    if len(batch) > size:
+        return batch[:size], make_cursor(batch[size - 1])
+    return batch, None
+
+
+class Chain:
+    """Несколько выборок подряд как один список для Paginator.
+
+    Paginator берёт только count() и срезы, поэтому каждая выборка
+    считается один раз, а срез страницы запрашивает только те выборки,
+    на которые он попадает.
+    """
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(self.count())
+        result = []
+        for queryset, count in zip(self.querysets, self.counts()):
+            if start < count and stop > 0:
+                result += list(queryset[max(start, 0):min(stop, count)])
+            start -= count
+            stop -= count
+        return result
+
+
+class Clusters:
+    """Объединение в группы (система непересекающихся множеств)."""
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+    def groups(self):
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
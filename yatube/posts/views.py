@@ -1,16 +1,52 @@
+import json
+import time
+
+from django.conf import settings
+from django.http import (
+    Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+)
 from django.shortcuts import redirect, render, get_object_or_404
-from .models import Post, Group, User, Follow
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
+from django.views.static import serve
+from .models import (
+    ArchivedPost, Comment, DigestSubscription, Follow, Group, Mention, Post,
+    PostTag, Tag, User
+)
 
-from .forms import PostForm, CommentForm
+from .forms import PostForm, CommentForm, DigestForm
 from django.contrib.auth.decorators import login_required
-from .utils import my_pagin
+from core.ratelimit import ratelimit
+from tasks.queue import enqueue_on_commit
+from .utils import Chain, after_cursor, my_pagin
+from .trending import trending_posts
+from .counters import most_viewed_posts, view_counter
+from . import (
+    archive, deletion, fresh, hashtags, reactions, revisions, stamps
+)
+from .tasks import hash_image, warm_thumbnails
 
 
 def index(request):
     template = 'posts/index.html'
-    page_obj = my_pagin(Post.objects.all(), request)
+    page_obj = my_pagin(Post.objects.for_list(), request)
+    context = {
+        'page_obj': page_obj,
+        'fragment_url': reverse('posts:index_fragment'),
+        'new_posts_url': reverse('posts:index_new'),
+        'new_posts_stream': settings.NEW_POSTS_STREAM
+    }
+    return render(request, template, context)
+
+
+def trending(request):
+    template = 'posts/trending.html'
     context = {
-        'page_obj': page_obj
+        'page_obj': trending_posts(),
+        'most_viewed': most_viewed_posts(),
+        'trending': True
     }
     return render(request, template, context)
 
@@ -18,21 +54,27 @@ def index(request):
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts_list = group.posts.all()
+    posts_list = group.posts.for_list()
     count = group.posts.all().count()
     page_obj = my_pagin(posts_list, request)
     context = {
         'page_obj': page_obj,
         'group': group,
-        'count': count
+        'count': count,
+        'fragment_url': reverse('posts:group_fragment', args=(slug,)),
+        'new_posts_url': reverse('posts:group_new', args=(slug,)),
+        'new_posts_stream': settings.NEW_POSTS_STREAM
     }
     return render(request, template, context)
 
 
 def profile(request, username):
     template = 'posts/profile.html'
-    profile_user = get_object_or_404(User, username=username)
-    posts = profile_user.posts.all()
+    profile_user = get_object_or_404(User, username=username, is_active=True)
+    posts = Chain(
+        profile_user.posts.for_list(),
+        profile_user.archived_posts.for_list()
+    )
     page_obj = my_pagin(posts, request)
     count = posts.count()
     following = False
@@ -45,19 +87,30 @@ def profile(request, username):
         'page_obj': page_obj,
         'author': profile_user,
         'count': count,
-        'following': following
+        'following': following,
+        'fragment_url': reverse('posts:profile_fragment', args=(username,))
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    count = Post.objects.filter(author=post.author).count()
+    post = archive.find(post_id)
+    if post is None:
+        raise Http404
+    views = post.views
+    if not post.is_archived:
+        view_counter.hit(post.pk)
+        views += view_counter.pending(post.pk)
+    count = (
+        Post.objects.filter(author=post.author_id).count()
+        + ArchivedPost.objects.filter(author=post.author_id).count()
+    )
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
+        'views': views,
         'count': count,
         'form': form,
         'comments': comments
@@ -66,6 +119,7 @@ def post_detail(request, post_id):
 
 
 @login_required
+@ratelimit('posts:post_create')
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(
@@ -74,7 +128,10 @@ def post_create(request):
     )
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        post = form.save()
+        if post.image:
+            enqueue_on_commit(warm_thumbnails, args=(post.pk,))
+            enqueue_on_commit(hash_image, args=(post.pk,))
         return redirect(
             'posts:profile',
             username=request.user.username
@@ -96,7 +153,13 @@ def post_edit(request, post_id):
             instance=post
         )
         if form.is_valid():
-            form.save()
+            post = form.save()
+            if 'text' in form.changed_data:
+                revisions.record(post, form.initial['text'], request.user)
+            if 'image' in form.changed_data:
+                enqueue_on_commit(hash_image, args=(post.pk,))
+                if post.image:
+                    enqueue_on_commit(warm_thumbnails, args=(post.pk,))
             return redirect('posts:post_detail', post_id)
         context = {
             'form': form,
@@ -111,6 +174,47 @@ def post_edit(request, post_id):
 
 
 @login_required
+def post_delete(request, post_id):
+    """Подтверждение и удаление поста автором."""
+    template = 'posts/post_delete.html'
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    if post.author != request.user:
+        return redirect('posts:post_detail', post_id)
+    if request.method == 'POST':
+        deletion.delete_post(post)
+        return redirect('posts:profile', username=request.user.username)
+    return render(request, template, {'post': post})
+
+
+@login_required
+def post_history(request, post_id):
+    """Версии текста поста: видны автору и модераторам."""
+    template = 'posts/history.html'
+    post = get_object_or_404(Post, pk=post_id)
+    if post.author != request.user and not request.user.is_staff:
+        return redirect('posts:post_detail', post_id)
+    versions = list(post.revisions.select_related('editor').defer('data'))
+    number = request.GET.get('revision')
+    current = versions[-1].number if versions else None
+    if number is not None:
+        try:
+            current = int(number)
+        except ValueError:
+            raise Http404
+    text = revisions.text_at(post, current) if current else post.text
+    if text is None:
+        raise Http404
+    context = {
+        'post': post,
+        'versions': versions,
+        'current': current,
+        'text': text
+    }
+    return render(request, template, context)
+
+
+@login_required
+@ratelimit('posts:add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST)
@@ -125,15 +229,147 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.filter(
+        author__following__user=request.user
+    ).for_list()
     page_obj = my_pagin(posts, request)
     context = {
-        "page_obj": page_obj
+        "page_obj": page_obj,
+        'fragment_url': reverse('posts:follow_fragment'),
+        'new_posts_url': reverse('posts:follow_new'),
+        'new_posts_stream': settings.NEW_POSTS_STREAM
     }
     return render(request, template, context)
 
 
+def _feed_fragment(request, posts, page_url, archive=None):
+    """Порция ленты после курсора: JSON с HTML постов и курсором."""
+    try:
+        page, next_cursor = after_cursor(
+            posts, request.GET.get('cursor'), archive=archive
+        )
+    except (ValueError, OverflowError):
+        return HttpResponseBadRequest('Неверный курсор')
+    html = render_to_string(
+        'posts/includes/post_list.html',
+        {'page_obj': page, 'next_url': page_url},
+        request=request
+    )
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
+
+
+def index_fragment(request):
+    return _feed_fragment(
+        request, Post.objects.for_list(), reverse('posts:index')
+    )
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed_fragment(
+        request,
+        group.posts.for_list(),
+        reverse('posts:group_list', args=(slug,))
+    )
+
+
+def profile_fragment(request, username):
+    author = get_object_or_404(User, username=username, is_active=True)
+    return _feed_fragment(
+        request,
+        author.posts.for_list(),
+        reverse('posts:profile', args=(username,)),
+        archive=author.archived_posts.for_list()
+    )
+
+
 @login_required
+def follow_fragment(request):
+    return _feed_fragment(
+        request,
+        Post.objects.filter(
+            author__following__user=request.user
+        ).for_list(),
+        reverse('posts:follow_index')
+    )
+
+
+def _links_page(request, links):
+    """Страница ленты по строкам PostTag или Mention после курсора.
+
+    Строки хранят pub_date поста, поэтому курсор и порядок — те же, что
+    у лент постов, а выборка идёт по индексу таблицы связей.
+    """
+    links = links.filter(post__deleted__isnull=True).select_related(
+        'post__author', 'post__group'
+    ).defer('post__text', 'post__text_html')
+    return after_cursor(links, request.GET.get('cursor'))
+
+
+def tag_posts(request, name):
+    template = 'posts/tag.html'
+    tag = get_object_or_404(Tag, name=name.casefold())
+    try:
+        links, next_cursor = _links_page(
+            request, PostTag.objects.filter(tag=tag)
+        )
+    except (ValueError, OverflowError):
+        return HttpResponseBadRequest('Неверный курсор')
+    context = {
+        'tag': tag,
+        'page_obj': [link.post for link in links],
+        'next_cursor': next_cursor
+    }
+    return render(request, template, context)
+
+
+@login_required
+def mentions(request):
+    """Посты с упоминанием пользователя.
+
+    Просмотр гасит уведомления только о постах показанной страницы.
+    """
+    template = 'posts/mentions.html'
+    try:
+        links, next_cursor = _links_page(
+            request, Mention.objects.filter(user=request.user)
+        )
+    except (ValueError, OverflowError):
+        return HttpResponseBadRequest('Неверный курсор')
+    unseen = {link.post_id for link in links if not link.seen}
+    if unseen:
+        hashtags.mark_seen(request.user.pk, unseen)
+    context = {
+        'page_obj': [link.post for link in links],
+        'unseen': unseen,
+        'next_cursor': next_cursor
+    }
+    return render(request, template, context)
+
+
+@login_required
+def digest_settings(request):
+    template = 'posts/digest.html'
+    subscription = DigestSubscription.objects.filter(
+        user=request.user
+    ).first()
+    if request.method == 'POST' and 'unsubscribe' in request.POST:
+        DigestSubscription.objects.filter(user=request.user).delete()
+        return redirect('posts:digest')
+    form = DigestForm(request.POST or None, instance=subscription)
+    if form.is_valid():
+        form.instance.user = request.user
+        form.save()
+        return redirect('posts:digest')
+    context = {
+        'form': form,
+        'subscribed': subscription is not None
+    }
+    return render(request, template, context)
+
+
+@login_required
+@ratelimit('posts:profile_follow')
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -148,6 +384,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('posts:profile_unfollow')
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(
@@ -155,3 +392,111 @@ def profile_unfollow(request, username):
         author=author
     ).delete()
     return redirect("posts:profile", username=username)
+
+
+def _new_posts_events(scopes, cursor):
+    interval = settings.NEW_POSTS_STREAM_INTERVAL
+    deadline = time.monotonic() + settings.NEW_POSTS_STREAM_TIMEOUT
+    yield f'retry: {interval * 1000}\n\n'
+    last = None
+    while True:
+        count, more = fresh.count_newer(scopes, cursor)
+        if (count, more) != last:
+            last = count, more
+            data = json.dumps({'count': count, 'more': more})
+            yield f'data: {data}\n\n'
+        else:
+            # пустой комментарий: держит соединение и замечает разрыв
+            yield ':\n\n'
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(interval)
+
+
+def _new_posts(request, scopes, stream):
+    """Число постов новее курсора since: JSON или поток SSE.
+
+    Считается по верхушкам лент в кэше (posts.fresh), запрос ленты
+    не выполняется. Поток держит исполнителя всё время, пока открыт,
+    поэтому он отдаётся только при NEW_POSTS_STREAM.
+    """
+    if stream and not settings.NEW_POSTS_STREAM:
+        raise Http404
+    cursor = request.GET.get('since', '')
+    try:
+        count, more = fresh.count_newer(scopes, cursor)
+    except (ValueError, OverflowError):
+        return HttpResponseBadRequest('Неверный курсор')
+    if not stream:
+        return JsonResponse({'count': count, 'more': more})
+    response = StreamingHttpResponse(
+        _new_posts_events(scopes, cursor),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache, no-transform'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def index_new(request, stream=False):
+    return _new_posts(request, [stamps.INDEX], stream)
+
+
+def group_new(request, slug, stream=False):
+    group = get_object_or_404(Group, slug=slug)
+    return _new_posts(request, [stamps.group_scope(group.slug)], stream)
+
+
+@login_required
+def follow_new(request, stream=False):
+    return _new_posts(
+        request, fresh.following_scopes(request.user.pk), stream
+    )
+
+
+def _set_reaction(request, obj, kind, action):
+    if kind not in reactions.KIND_LABELS:
+        raise Http404
+    action(request.user, obj, kind)
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(
+        next_url,
+        allowed_hosts={request.get_host()},
+        require_https=request.is_secure()
+    ):
+        return redirect(next_url)
+    post_id = obj.post_id if isinstance(obj, Comment) else obj.pk
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@require_POST
+@login_required
+def post_react(request, post_id, kind):
+    post = get_object_or_404(Post, pk=post_id)
+    return _set_reaction(request, post, kind, reactions.react)
+
+
+@require_POST
+@login_required
+def post_unreact(request, post_id, kind):
+    post = get_object_or_404(Post, pk=post_id)
+    return _set_reaction(request, post, kind, reactions.unreact)
+
+
+@require_POST
+@login_required
+def comment_react(request, comment_id, kind):
+    comment = get_object_or_404(Comment, pk=comment_id)
+    return _set_reaction(request, comment, kind, reactions.react)
+
+
+@require_POST
+@login_required
+def comment_unreact(request, comment_id, kind):
+    comment = get_object_or_404(Comment, pk=comment_id)
+    return _set_reaction(request, comment, kind, reactions.unreact)
+
+
+def sitemap(request, path='sitemap.xml'):
+    """Готовые файлы карты сайта; в бою их отдаёт веб-сервер."""
+    return serve(request, path, document_root=settings.SITEMAP_ROOT)
@@ -0,0 +1,76 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks import queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Исполнитель фоновой очереди: забирает задачи пачками и выполняет '
+        'их в пуле потоков или процессов. SIGTERM и Ctrl+C завершают '
+        'работу после текущей пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Размер пула (по умолчанию TASKS_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'),
+            help='Тип пула (по умолчанию TASKS_POOL)'
+        )
+        parser.add_argument(
+            '--batch', type=int,
+            help='Задач за один захват (по умолчанию TASKS_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти'
+        )
+        parser.add_argument(
+            '--purge-days', type=int,
+            help='Удалить выполненные задачи старше N дней и выйти'
+        )
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            deleted = queue.purge(timedelta(days=options['purge_days']))
+            self.stdout.write(f'Удалено задач: {deleted}')
+            return
+        concurrency = options['concurrency'] or settings.TASKS_CONCURRENCY
+        batch = options['batch'] or settings.TASKS_BATCH_SIZE
+        if (options['pool'] or settings.TASKS_POOL) == 'process':
+            # дочерние процессы не должны наследовать соединения родителя
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=concurrency)
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency)
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        done = 0
+        with pool:
+            try:
+                while self.running:
+                    queue.requeue_stale()
+                    ids = queue.claim(batch)
+                    if ids:
+                        list(pool.map(queue.execute_in_pool, ids))
+                        done += len(ids)
+                    elif options['once']:
+                        break
+                    else:
+                        time.sleep(settings.TASKS_POLL_INTERVAL)
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(f'Обработано задач: {done}')
+
+    def stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Отложенная задача фоновой очереди."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы (JSON)', default='{}')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    idempotency_key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        unique=True,
+        blank=True,
+        null=True
+    )
+    locked_by = models.CharField('Захвачена', max_length=64, blank=True)
+    locked_at = models.DateTimeField('Захвачена в', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        indexes = (
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='task_dequeue_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
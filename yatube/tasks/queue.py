@@ -0,0 +1,181 @@
+"""Фоновая очередь задач в базе данных.
+
+Задача — функция, зарегистрированная декоратором @task в модуле
+tasks.py любого приложения. Постановка в очередь:
+
+    enqueue(warm_thumbnails, args=(post.pk,), key=f'thumb:{post.pk}')
+
+или, внутри транзакции запроса, enqueue_on_commit(...) — задача попадёт
+в очередь только после фиксации транзакции. Исполняет задачи команда
+run_tasks: она забирает пачку готовых задач одним UPDATE, выполняет их
+в пуле потоков или процессов и при ошибке откладывает повтор
+с экспоненциальной задержкой.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Зарегистрировать функцию как фоновую задачу."""
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    registry[func.task_name] = func
+    return func
+
+
+def enqueue(func, args=(), kwargs=None, priority=0, delay=None, key=None,
+            max_attempts=None):
+    """Поставить задачу в очередь.
+
+    key — ключ идемпотентности: пока задача с этим ключом ждёт или
+    выполняется, повторная постановка возвращает её. Выполненная или
+    упавшая задача ключ освобождает, и работа ставится заново.
+    """
+    name = func if isinstance(func, str) else func.task_name
+    fields = {
+        'name': name,
+        'payload': json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        'priority': priority,
+        'run_at': timezone.now() + (delay or timedelta()),
+        'max_attempts': max_attempts or settings.TASKS_MAX_ATTEMPTS,
+        'idempotency_key': key,
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    while True:
+        try:
+            with transaction.atomic():
+                return Task.objects.create(**fields)
+        except IntegrityError:
+            existing = Task.objects.filter(idempotency_key=key).first()
+            # задача могла завершиться и освободить ключ между запросами
+            if existing is not None:
+                return existing
+
+
+def enqueue_on_commit(func, **options):
+    """Поставить задачу после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: enqueue(func, **options))
+
+
+def requeue_stale():
+    """Вернуть в очередь задачи упавших исполнителей.
+
+    Упавший исполнитель тратит попытку: задача, которая каждый раз
+    роняет процесс, после max_attempts помечается ошибкой.
+    Возвращает число задач, вернувшихся в очередь.
+    """
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.TASKS_LOCK_TIMEOUT
+        )
+    )
+    released = {
+        'attempts': F('attempts') + 1, 'locked_by': '', 'locked_at': None
+    }
+    with transaction.atomic():
+        failed = stale.filter(
+            attempts__gte=F('max_attempts') - 1
+        ).update(
+            status=Task.FAILED,
+            idempotency_key=None,
+            last_error='Исполнитель завершился, не выполнив задачу',
+            **released
+        )
+        requeued = stale.update(status=Task.QUEUED, **released)
+    if failed:
+        logger.error('Задач не выполнено из-за упавших исполнителей: %s',
+                     failed)
+    return requeued
+
+
+def claim(batch):
+    """Забрать до batch готовых задач. Возвращает их id.
+
+    Захват — один UPDATE с условием status=queued, поэтому одну задачу
+    не заберут два исполнителя.
+    """
+    now = timezone.now()
+    ids = list(
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by('-priority', 'run_at')
+        .values_list('pk', flat=True)[:batch]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    Task.objects.filter(pk__in=ids, status=Task.QUEUED).update(
+        status=Task.RUNNING, locked_by=token, locked_at=now
+    )
+    return list(Task.objects.filter(
+        locked_by=token, status=Task.RUNNING
+    ).order_by('-priority', 'run_at').values_list('pk', flat=True))
+
+
+def backoff(attempts):
+    return timedelta(
+        seconds=settings.TASKS_RETRY_BACKOFF * 2 ** (attempts - 1)
+    )
+
+
+def execute(task_id):
+    """Выполнить захваченную задачу и записать результат."""
+    current = Task.objects.get(pk=task_id)
+    current.attempts += 1
+    try:
+        func = registry[current.name]
+        payload = json.loads(current.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        current.last_error = traceback.format_exc()
+        if current.attempts >= current.max_attempts:
+            current.status = Task.FAILED
+            logger.error('Задача %s не выполнена', current)
+        else:
+            current.status = Task.QUEUED
+            current.run_at = timezone.now() + backoff(current.attempts)
+    else:
+        current.status = Task.DONE
+        current.last_error = ''
+    if current.status != Task.QUEUED:
+        current.idempotency_key = None
+    current.locked_by = ''
+    current.locked_at = None
+    current.save(update_fields=(
+        'attempts', 'status', 'run_at', 'last_error', 'idempotency_key',
+        'locked_by', 'locked_at'
+    ))
+    return current.status
+
+
+def execute_in_pool(task_id):
+    """execute для потока или процесса пула со своим соединением с базой.
+
+    Функция верхнего уровня, чтобы её можно было передать в пул процессов.
+    """
+    close_old_connections()
+    try:
+        return execute(task_id)
+    finally:
+        close_old_connections()
+
+
+def purge(older_than):
+    """Удалить выполненные задачи старше older_than (timedelta)."""
+    return Task.objects.filter(
+        status=Task.DONE, run_at__lt=timezone.now() - older_than
+    ).delete()[0]
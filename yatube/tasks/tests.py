@@ -0,0 +1,140 @@
+import os
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from tasks import queue
+from tasks.models import Task
+
+calls = []
+
+
+@queue.task
+def remember(value):
+    calls.append(value)
+
+
+@queue.task
+def explode():
+    raise RuntimeError('boom')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_in_priority_order(self):
+        """Задачи выполняются по приоритету, затем по времени"""
+        queue.enqueue(remember, args=('low',))
+        queue.enqueue(remember, args=('high',), priority=10)
+        queue.enqueue(remember, args=('later',), delay=timedelta(hours=1))
+        for task_id in queue.claim(10):
+            queue.execute(task_id)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 2)
+        self.assertEqual(Task.objects.filter(status=Task.QUEUED).count(), 1)
+
+    def test_claim_is_exclusive_and_batched(self):
+        """Захваченную задачу не заберёт второй исполнитель"""
+        for number in range(5):
+            queue.enqueue(remember, args=(number,))
+        first = queue.claim(3)
+        second = queue.claim(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(queue.claim(3), [])
+
+    def test_idempotency_key(self):
+        """Повторная постановка с тем же ключом не создаёт задачу"""
+        first = queue.enqueue(remember, args=(1,), key='once')
+        second = queue.enqueue(remember, args=(2,), key='once')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_finished_task_releases_key(self):
+        """После выполнения задача с тем же ключом ставится заново"""
+        first = queue.enqueue(remember, args=(1,), key='once')
+        queue.execute(queue.claim(1)[0])
+        second = queue.enqueue(remember, args=(2,), key='once')
+        self.assertNotEqual(first.pk, second.pk)
+        queue.execute(queue.claim(1)[0])
+        self.assertEqual(calls, [1, 2])
+
+    def test_retry_with_backoff_then_fail(self):
+        """Ошибка откладывает повтор, после max_attempts задача падает"""
+        current = queue.enqueue(explode, max_attempts=2)
+        queue.execute(current.pk)
+        current.refresh_from_db()
+        self.assertEqual(current.status, Task.QUEUED)
+        self.assertEqual(current.attempts, 1)
+        self.assertIn('boom', current.last_error)
+        self.assertGreater(current.run_at, timezone.now())
+        self.assertEqual(queue.claim(1), [])
+        Task.objects.filter(pk=current.pk).update(run_at=timezone.now())
+        queue.execute(queue.claim(1)[0])
+        current.refresh_from_db()
+        self.assertEqual(current.status, Task.FAILED)
+
+    def test_requeue_stale(self):
+        """Задача упавшего исполнителя возвращается в очередь"""
+        queue.enqueue(remember, args=(1,))
+        task_id = queue.claim(1)[0]
+        Task.objects.filter(pk=task_id).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(queue.claim(1), [task_id])
+
+    def crash_worker(self):
+        queue.claim(1)
+        Task.objects.filter(status=Task.RUNNING).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+
+    def test_stale_task_uses_attempts(self):
+        """Задача, роняющая исполнителя, падает после max_attempts"""
+        current = queue.enqueue(remember, max_attempts=2, key='crash')
+        self.crash_worker()
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.crash_worker()
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            self.assertEqual(queue.requeue_stale(), 0)
+        current.refresh_from_db()
+        self.assertEqual(current.status, Task.FAILED)
+        self.assertEqual(current.attempts, 2)
+        self.assertIsNone(current.idempotency_key)
+
+
+class WorkerCommandTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_tasks_once(self):
+        """Команда выполняет задачи в пуле потоков и выходит"""
+        for number in range(5):
+            queue.enqueue(remember, args=(number,))
+        # один поток: тестовая SQLite в памяти блокирует таблицу целиком
+        call_command(
+            'run_tasks', once=True, concurrency=1, batch=2,
+            stdout=open(os.devnull, 'w')
+        )
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_enqueue_on_commit(self):
+        """Задача попадает в очередь только после фиксации транзакции"""
+        with transaction.atomic():
+            queue.enqueue_on_commit(remember, args=(1,))
+            self.assertFalse(Task.objects.exists())
+        self.assertTrue(Task.objects.exists())
+        try:
+            with transaction.atomic():
+                queue.enqueue_on_commit(remember, args=(2,))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(Task.objects.count(), 1)
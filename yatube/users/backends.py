@@ -0,0 +1,60 @@
+"""Загрузка пользователя запроса из кэша.
+
+AuthenticationMiddleware на каждый запрос достаёт пользователя по id
+из сессии. CachedModelBackend хранит в кэше компактный снимок строки
+пользователя (кортеж значений полей) и собирает из него объект User без
+запроса к базе. Снимок удаляется при любом сохранении или удалении
+пользователя, в том числе при смене пароля, а в снимке есть хэш пароля,
+поэтому проверка хэша сессии Django продолжает разлогинивать старые
+сессии после смены пароля.
+
+Снимок удаляется только из кэша, поэтому бэкенд включается лишь с
+общим для всех процессов кэшем (SHARED_CACHE в настройках).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+User = get_user_model()
+
+
+def cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _fields():
+    return [field.attname for field in User._meta.concrete_fields]
+
+
+def snapshot(user):
+    return tuple(getattr(user, name) for name in _fields())
+
+
+def restore(values):
+    user = User(**dict(zip(_fields(), values)))
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+def invalidate(user_id):
+    cache.delete(cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        values = cache.get(cache_key(user_id))
+        if values is not None:
+            user = restore(values)
+        else:
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(
+                cache_key(user_id),
+                snapshot(user),
+                settings.AUTH_USER_CACHE_TIMEOUT
+            )
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class SettingsTests(TestCase):
+    def test_local_cache_disables_cached_auth(self):
+        """С кэшем в памяти процесса сессии и пользователи не кэшируются"""
+        self.assertFalse(settings.SHARED_CACHE)
+        self.assertEqual(
+            settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db'
+        )
+        self.assertEqual(
+            settings.AUTHENTICATION_BACKENDS,
+            ['django.contrib.auth.backends.ModelBackend']
+        )
+
+
+# один тестовый процесс: LocMemCache ведёт себя как общий кэш
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend']
+)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', password='Old-passw0rd'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_no_queries_on_cache_hit(self):
+        """Сессия и пользователь берутся из кэша без запросов к базе"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_user_save_refreshes_snapshot(self):
+        """Изменение пользователя сразу видно в запросах"""
+        self.client.get(self.url)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Лев')
+
+    def test_inactive_user_is_logged_out(self):
+        """Отключённый пользователь перестаёт быть авторизованным"""
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Смена пароля разлогинивает остальные сессии"""
+        other = Client()
+        other.force_login(self.user)
+        other.get(self.url)
+        self.client.post(reverse('users:password_change'), {
+            'old_password': 'Old-passw0rd',
+            'new_password1': 'New-passw0rd-1',
+            'new_password2': 'New-passw0rd-1',
+        })
+        self.assertTrue(
+            self.client.get(self.url).context['user'].is_authenticated
+        )
+        self.assertFalse(other.get(self.url).context['user'].is_authenticated)
+
+    def test_logout(self):
+        """Выход работает и с закэшированным пользователем"""
+        self.client.get(self.url)
+        self.client.get(reverse('users:logout'))
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookie_sessions(self):
+        """С сессиями в cookie запрос обходится без базы"""
+        client = Client()
+        client.post(reverse('users:login'), {
+            'username': 'auth', 'password': 'Old-passw0rd'
+        })
+        client.get(self.url)
+        with self.assertNumQueries(0):
+            response = client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
@@ -12,6 +12,7 @@ app_name = 'users'
 
 urlpatterns = [
     path('signup/', views.SignUp.as_view(), name='signup'),
+    path('delete/', views.DeleteAccount.as_view(), name='delete_account'),
     path(
         'logout/',
         LogoutView.as_view(template_name='users/logged_out.html'),
@@ -1,10 +1,53 @@
-from django.views.generic import CreateView
+from django.conf import settings
+from django.contrib.auth import logout
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.mail import send_mail
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.views.generic import CreateView, FormView
 from django.urls import reverse_lazy
 
-from .forms import CreationForm
+from posts.deletion import delete_account
+
+from .forms import CreationForm, DeleteAccountForm
 
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    def form_valid(self, form):
+        # пользователь и письмо в outbox — одна транзакция: сбой между
+        # ними не оставит зарегистрированного без приветствия
+        with transaction.atomic():
+            response = super().form_valid(form)
+            user = self.object
+            if user.email:
+                send_mail(
+                    'Добро пожаловать в Yatube',
+                    render_to_string('users/email/welcome.txt', {
+                        'user': user,
+                        'site_url': settings.SITE_URL
+                    }),
+                    None,
+                    [user.email]
+                )
+        return response
+
+
+class DeleteAccount(LoginRequiredMixin, FormView):
+    """Удаление аккаунта: контент пропадает сразу, строки — в фоне."""
+    form_class = DeleteAccountForm
+    success_url = reverse_lazy('posts:index')
+    template_name = 'users/delete_account.html'
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        delete_account(self.request.user)
+        logout(self.request)
+        return super().form_valid(form)
@@ -23,6 +23,8 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'tasks.apps.TasksConfig',
+    'outbox.apps.OutboxConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -34,10 +36,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.PrecompressedStaticMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -102,11 +107,28 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# collectstatic собирает статику сюда: имена с хэшем содержимого
+# и сжатые копии .gz/.br (core.staticfiles)
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
+# файлы меньше этого (в байтах) не сжимаются
+STATIC_COMPRESS_MIN_SIZE = 256
+
+# кэширование статики без хэша в имени (в секундах)
+STATIC_MAX_AGE = 60
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма пишутся в outbox (в транзакции, только если отправка идёт
+# внутри atomic()), отправляет их исполнитель send_outbox через
+# OUTBOX_EMAIL_BACKEND
+EMAIL_BACKEND = 'outbox.backends.OutboxBackend'
+
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -121,3 +143,211 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Кэш в памяти процесса у каждого процесса свой
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Сессии: 'db' — в базе; 'cached_db' — чтение из кэша, запись и в кэш,
+# и в базу; 'signed_cookies' — сессия целиком в подписанной cookie, без
+# хранилища (выход очищает cookie, но перехваченная копия живёт до
+# истечения срока).
+# 'cached_db' и пользователь запроса из кэша (users.backends) требуют
+# общего кэша (Redis, Memcached): выход и смена пароля удаляют записи
+# кэша только в процессе, обработавшем запрос, и с LocMemCache другие
+# процессы ещё AUTH_USER_CACHE_TIMEOUT принимали бы старую сессию и
+# старый хэш пароля. Без общего кэша — 'db' и обычный ModelBackend.
+SESSION_STRATEGY = 'cached_db' if SHARED_CACHE else 'db'
+
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_STRATEGY}'
+
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend' if SHARED_CACHE
+    else 'django.contrib.auth.backends.ModelBackend'
+]
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 60
+
+# Ключи, которые сбрасываются при изменениях (метки и верхушки лент,
+# подписки, число упоминаний), с общим кэшем живут до вытеснения. В кэше
+# процесса сброс виден только этому процессу, поэтому там они живут
+# столько секунд: остальные процессы видят изменения с такой задержкой
+INVALIDATED_CACHE_TIMEOUT = None if SHARED_CACHE else 10
+
+# Популярное: период полураспада рейтинга (в секундах), веса событий,
+# порог, ниже которого рейтинг удаляется при компактизации
+TRENDING_HALF_LIFE = 6 * 60 * 60
+
+TRENDING_WEIGHTS = {
+    'post': 1.0,
+    'comment': 2.0,
+    'follow': 3.0,
+}
+
+TRENDING_MIN_SCORE = 0.01
+
+TRENDING_SIZE = 10
+
+TRENDING_CACHE_TIMEOUT = 60
+
+# Просмотры постов копятся в памяти процесса и записываются пачкой
+# не чаще одного раза за интервал (в секундах)
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+
+# Число шардов счётчика реакций на один пост или комментарий
+REACTION_COUNTER_SHARDS = 8
+
+# RSS/Atom: число записей в ленте и время жизни готового XML в кэше;
+# метки и верхушки пустых лент (posts.stamps, posts.fresh) живут в кэше
+# не дольше EMPTY_FEED_TIMEOUT секунд
+FEED_SIZE = 20
+
+FEED_CACHE_TIMEOUT = 60 * 60
+
+EMPTY_FEED_TIMEOUT = 5 * 60
+
+# Адрес сайта для абсолютных ссылок вне запроса (карта сайта, письма)
+SITE_URL = 'http://127.0.0.1:8000'
+
+# Карта сайта: каталог с готовыми файлами, адресов в файле
+# (ограничение протокола — 50 000) и строк за один запрос при сборке
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+
+SITEMAP_URLS_PER_FILE = 50000
+
+SITEMAP_CHUNK_SIZE = 2000
+
+# Ограничение частоты запросов к пишущим адресам (core.ratelimit):
+# корзины для пользователя и для IP, методы, к которым применяется лимит
+RATELIMIT_ENABLED = True
+
+# включать только за своим прокси, иначе адрес подделывается заголовком
+RATELIMIT_TRUST_FORWARDED_FOR = False
+
+RATELIMITS = {
+    'posts:post_create': {'user': '10/m', 'ip': '60/m'},
+    'posts:add_comment': {'user': '20/m', 'ip': '120/m'},
+    'posts:profile_follow': {
+        'user': '30/m', 'ip': '120/m', 'methods': ('GET', 'POST')
+    },
+    'posts:profile_unfollow': {
+        'user': '30/m', 'ip': '120/m', 'methods': ('GET', 'POST')
+    },
+    'users:signup': {'ip': '5/h'},
+}
+
+# Фоновая очередь задач (tasks): пул исполнителя, размер пачки,
+# повторы с задержкой TASKS_RETRY_BACKOFF * 2 ** (попытка - 1) секунд
+TASKS_POOL = 'thread'
+
+TASKS_CONCURRENCY = 4
+
+TASKS_BATCH_SIZE = 20
+
+TASKS_MAX_ATTEMPTS = 5
+
+TASKS_RETRY_BACKOFF = 10
+
+# задача, захваченная дольше этого (в секундах), возвращается в очередь
+TASKS_LOCK_TIMEOUT = 10 * 60
+
+TASKS_POLL_INTERVAL = 1
+
+# Сводки новых постов на почту: подписок за один запрос и письмо,
+# постов в одном письме (остальные — ссылкой на ленту подписок)
+DIGEST_BATCH_SIZE = 500
+
+DIGEST_MAX_POSTS = 20
+
+# Outbox исходящих писем: писем за одно соединение, повторы с задержкой
+# OUTBOX_RETRY_BACKOFF * 2 ** (попытка - 1) секунд, после
+# OUTBOX_MAX_ATTEMPTS письмо считается недоставленным
+OUTBOX_BATCH_SIZE = 100
+
+OUTBOX_MAX_ATTEMPTS = 5
+
+OUTBOX_RETRY_BACKOFF = 60
+
+OUTBOX_LOCK_TIMEOUT = 10 * 60
+
+OUTBOX_POLL_INTERVAL = 5
+
+# Сжатие ответов (core.compression): порядок предпочтения при равном q
+# клиента, уровни сжатия и минимальный размер сжимаемого ответа в байтах;
+# br и zstd работают, только если установлены пакеты brotli и zstandard
+COMPRESSION_ENCODINGS = ('br', 'zstd', 'gzip')
+
+COMPRESSION_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+
+COMPRESSION_MIN_SIZE = 512
+
+# Баннер «N новых постов»: сколько последних постов ленты держать в кэше
+# (больше — показывается «N+»). Страница опрашивает JSON раз в 30 секунд.
+# Поток SSE занимает исполнителя на всё время, пока вкладка открыта, и
+# включается NEW_POSTS_STREAM только под асинхронным сервером (ASGI,
+# gevent); тогда задаются период проверки счётчика и через сколько
+# секунд поток закрывается (браузер переподключится сам)
+NEW_POSTS_WINDOW = 100
+
+NEW_POSTS_STREAM = False
+
+NEW_POSTS_STREAM_INTERVAL = 2
+
+NEW_POSTS_STREAM_TIMEOUT = 55
+
+# История правок постов: каждая N-я версия хранится полным текстом,
+# prune_revisions по умолчанию оставляет столько последних версий
+POST_REVISION_SNAPSHOT_EVERY = 10
+
+POST_REVISION_KEEP = 50
+
+# Архив (posts.archive): посты старше стольких дней archive_posts
+# переносит из горячей таблицы порциями по POST_ARCHIVE_BATCH_SIZE
+POST_ARCHIVE_AFTER_DAYS = 365
+
+POST_ARCHIVE_BATCH_SIZE = 500
+
+# Удаление постов и аккаунтов (posts.deletion): по сколько строк
+# фоновая задача удаляет за одну транзакцию
+DELETION_BATCH_SIZE = 500
+
+# Админка (core.paginator): таблицы больше стольких строк по статистике
+# базы показывают примерное число строк вместо COUNT(*)
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Массовая модерация (posts.moderation): строк в одном UPDATE/DELETE
+MODERATION_BATCH_SIZE = 1000
+
+# Фильтр запрещённых фраз (posts.spam): как часто процесс проверяет,
+# не изменился ли список, в секундах
+BANNED_PHRASES_RELOAD_INTERVAL = 5
+
+# Почти-дубликаты постов (posts.duplicates): тексты короче стольких слов
+# не проверяются; пост с большей долей общих пар слов считается дублем;
+# find_duplicates сверяет тексты порциями по стольким постам
+DUPLICATE_MIN_WORDS = 8
+
+DUPLICATE_SIMILARITY = 0.5
+
+DUPLICATE_BATCH_SIZE = 1000
+
+# Копии картинок (posts.images): наибольшее расстояние Хэмминга между
+# 64-битными dHash, при котором картинки считаются одной и той же
+IMAGE_HASH_DISTANCE = 6
+
+# Хэштеги и упоминания (posts.hashtags): по сколько постов index_hashtags
+# разбирает за одну транзакцию
+HASHTAGS_BATCH_SIZE = 1000
+
+# Разметка текстов (posts.markup): по сколько постов задача render_posts
+# перерисовывает после смены версии разметки
+RENDER_BATCH_SIZE = 500
+
+# Начало текста поста в списках (posts.markup): столько слов, но не
+# больше стольких символов; после изменения — manage.py render_posts
+# с увеличенной markup.VERSION
+EXCERPT_WORDS = 60
+
+EXCERPT_CHARS = 600
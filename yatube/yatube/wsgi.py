@@ -1,3 +1,4 @@
+import atexit
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -5,3 +6,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# незаписанные просмотры постов сохраняются при штатной остановке воркера
+from posts.counters import shutdown  # noqa: E402
+
+atexit.register(shutdown)